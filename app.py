@@ -1,30 +1,59 @@
-import sqlite3
-import pandas as pd
+import os
+import json
+import importlib.util
 import streamlit as st
 import streamlit.components.v1 as components
-import urllib.parse
-import plotly.express as px
-from datetime import date, timedelta
+import time
+from datetime import date, datetime, timedelta
+
+# regras de negócio: pacote artmax (também usado pelo CLI, python -m artmax)
+from artmax.config import (
+    APP_NAME, UNIDADES, BACKUP_DIR, SNAPSHOT_DIR, ANALITICO_DIR, PROFISSIONAIS, SERVICOS,
+)
+from artmax.datas import MESES_PT, month_range, date_iso, ym_of, ano_anterior
+from artmax.unidades import Unidades, Consolidado
+from artmax.cache import ReadCache, leitor, leitor_registros
+from artmax.registros import Venda, colunas
+from artmax.clientes import filtro_busca_clientes
+from artmax.whatsapp import build_whatsapp_link
+from artmax.db import ativos
+from artmax.agenda import SlotIndex, HorarioOcupado, agendar, duracao_servico
+from artmax.exclusoes import PurgaExclusoes, excluir, desfazer, exclusoes_recentes
+from artmax.vendas import registrar_venda, validar_regras, salvar_regras, recalcular_comissoes
+from artmax.despesas import registrar_gasto
+from artmax.relatorios import (
+    BI_PERIODOS, BI_AGRUPAMENTOS,
+    bi_totais, bi_agrupado, bi_ano_a_ano, primeiro_ano_com_dados, vendas_por_profissional, ultimas_vendas,
+)
+from artmax.graficos import BI_GRAFICOS_EXTRAS, GRAFICO_CONFIG, Graficos, versao_bi
+from artmax.lembretes import ReminderScheduler
+from artmax.sheets import SheetsExporter, sheets_client
+from artmax.backup import build_backup_zip, criar_snapshot, listar_snapshots, restaurar_snapshot
+from artmax.importacao import importar_arquivo
+from artmax.analitico import (
+    AtualizacaoAnalitica, exportar_analitico, exportado, esquecer_versoes, clientes_do_periodo, resumo_exportacao,
+)
+from artmax.diagnostico import DIAG, medido
 
 # =========================
 # (Opcional) Google Sheets
 # =========================
 # Para exportar para Google Sheets:
 # pip install gspread google-auth
-try:
-    import gspread
-    from google.oauth2.service_account import Credentials
-    HAS_SHEETS = True
-except Exception:
-    HAS_SHEETS = False
-
-# =========================================================
-# CONFIG
-# =========================================================
-APP_NAME = "Artmax Cabeleleiros"
-DB_PATH = "artmax.db"
+# Só verifica se está instalado; o import mesmo fica para a hora de exportar.
+# pandas e plotly também são importados só onde são usados (ver artmax/cache.py e artmax/graficos.py).
+def _tem_modulo(nome: str) -> bool:
+    try:
+        return importlib.util.find_spec(nome) is not None
+    except ModuleNotFoundError:
+        return False
+
+HAS_SHEETS = _tem_modulo("gspread") and _tem_modulo("google.oauth2.service_account")
+# Exportação analítica (Arrow/Parquet): pip install pyarrow
+HAS_ARROW = _tem_modulo("pyarrow")
 
 st.set_page_config(page_title=APP_NAME, layout="wide", page_icon="💜")
+t_rerun = time.perf_counter()  # tempo do rerun por página (tela Diagnóstico)
 
 # =========================================================
 # PALETA (roxo + dourado + preto + branco)
@@ -41,16 +70,16 @@ C_GOLD = "#D4AF37"
 C_GOLD_SOFT = "rgba(212,175,55,0.22)"
 C_WHITE = "#FFFFFF"
 
-PROFISSIONAIS = ["Eunides", "Evelyn"]
-SERVICOS = ["Escova", "Progressiva", "Luzes", "Coloração", "Botox", "Relaxamento", "Sobrancelha", "Corte", "Outros"]
-
 # =========================================================
 # UI (premium + sidebar opaca + resizer)
 # =========================================================
-def apply_ui():
-    st.markdown(f"""
-    <style>
-    @import url('https://fonts.googleapis.com/css2?family=Playfair+Display:wght@600;700&family=Inter:wght@400;500;600&display=swap');
+# Sem fontes externas nem self-hosted: Inter/Playfair quando instaladas no aparelho,
+# senão as fontes do sistema
+FONT_SANS = "'Inter', -apple-system, 'Segoe UI', Roboto, Helvetica, Arial, sans-serif"
+FONT_SERIF = "'Playfair Display', Georgia, 'Times New Roman', serif"
+
+def theme_css():
+    return f"""
 
     .stApp {{
         background:
@@ -58,7 +87,7 @@ def apply_ui():
           radial-gradient(circle at 80% 30%, rgba(212,175,55,0.12), rgba(11,11,16,0.0) 45%),
           {C_BG};
         color: {C_TEXT};
-        font-family: 'Inter', sans-serif;
+        font-family: {FONT_SANS};
     }}
 
     .app-header {{
@@ -80,7 +109,7 @@ def apply_ui():
         pointer-events: none;
     }}
     .app-title {{
-        font-family: 'Playfair Display', serif;
+        font-family: {FONT_SERIF};
         font-size: 28px;
         font-weight: 700;
         letter-spacing: 0.4px;
@@ -202,7 +231,7 @@ def apply_ui():
         backdrop-filter: blur(12px);
     }}
     .login-title {{
-        font-family: 'Playfair Display', serif;
+        font-family: {FONT_SERIF};
         font-size: 26px;
         font-weight: 700;
         color: {C_WHITE};
@@ -213,8 +242,89 @@ def apply_ui():
         font-size: 13px;
         margin-bottom: 14px;
     }}
-    </style>
-    """, unsafe_allow_html=True)
+    """
+
+# roda no documento principal (não no iframe do componente), então continua
+# ativo depois que o iframe some nos reruns seguintes
+SIDEBAR_RESIZER_JS = """
+(function () {
+  let sidebar = null;
+  let isResizing = false;
+
+  function montar() {
+    const atual = document.querySelector("section[data-testid='stSidebar']");
+    if (!atual || document.getElementById("sidebar-resizer")) return;
+    sidebar = atual;
+
+    const resizer = document.createElement("div");
+    resizer.id = "sidebar-resizer";
+    sidebar.appendChild(resizer);
+
+    resizer.addEventListener("mousedown", (e) => {
+      e.preventDefault();
+      isResizing = true;
+      document.body.style.cursor = "col-resize";
+    });
+  }
+
+  document.addEventListener("mousemove", (e) => {
+    if (!isResizing || !sidebar) return;
+
+    let newWidth = e.clientX;
+    const minW = 240;
+    const maxW = 520;
+    newWidth = Math.max(minW, Math.min(maxW, newWidth));
+
+    sidebar.style.width = newWidth + "px";
+    sidebar.style.minWidth = newWidth + "px";
+    sidebar.style.maxWidth = newWidth + "px";
+    sidebar.style.flex = "0 0 " + newWidth + "px";
+  });
+
+  document.addEventListener("mouseup", () => {
+    if (!isResizing) return;
+    isResizing = false;
+    document.body.style.cursor = "";
+  });
+
+  // a sidebar só aparece depois do login e pode ser recriada pelo Streamlit
+  new MutationObserver(montar).observe(document.body, { childList: true, subtree: true });
+  montar();
+})();
+"""
+
+@st.cache_resource
+def ui_bootstrap_html():
+    # montado uma vez por processo; injeta o tema e o resizer no <head> da página
+    return f"""
+        <script>
+          (function () {{
+            const doc = parent.document;
+            if (!doc.getElementById("artmax-theme")) {{
+              const style = doc.createElement("style");
+              style.id = "artmax-theme";
+              style.textContent = {json.dumps(theme_css())};
+              doc.head.appendChild(style);
+            }}
+            if (!doc.getElementById("artmax-resizer")) {{
+              const script = doc.createElement("script");
+              script.id = "artmax-resizer";
+              script.textContent = {json.dumps(SIDEBAR_RESIZER_JS)};
+              doc.head.appendChild(script);
+            }}
+          }})();
+        </script>
+        """
+
+def apply_ui():
+    # o tema fica no documento da página: basta enviá-lo no primeiro run da sessão
+    st.session_state.ui_bytes = 0
+    if st.session_state.get("ui_enviada"):
+        return
+    html = ui_bootstrap_html()
+    components.html(html, height=0)
+    st.session_state.ui_enviada = True
+    st.session_state.ui_bytes = len(html.encode("utf-8"))
 
 def header():
     st.markdown(
@@ -228,207 +338,10 @@ def header():
     )
 
 # =========================================================
-# UTIL: resizer da sidebar
-# =========================================================
-def sidebar_resizer():
-    components.html(
-        """
-        <script>
-          (function () {
-            const sidebar = parent.document.querySelector("section[data-testid='stSidebar']");
-            if (!sidebar) return;
-            if (parent.document.getElementById("sidebar-resizer")) return;
-
-            const resizer = parent.document.createElement("div");
-            resizer.id = "sidebar-resizer";
-            sidebar.appendChild(resizer);
-
-            let isResizing = false;
-
-            resizer.addEventListener("mousedown", (e) => {
-              e.preventDefault();
-              isResizing = true;
-              parent.document.body.style.cursor = "col-resize";
-            });
-
-            parent.document.addEventListener("mousemove", (e) => {
-              if (!isResizing) return;
-
-              let newWidth = e.clientX;
-              const minW = 240;
-              const maxW = 520;
-              newWidth = Math.max(minW, Math.min(maxW, newWidth));
-
-              sidebar.style.width = newWidth + "px";
-              sidebar.style.minWidth = newWidth + "px";
-              sidebar.style.maxWidth = newWidth + "px";
-              sidebar.style.flex = "0 0 " + newWidth + "px";
-            });
-
-            parent.document.addEventListener("mouseup", () => {
-              if (!isResizing) return;
-              isResizing = false;
-              parent.document.body.style.cursor = "";
-            });
-          })();
-        </script>
-        """,
-        height=0,
-    )
-
-# =========================================================
-# COMISSÃO: Evelyn por serviço
-# =========================================================
-COMISSAO_EVELYN = {
-    "Escova": 0.50,
-    "Progressiva": 0.50,
-    "Botox": 0.50,
-    "Sobrancelha": 0.60,
-    "Coloração": 0.40,
-    "Relaxamento": 0.50,
-}
-
-def calc_comissao(profissional: str, servico: str, valor_venda: float) -> float:
-    if profissional.strip().lower() != "evelyn":
-        return 0.0
-    pct = COMISSAO_EVELYN.get(servico, 0.0)
-    return float(valor_venda) * float(pct)
-
-# =========================================================
-# FUNÇÕES DE MÊS/ANO
-# =========================================================
-MESES_PT = [
-    "Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho",
-    "Julho", "Agosto", "Setembro", "Outubro", "Novembro", "Dezembro"
-]
-
-def month_range(year: int, month: int):
-    start = date(year, month, 1)
-    if month == 12:
-        end = date(year + 1, 1, 1)
-    else:
-        end = date(year, month + 1, 1)
-    return start, end
-
-def date_iso(d: date) -> str:
-    return d.isoformat()
-
-# =========================================================
-# DB
-# =========================================================
-def init_db():
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS agenda (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            data TEXT,
-            hora TEXT,
-            cliente TEXT,
-            telefone TEXT,
-            servico TEXT,
-            profissional TEXT
-        )
-    """)
-
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS vendas (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            data TEXT,
-            cliente TEXT,
-            valor REAL,
-            servico TEXT,
-            profissional TEXT,
-            comissao REAL DEFAULT 0
-        )
-    """)
-
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS gastos (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            data TEXT,
-            descricao TEXT,
-            valor REAL
-        )
-    """)
-
-    cols = [r[1] for r in conn.execute("PRAGMA table_info(vendas)").fetchall()]
-    if "comissao" not in cols:
-        conn.execute("ALTER TABLE vendas ADD COLUMN comissao REAL DEFAULT 0")
-
-    conn.commit()
-    return conn
-
-db = init_db()
-
-# =========================================================
-# WhatsApp
+# LOGIN (antes de abrir o banco e de carregar o resto do app)
 # =========================================================
-def build_whatsapp_link(nome, tel, servico, hora="", tipo="confirmacao"):
-    if not tel:
-        return None
-    msgs = {
-        "confirmacao": f"Olá {nome}! ✨ Confirmamos seu horário para {servico} às {hora}.",
-        "lembrete": f"Oi {nome}! 💜 Lembrete do seu horário hoje às {hora} ({servico}).",
-        "agradecimento": f"Obrigada pela preferência, {nome}! ✨ Foi um prazer atender você ({servico})."
-    }
-    msg = msgs.get(tipo, "")
-    tel_limpo = "".join(filter(str.isdigit, tel))
-    if not tel_limpo:
-        return None
-    return f"https://wa.me/55{tel_limpo}?text={urllib.parse.quote(msg)}"
-
-def open_whatsapp(link):
-    if not link:
-        return
-    components.html(f"<script>window.open('{link}', '_blank');</script>", height=0)
-
-# =========================================================
-# Google Sheets: export mês
-# =========================================================
-def export_mes_para_sheets(df_agenda, df_vendas, df_gastos, sheet_title: str):
-    scopes = [
-        "https://www.googleapis.com/auth/spreadsheets",
-        "https://www.googleapis.com/auth/drive"
-    ]
-    creds = Credentials.from_service_account_info(st.secrets["gcp_service_account"], scopes=scopes)
-    gc = gspread.authorize(creds)
-    sh = gc.create(sheet_title)
-
-    def upsert_worksheet(name, df):
-        try:
-            ws = sh.worksheet(name)
-            sh.del_worksheet(ws)
-        except Exception:
-            pass
-
-        ws = sh.add_worksheet(title=name, rows=1000, cols=30)
-
-        if df is None or df.empty:
-            ws.update([["(sem dados)"]])
-            return
-
-        df2 = df.copy().fillna("")
-        values = [df2.columns.tolist()] + df2.values.tolist()
-        ws.update(values)
-
-    upsert_worksheet("Agenda", df_agenda)
-    upsert_worksheet("Vendas", df_vendas)
-    upsert_worksheet("Gastos", df_gastos)
-
-    return sh.url
-
-# =========================================================
-# BACKUP CSV
-# =========================================================
-def df_to_csv_download(df: pd.DataFrame) -> bytes:
-    return df.to_csv(index=False).encode("utf-8-sig")
-
-# =========================================================
-# APP
-# =========================================================
-apply_ui()
-sidebar_resizer()
+with DIAG.span("tela", "tema (CSS/JS)"):
+    apply_ui()
 
 if "auth" not in st.session_state:
     st.session_state.auth = False
@@ -463,6 +376,234 @@ if not st.session_state.auth:
     st.markdown("</div></div>", unsafe_allow_html=True)
     st.stop()
 
+# =========================================================
+# SERVIÇOS (pacote artmax): banco, cache e robôs, um de cada por unidade e processo
+# =========================================================
+@st.cache_resource
+def get_unidades():
+    # uma instância por processo; cada unidade (filial) tem o próprio banco (ver artmax/unidades.py)
+    return Unidades(UNIDADES)
+
+unidades = get_unidades()
+
+st.sidebar.markdown("### 📅 Filtro")
+unidade = st.sidebar.selectbox("Unidade", unidades.nomes, key="unidade") if len(unidades) > 1 else unidades.nomes[0]
+
+@st.cache_resource
+def get_db(unidade: str):
+    # compartilhado por todas as sessões
+    return unidades.banco(unidade)
+
+@st.cache_resource
+def get_read_cache(unidade: str):
+    # sobrevive aos reruns do Streamlit e é compartilhado entre as sessões
+    return ReadCache()
+
+@st.cache_resource
+def get_slot_index(unidade: str):
+    return SlotIndex(get_db(unidade))
+
+@st.cache_resource
+def get_reminder_scheduler(unidade: str):
+    # uma thread por unidade e processo, fora do ciclo de rerun do Streamlit
+    return ReminderScheduler(get_db(unidade), get_read_cache(unidade))
+
+@st.cache_resource
+def get_purga(unidade: str):
+    # apaga de vez, em segundo plano, as exclusões que passaram do prazo de desfazer
+    return PurgaExclusoes(get_db(unidade))
+
+@st.cache_resource
+def get_atualizacao_analitica(unidade: str):
+    # mantém a cópia colunar em dia fora do rerun (o BI só lê); sem pyarrow, não sobe
+    return AtualizacaoAnalitica(get_db(unidade), unidades.pasta(ANALITICO_DIR, unidade))
+
+for u in unidades.nomes:
+    # robôs de todas as unidades rodando, não só o da unidade aberta na tela
+    get_reminder_scheduler(u)
+    get_purga(u)
+    if HAS_ARROW:
+        get_atualizacao_analitica(u)
+    if get_db(u).alterado_por_fora():
+        # escrita de outro processo (python -m artmax, importação): nada do que está em memória vale mais
+        get_read_cache(u).clear()
+        get_slot_index(u).descartar()
+
+db = get_db(unidade)
+read_cache = get_read_cache(unidade)
+ler_df = leitor(db, read_cache)
+ler_reg = leitor_registros(db, read_cache)
+invalidar = read_cache.invalidar
+agenda_slots = get_slot_index(unidade)
+lembretes = get_reminder_scheduler(unidade)
+
+# pastas da unidade (com uma unidade só, as de sempre)
+pasta_backup = unidades.pasta(BACKUP_DIR, unidade)
+pasta_snapshots = unidades.pasta(SNAPSHOT_DIR, unidade)
+pasta_analitico = unidades.pasta(ANALITICO_DIR, unidade)
+
+TODAS_UNIDADES = "Todas as unidades"
+
+def ler_todas_unidades():
+    # as mesmas funções de relatorios, em todas as unidades em paralelo, cada uma com o próprio cache
+    return Consolidado(unidades, {u: leitor(get_db(u), get_read_cache(u)) for u in unidades.nomes})
+
+@st.cache_resource
+def get_graficos(unidade: str):
+    # figuras do BI compartilhadas entre as sessões (ver artmax/graficos.py); TODAS_UNIDADES = BI consolidado
+    return Graficos([C_PURPLE_2, C_GOLD, C_PURPLE_1, "#E5C76B", "#B983FF", C_WHITE], C_TEXT, C_SURFACE)
+
+graficos = get_graficos(unidade)
+
+@st.cache_resource
+def get_sheets_exporter(unidade: str):
+    return SheetsExporter(get_db(unidade))
+
+def restaurar(path: str):
+    restaurar_snapshot(db, path, pasta_snapshots, pasta_backup)
+    read_cache.clear()
+    agenda_slots.descartar()
+    # a versão dos dados volta junto com o snapshot: figuras de versões "futuras" não valem mais
+    graficos.clear()
+    get_graficos(TODAS_UNIDADES).clear()
+    esquecer_versoes(pasta_analitico)
+
+# =========================================================
+# CLIENTES (cadastro + histórico para autocompletar os formulários)
+# =========================================================
+CLIENTES_SUGERIDOS = 500
+
+def escolher_cliente(key: str):
+    # lista só o cadastro (com visitas/total já materializados), sem ler agenda/vendas
+    df = ler_df(
+        "clientes", None,
+        "SELECT * FROM clientes ORDER BY COALESCE(ultima_visita, criado_em) DESC, id DESC LIMIT ?",
+        [CLIENTES_SUGERIDOS]
+    )
+    if df.empty:
+        return None
+
+    nomes = {int(r.id): f"{r.nome} • {r.telefone or 'sem telefone'}" for r in df.itertuples()}
+    cid = st.selectbox(
+        "Cliente cadastrado (opcional)",
+        [None] + list(nomes),
+        format_func=lambda x: "— novo cliente —" if x is None else nomes[x],
+        key=key
+    )
+    if cid is None:
+        return None
+
+    r = df[df["id"] == cid].iloc[0]
+    cli = {
+        "id": cid,
+        "nome": r["nome"],
+        "telefone": r["telefone"] if isinstance(r["telefone"], str) else "",
+    }
+    ultima = r["ultima_visita"] if isinstance(r["ultima_visita"], str) else "—"
+    st.caption(f"Histórico: {int(r['visitas'])} visita(s) • R$ {float(r['total_gasto']):.2f} • última em {ultima}")
+    return cli
+
+# =========================================================
+# TABELA PAGINADA (keyset: sem OFFSET, custo igual em qualquer página)
+# =========================================================
+PAGE_SIZE = 50
+
+def _py(v):
+    # valores do pandas (numpy.int64 etc.) -> tipos que o sqlite3 aceita como parâmetro
+    return v.item() if hasattr(v, "item") else v
+
+@medido("tela")
+def tabela_paginada(tabela: str, key: str, where: str = "1=1", params=(), ym=None,
+                    chave=("data", "id"), mais_recentes: bool = True, page_size: int = PAGE_SIZE):
+    # chave precisa terminar em id e estar coberta por um índice (ex.: (data, id) ou (data, hora) + rowid)
+    ordem = st.selectbox(
+        "Ordem",
+        ["Mais recentes primeiro", "Mais antigos primeiro"],
+        index=0 if mais_recentes else 1,
+        key=f"{key}_ordem"
+    )
+    desc = ordem == "Mais recentes primeiro"
+
+    estado = st.session_state.setdefault(f"{key}_pag", {"assinatura": None, "cursores": []})
+    assinatura = (unidade, tabela, where, tuple(params), desc, page_size)
+    if estado["assinatura"] != assinatura:
+        estado["assinatura"] = assinatura
+        estado["cursores"] = []
+    cursores = estado["cursores"]
+
+    cols = ", ".join(chave)
+    direcao = "DESC" if desc else "ASC"
+    where = f"({where}) AND {ativos(tabela)}"
+    sql_where = where
+    sql_params = list(params)
+    if cursores:
+        sql_where += f" AND ({cols}) {'<' if desc else '>'} ({', '.join(['?'] * len(chave))})"
+        sql_params += list(cursores[-1])
+
+    df = ler_df(
+        tabela, ym,
+        f"SELECT * FROM {tabela} WHERE {sql_where} "
+        f"ORDER BY {', '.join(f'{c} {direcao}' for c in chave)} LIMIT ?",
+        sql_params + [page_size + 1]
+    )
+    tem_proxima = len(df) > page_size
+    df = df.head(page_size).drop(columns=["exclusao_id"], errors="ignore")
+
+    total = int(ler_df(tabela, ym, f"SELECT COUNT(*) AS n FROM {tabela} WHERE {where}", params)["n"].iloc[0])
+    paginas = max(1, -(-total // page_size))
+
+    st.dataframe(df, use_container_width=True)
+
+    c1, c2, c3 = st.columns([1, 1, 3])
+    with c1:
+        if st.button("◀ Anterior", key=f"{key}_ant", disabled=not cursores):
+            cursores.pop()
+            st.rerun()
+    with c2:
+        if st.button("Próxima ▶", key=f"{key}_prox", disabled=not tem_proxima):
+            cursores.append(tuple(_py(v) for v in df.iloc[-1][list(chave)]))
+            st.rerun()
+    with c3:
+        st.caption(f"Página {len(cursores) + 1} de {paginas} • {total} registro(s)")
+
+    return df, total
+
+# =========================================================
+# DESFAZER EXCLUSÕES (agenda e vendas)
+# =========================================================
+def desfazer_exclusoes(tabela: str):
+    # as exclusões recentes da tabela, de qualquer sessão, enquanto ainda dá para desfazer
+    for ex in exclusoes_recentes(db, tabela):
+        c1, c2 = st.columns([3, 1])
+        c1.caption(f"{ex['qtd']} registro(s) excluído(s) em {ex['criada_em']}")
+        if c2.button("↩️ Desfazer", key=f"desfazer_{tabela}_{ex['id']}"):
+            try:
+                res = desfazer(db, ex["id"], agenda_slots if tabela == "agenda" else None)
+            except ValueError as e:
+                st.error(str(e))
+                continue
+            for d in res["datas"]:
+                invalidar(tabela, d)
+            if res["conflitos"]:
+                # sem rerun: o aviso precisa ficar na tela
+                st.warning(
+                    f"Restaurados: {res['qtd']}. {res['conflitos']} agendamento(s) continuam excluídos: "
+                    "o horário foi ocupado depois da exclusão."
+                )
+            else:
+                st.rerun()
+
+# =========================================================
+# WhatsApp
+# =========================================================
+def open_whatsapp(link):
+    if not link:
+        return
+    components.html(f"<script>window.open('{link}', '_blank');</script>", height=0)
+
+# =========================================================
+# APP
+# =========================================================
 # Header
 header()
 
@@ -473,8 +614,13 @@ today = date.today()
 default_year = today.year
 default_month = today.month
 
-st.sidebar.markdown("### 📅 Filtro")
-year = st.sidebar.selectbox("Ano", list(range(default_year - 2, default_year + 1)), index=2)
+# anos desde o primeiro registro (mínimo: os dois anteriores); com várias unidades, o mais
+# antigo entre todas, porque o mesmo seletor serve ao BI consolidado
+anos = list(range(
+    primeiro_ano_com_dados(ler_todas_unidades() if len(unidades) > 1 else ler_df, default_year - 2),
+    default_year + 1
+))
+year = st.sidebar.selectbox("Ano", anos, index=len(anos) - 1)
 month_name = st.sidebar.selectbox("Mês", MESES_PT, index=default_month - 1)
 month = MESES_PT.index(month_name) + 1
 
@@ -482,17 +628,26 @@ start_m, end_m = month_range(year, month)
 st.sidebar.caption(f"Período: {start_m.strftime('%d/%m/%Y')} → {(end_m - timedelta(days=1)).strftime('%d/%m/%Y')}")
 st.sidebar.markdown("---")
 
-menu = st.sidebar.radio(
-    "Menu",
-    [
-        "Agenda",
-        "Robô de Lembretes",
-        "Checkout",
-        "Despesas",
-        "Vendas (Excluir/Filtrar)",
-        "Relatórios (BI)",
-        "Backup"
-    ]
+MENU = [
+    "Agenda",
+    "Robô de Lembretes",
+    "Checkout",
+    "Despesas",
+    "Vendas (Excluir/Filtrar)",
+    "Relatórios (BI)",
+    "Comissões",
+    "Backup"
+]
+# escondido: aparece com ?diag=1 na URL ou com a instrumentação ligada (ARTMAX_DIAG=1)
+if DIAG.ativo or st.query_params.get("diag") == "1":
+    MENU.append("Diagnóstico")
+
+menu = st.sidebar.radio("Menu", MENU)
+
+st.sidebar.markdown("---")
+st.sidebar.caption(
+    f"Cache de leitura: {read_cache.hits} acertos • {read_cache.misses} consultas ao banco • "
+    f"UI: {st.session_state.get('ui_bytes', 0)} bytes neste rerun"
 )
 
 # =========================================================
@@ -512,34 +667,49 @@ if menu == "Agenda":
             key="outro_serv_ag"
         )
 
+    # FORA do form: os horários livres acompanham a profissional e o serviço escolhidos
+    prof = st.selectbox("Profissional", PROFISSIONAIS, key="prof_ag")
+    serv_final = outro_serv.strip() if serv_base == "Outros" and outro_serv.strip() else serv_base
+    duracao = duracao_servico(serv_final)
+
+    livres = agenda_slots.proximos_livres(prof, duracao, datetime.now())
+    if livres:
+        st.caption(
+            f"Próximos horários livres de {prof} ({duracao} min): "
+            + " • ".join(f"{d.strftime('%d/%m')} {h}" for d, h in livres)
+        )
+
+    cli_sel = escolher_cliente("cli_sel_ag")
+
     with st.form("ag", clear_on_submit=True):
         c1, c2 = st.columns(2)
-        cli = c1.text_input("Cliente")
-        tel = c2.text_input("WhatsApp")
-
-        prof = st.selectbox("Profissional", PROFISSIONAIS)
+        cli = c1.text_input("Cliente", value=cli_sel["nome"] if cli_sel else "")
+        tel = c2.text_input("WhatsApp", value=cli_sel["telefone"] if cli_sel else "")
 
         c3, c4 = st.columns(2)
         dt = c3.date_input("Data", date.today())
         hr = c4.time_input("Horário")
 
         if st.form_submit_button("Confirmar e enviar WhatsApp"):
-            if not cli.strip():
-                st.error("Informe o nome do cliente.")
+            hora = hr.strftime("%H:%M")
+            try:
+                agendar(db, agenda_slots, dt, hora, cli, tel, serv_final, prof)
+            except HorarioOcupado as e:
+                sugestoes = agenda_slots.proximos_livres(e.profissional, e.duracao, e.a_partir, n=4)
+                st.error(
+                    f"{e} "
+                    + ("Livres: " + " • ".join(f"{d.strftime('%d/%m')} {h}" for d, h in sugestoes) if sugestoes else "")
+                )
                 st.stop()
-            if not tel.strip():
-                st.error("Informe o WhatsApp.")
+            except ValueError as e:
+                st.error(str(e))
                 st.stop()
 
-            serv_final = outro_serv.strip() if serv_base == "Outros" and outro_serv.strip() else serv_base
-
-            db.execute(
-                "INSERT INTO agenda (data, hora, cliente, telefone, servico, profissional) VALUES (?,?,?,?,?,?)",
-                (dt.isoformat(), hr.strftime("%H:%M"), cli.strip(), tel.strip(), serv_final, prof)
-            )
-            db.commit()
+            invalidar("agenda", dt)
+            if dt == date.today():
+                lembretes.acordar()
 
-            link = build_whatsapp_link(cli.strip(), tel.strip(), serv_final, hr.strftime("%H:%M"), "confirmacao")
+            link = build_whatsapp_link(cli.strip(), tel.strip(), serv_final, hora, "confirmacao")
             open_whatsapp(link)
             st.success("Agendamento registrado com sucesso.")
             if link:
@@ -547,19 +717,20 @@ if menu == "Agenda":
 
     st.subheader("Agendamentos do mês selecionado")
 
-    df_ag = pd.read_sql(
-        "SELECT * FROM agenda WHERE data >= ? AND data < ? ORDER BY data, hora",
-        db,
-        params=[date_iso(start_m), date_iso(end_m)]
+    df_ag, total_ag = tabela_paginada(
+        "agenda", "tab_agenda",
+        where="data >= ? AND data < ?",
+        params=[date_iso(start_m), date_iso(end_m)],
+        ym=ym_of(start_m),
+        chave=("data", "hora", "id"),
+        mais_recentes=False
     )
 
-    if df_ag.empty:
+    if total_ag == 0:
         st.info("Nenhum agendamento neste mês.")
     else:
-        st.dataframe(df_ag, use_container_width=True)
-
         with st.expander("🧹 Excluir agendamentos (seleção múltipla)"):
-            st.caption("Selecione um ou mais IDs e exclua de uma vez.")
+            st.caption("Selecione um ou mais IDs da página exibida e exclua de uma vez.")
 
             df_ag2 = df_ag.sort_values(["data", "hora", "id"], ascending=[False, False, False]).copy()
             options = df_ag2["id"].tolist()
@@ -568,30 +739,64 @@ if menu == "Agenda":
             confirm = st.checkbox("Confirmar exclusão", key="conf_del_ag_multi")
 
             if st.button("Excluir selecionados", disabled=(not confirm or len(ids_del) == 0)):
-                q = f"DELETE FROM agenda WHERE id IN ({','.join(['?'] * len(ids_del))})"
-                db.execute(q, [int(x) for x in ids_del])
-                db.commit()
-                st.success(f"Excluídos: {len(ids_del)} agendamento(s).")
+                res = excluir(db, "agenda", ids_del, agenda_slots)
+                for d in res["datas"]:
+                    invalidar("agenda", d)
+                st.success(f"Excluídos: {res['qtd']} agendamento(s).")
                 st.rerun()
 
+    desfazer_exclusoes("agenda")
+
 # =========================================================
 # ROBÔ DE LEMBRETES
 # =========================================================
 elif menu == "Robô de Lembretes":
-    st.subheader("Agendamentos de hoje")
-    hoje = date.today().isoformat()
-    df = pd.read_sql("SELECT * FROM agenda WHERE data = ? ORDER BY hora", db, params=[hoje])
+    st.subheader("Lembretes de hoje")
+    hoje = date.today()
+
+    df = ler_df(
+        "lembretes", ym_of(hoje),
+        "SELECT * FROM lembretes WHERE data = ? ORDER BY hora, agenda_id",
+        [hoje.isoformat()]
+    )
+
+    if lembretes.ultima_execucao:
+        taxa = lembretes.ultimos_gerados / lembretes.ultima_duracao if lembretes.ultima_duracao else 0.0
+        st.caption(
+            f"Última varredura: {lembretes.ultima_execucao.strftime('%H:%M:%S')} • "
+            f"{lembretes.ultimos_gerados} novo(s) em {lembretes.ultima_duracao * 1000:.1f} ms"
+            + (f" ({taxa:,.0f}/s)" if lembretes.ultimos_gerados else "")
+            + f" • a cada {lembretes.intervalo}s"
+        )
+    if lembretes.ultimo_erro:
+        st.error(f"Falha no robô de lembretes: {lembretes.ultimo_erro}")
 
     if df.empty:
         st.info("Nenhum agendamento para hoje.")
     else:
-        for _, r in df.iterrows():
-            st.write(f"• {r['hora']} — {r['cliente']} — {r['servico']} — {r['profissional']}")
-            if st.button("Enviar lembrete", key=f"lem_{r['id']}"):
-                link = build_whatsapp_link(r["cliente"], r["telefone"], r["servico"], r["hora"], "lembrete")
-                open_whatsapp(link)
-                if link:
-                    st.link_button("Abrir WhatsApp (fallback)", link)
+        contagem = df["status"].value_counts()
+        m1, m2, m3 = st.columns(3)
+        m1.metric("Pendentes", int(contagem.get("pendente", 0)))
+        m2.metric("Enviados", int(contagem.get("enviado", 0)))
+        m3.metric("Sem telefone", int(contagem.get("sem_telefone", 0)))
+
+        st.dataframe(
+            df[["hora", "cliente", "servico", "profissional", "status", "link", "enviado_em"]],
+            use_container_width=True,
+            column_config={"link": st.column_config.LinkColumn("WhatsApp", display_text="Abrir")}
+        )
+
+        pendentes = df[df["status"] == "pendente"]
+        if not pendentes.empty:
+            nomes = {int(a): f"{h} — {c}" for a, h, c in zip(pendentes["agenda_id"], pendentes["hora"], pendentes["cliente"])}
+            enviados = st.multiselect(
+                "Marcar como enviados",
+                options=list(nomes),
+                format_func=lambda x: nomes[x]
+            )
+            if st.button("Confirmar envio", disabled=not enviados):
+                lembretes.marcar_enviados(enviados)
+                st.rerun()
 
 # =========================================================
 # CHECKOUT
@@ -610,51 +815,47 @@ elif menu == "Checkout":
             key="outro_serv_checkout"
         )
 
+    v_cli_sel = escolher_cliente("cli_sel_checkout")
+
     with st.form("caixa", clear_on_submit=True):
-        v_cli = st.text_input("Cliente")
-        v_tel = st.text_input("WhatsApp (opcional)")
+        v_cli = st.text_input("Cliente", value=v_cli_sel["nome"] if v_cli_sel else "")
+        v_tel = st.text_input(
+            "WhatsApp (opcional)",
+            value=v_cli_sel["telefone"] if v_cli_sel else ""
+        )
 
         v_prof = st.selectbox("Profissional", PROFISSIONAIS)
         v_valor = st.number_input("Valor (R$)", min_value=0.0, format="%.2f")
 
         if st.form_submit_button("Concluir"):
-            if not v_cli.strip():
-                st.error("Informe o nome do cliente.")
-                st.stop()
-            if v_valor <= 0:
-                st.error("Informe um valor maior que zero.")
-                st.stop()
-
             v_serv_final = v_outro_serv.strip() if v_serv_base == "Outros" and v_outro_serv.strip() else v_serv_base
-            comissao = calc_comissao(v_prof, v_serv_final, float(v_valor))
-
-            db.execute(
-                "INSERT INTO vendas (data, cliente, valor, servico, profissional, comissao) VALUES (?,?,?,?,?,?)",
-                (date.today().isoformat(), v_cli.strip(), float(v_valor), v_serv_final, v_prof, float(comissao))
-            )
-            db.commit()
+            try:
+                _, comissao = registrar_venda(db, date.today(), v_cli, v_tel, v_serv_final, v_prof, float(v_valor))
+            except ValueError as e:
+                st.error(str(e))
+                st.stop()
+            invalidar("vendas", date.today())
 
             link = build_whatsapp_link(v_cli.strip(), v_tel.strip(), v_serv_final, "", "agradecimento")
             open_whatsapp(link)
 
-            if v_prof == "Evelyn":
-                st.success(f"Venda registrada. 💜 Comissão Evelyn: R$ {comissao:.2f}")
+            if comissao > 0:
+                st.success(f"Venda registrada. 💜 Comissão {v_prof}: R$ {comissao:.2f}")
             else:
-                st.success("Venda registrada (Eunides).")
+                st.success(f"Venda registrada ({v_prof}).")
 
             if link:
                 st.link_button("Abrir WhatsApp (se não abriu automaticamente)", link)
 
     st.subheader("Vendas do mês selecionado")
-    df_vm = pd.read_sql(
-        "SELECT * FROM vendas WHERE data >= ? AND data < ? ORDER BY data DESC, id DESC",
-        db,
-        params=[date_iso(start_m), date_iso(end_m)]
+    _, total_vm = tabela_paginada(
+        "vendas", "tab_checkout",
+        where="data >= ? AND data < ?",
+        params=[date_iso(start_m), date_iso(end_m)],
+        ym=ym_of(start_m)
     )
-    if df_vm.empty:
+    if total_vm == 0:
         st.info("Nenhuma venda neste mês.")
-    else:
-        st.dataframe(df_vm, use_container_width=True)
 
 # =========================================================
 # DESPESAS
@@ -666,30 +867,23 @@ elif menu == "Despesas":
         desc = st.text_input("Descrição")
         val = st.number_input("Valor (R$)", min_value=0.0, format="%.2f")
         if st.form_submit_button("Registrar"):
-            if not desc.strip():
-                st.error("Informe a descrição.")
-                st.stop()
-            if val <= 0:
-                st.error("Informe um valor maior que zero.")
+            try:
+                registrar_gasto(db, date.today(), desc, float(val))
+            except ValueError as e:
+                st.error(str(e))
                 st.stop()
-
-            db.execute(
-                "INSERT INTO gastos (data, descricao, valor) VALUES (?,?,?)",
-                (date.today().isoformat(), desc.strip(), float(val))
-            )
-            db.commit()
+            invalidar("gastos", date.today())
             st.success("Despesa registrada.")
 
     st.subheader("Despesas do mês selecionado")
-    df_gm = pd.read_sql(
-        "SELECT * FROM gastos WHERE data >= ? AND data < ? ORDER BY data DESC, id DESC",
-        db,
-        params=[date_iso(start_m), date_iso(end_m)]
+    _, total_gm = tabela_paginada(
+        "gastos", "tab_gastos",
+        where="data >= ? AND data < ?",
+        params=[date_iso(start_m), date_iso(end_m)],
+        ym=ym_of(start_m)
     )
-    if df_gm.empty:
+    if total_gm == 0:
         st.info("Nenhuma despesa neste mês.")
-    else:
-        st.dataframe(df_gm, use_container_width=True)
 
 # =========================================================
 # VENDAS: FILTRAR + EXCLUIR EM LOTE
@@ -697,15 +891,14 @@ elif menu == "Despesas":
 elif menu == "Vendas (Excluir/Filtrar)":
     st.subheader("Vendas do mês (filtrar e excluir)")
 
-    df_v = pd.read_sql(
-        "SELECT * FROM vendas WHERE data >= ? AND data < ? ORDER BY data DESC, id DESC",
-        db,
-        params=[date_iso(start_m), date_iso(end_m)]
-    )
+    mes_where = "data >= ? AND data < ?"
+    mes_params = [date_iso(start_m), date_iso(end_m)]
+    total_mes = int(ler_df(
+        "vendas", ym_of(start_m), f"SELECT COUNT(*) AS n FROM vendas WHERE {mes_where} AND {ativos('vendas')}", mes_params
+    )["n"].iloc[0])
 
-    if df_v.empty:
+    if total_mes == 0:
         st.info("Nenhuma venda nesse mês.")
-        st.stop()
 
     c1, c2, c3 = st.columns([1.2, 1.2, 2.2])
     with c1:
@@ -713,17 +906,25 @@ elif menu == "Vendas (Excluir/Filtrar)":
     with c2:
         f_serv = st.selectbox("Serviço", ["Todos"] + SERVICOS)
     with c3:
-        f_cli = st.text_input("Buscar cliente (parte do nome)", placeholder="Ex: Maria")
+        f_cli = st.text_input("Buscar cliente (nome ou telefone)", placeholder="Ex: Maria")
+    f_hist = st.checkbox("Buscar em todo o histórico (não só no mês)", key="busca_historico")
 
-    df_f = df_v.copy()
+    # filtros aplicados no SQL (índice de data / FTS), não no DataFrame
+    f_where = "1=1" if f_hist else mes_where
+    f_params = [] if f_hist else list(mes_params)
+    f_ym = None if f_hist else ym_of(start_m)
     if f_prof != "Todos":
-        df_f = df_f[df_f["profissional"] == f_prof]
+        f_where += " AND profissional = ?"
+        f_params.append(f_prof)
     if f_serv != "Todos":
-        df_f = df_f[df_f["servico"] == f_serv]
+        f_where += " AND servico = ?"
+        f_params.append(f_serv)
     if f_cli.strip():
-        df_f = df_f[df_f["cliente"].str.contains(f_cli.strip(), case=False, na=False)]
+        busca_where, busca_params = filtro_busca_clientes(db, "vendas", f_cli)
+        f_where += busca_where
+        f_params += busca_params
 
-    st.dataframe(df_f, use_container_width=True)
+    tabela_paginada("vendas", "tab_vendas_filtro", where=f_where, params=f_params, ym=f_ym)
 
     st.markdown("### 🧹 Excluir últimos processos do mês (vendas)")
     st.caption("Selecione quantos últimos registros você quer listar para excluir.")
@@ -734,13 +935,15 @@ elif menu == "Vendas (Excluir/Filtrar)":
     with colB:
         st.caption("Dica: você pode filtrar acima e depois excluir só os que aparecerem.")
 
-    df_last = df_f.sort_values(["data", "id"], ascending=[False, False]).head(int(qtd)).copy()
-
-    def label_row(r):
-        return f"ID {r['id']} • {r['data']} • {r['cliente']} • {r['servico']} • {r['profissional']} • R$ {float(r['valor']):.2f}"
+    # só vira rótulo do multiselect: registros do cursor, sem DataFrame
+    ultimas = ler_reg(
+        Venda, "vendas", f_ym,
+        f"SELECT {colunas(Venda)} FROM vendas WHERE {f_where} AND {ativos('vendas')} ORDER BY data DESC, id DESC LIMIT ?",
+        f_params + [int(qtd)]
+    )
 
-    options = df_last["id"].tolist()
-    labels = {int(r["id"]): label_row(r) for _, r in df_last.iterrows()}
+    options = [v.id for v in ultimas]
+    labels = {v.id: v.rotulo() for v in ultimas}
 
     selected = st.multiselect(
         "Selecione as vendas para excluir",
@@ -748,170 +951,437 @@ elif menu == "Vendas (Excluir/Filtrar)":
         format_func=lambda x: labels.get(int(x), f"ID {x}")
     )
 
-    confirm = st.checkbox("Confirmo que quero excluir permanentemente essas vendas.", key="conf_del_vendas_multi")
+    confirm = st.checkbox("Confirmo que quero excluir essas vendas.", key="conf_del_vendas_multi")
     if st.button("Excluir vendas selecionadas", disabled=(not confirm or len(selected) == 0)):
-        q = f"DELETE FROM vendas WHERE id IN ({','.join(['?'] * len(selected))})"
-        db.execute(q, [int(x) for x in selected])
-        db.commit()
-        st.success(f"Excluídas: {len(selected)} venda(s).")
+        # com a busca no histórico, a seleção pode cobrir outros meses
+        res = excluir(db, "vendas", selected)
+        for d in res["datas"]:
+            invalidar("vendas", d)
+        st.success(f"Excluídas: {res['qtd']} venda(s).")
         st.rerun()
 
+    desfazer_exclusoes("vendas")
+
 # =========================================================
 # RELATÓRIOS (BI)
 # =========================================================
 elif menu == "Relatórios (BI)":
-    st.subheader("Resumo do mês selecionado")
+    periodo = st.radio("Período", BI_PERIODOS, horizontal=True, key="bi_periodo")
 
-    df_v = pd.read_sql(
-        "SELECT * FROM vendas WHERE data >= ? AND data < ?",
-        db,
-        params=[date_iso(start_m), date_iso(end_m)]
-    )
-    df_g = pd.read_sql(
-        "SELECT * FROM gastos WHERE data >= ? AND data < ?",
-        db,
-        params=[date_iso(start_m), date_iso(end_m)]
+    if periodo == "Intervalo de datas":
+        c1, c2 = st.columns(2)
+        ini = c1.date_input("De", start_m, key="bi_ini")
+        fim = c2.date_input("Até", end_m - timedelta(days=1), key="bi_fim") + timedelta(days=1)
+        if fim <= ini:
+            st.error("A data final precisa ser depois da inicial.")
+            st.stop()
+    elif periodo == "Últimos 12 meses":
+        fim = month_range(today.year, today.month)[1]
+        ini = month_range(today.year - 1, today.month)[1]
+    elif periodo == "Ano x ano anterior":
+        ini, fim = date(year, 1, 1), date(year + 1, 1, 1)
+    else:
+        ini, fim = start_m, end_m
+
+    consolidado = len(unidades) > 1 and st.checkbox("Todas as unidades (consolidado)", key="bi_consolidado")
+    if consolidado:
+        ler_bi = ler_todas_unidades()
+        versao = tuple(unidades.em_paralelo(lambda u: versao_bi(get_db(u))).values())
+        graficos_bi = get_graficos(TODAS_UNIDADES)
+    else:
+        ler_bi, versao, graficos_bi = ler_df, versao_bi(db), graficos
+
+    st.subheader(
+        f"Resumo de {ini.strftime('%d/%m/%Y')} a {(fim - timedelta(days=1)).strftime('%d/%m/%Y')}"
+        + (f" • {TODAS_UNIDADES.lower()}" if consolidado else f" • {unidade}" if len(unidades) > 1 else "")
     )
 
-    if not df_v.empty:
-        df_v["valor"] = pd.to_numeric(df_v["valor"], errors="coerce").fillna(0.0)
-        df_v["comissao"] = pd.to_numeric(df_v["comissao"], errors="coerce").fillna(0.0)
-    if not df_g.empty:
-        df_g["valor"] = pd.to_numeric(df_g["valor"], errors="coerce").fillna(0.0)
+    def grafico(nome: str, agrupamento: str = None) -> bool:
+        # figura memorizada por (período, agrupamento, versão dos dados): rerun sem escrita não remonta nada
+        with DIAG.span("gráfico", f"BI {nome}" + (f" por {agrupamento.lower()}" if agrupamento else "")):
+            fig = graficos_bi.figura(nome, ler_bi, ini, fim, versao, agrupamento)
+            if fig is not None:
+                st.plotly_chart(fig, use_container_width=True, config=GRAFICO_CONFIG)
+        return fig is not None
 
-    total_vendas = float(df_v["valor"].sum()) if not df_v.empty else 0.0
-    total_comissao = float(df_v["comissao"].sum()) if not df_v.empty else 0.0
-    total_gastos = float(df_g["valor"].sum()) if not df_g.empty else 0.0
+    # resumo_vendas/resumo_gastos são mantidas pelas triggers de vendas/gastos
+    totais = bi_totais(ler_bi, ini, fim)
+    anterior = bi_totais(ler_bi, ano_anterior(ini), ano_anterior(fim))
+    resumo = vendas_por_profissional(ler_bi, ini, fim)
 
-    lucro = total_vendas - total_comissao - total_gastos
+    df_eve = resumo[resumo["profissional"].str.lower() == "evelyn"]
+    comissao_evelyn = float(df_eve["comissao"].sum()) if not df_eve.empty else 0.0
+    vendas_evelyn = float(df_eve["vendas"].sum()) if not df_eve.empty else 0.0
 
-    if not df_v.empty:
-        df_eve = df_v[df_v["profissional"].str.lower() == "evelyn"]
-        comissao_evelyn = float(df_eve["comissao"].sum()) if not df_eve.empty else 0.0
-        vendas_evelyn = float(df_eve["valor"].sum()) if not df_eve.empty else 0.0
-    else:
-        comissao_evelyn = 0.0
-        vendas_evelyn = 0.0
+    def delta(chave):
+        # variação contra o mesmo período do ano anterior
+        return f"R$ {totais[chave] - anterior[chave]:+.2f} vs. ano anterior" if anterior["vendas"] or anterior["gastos"] else None
 
     c1, c2, c3, c4 = st.columns(4)
-    c1.metric("Faturamento total", f"R$ {total_vendas:.2f}")
+    c1.metric("Faturamento total", f"R$ {totais['vendas']:.2f}", delta("vendas"))
     c2.metric("Vendas Evelyn", f"R$ {vendas_evelyn:.2f}")
     c3.metric("Comissão Evelyn", f"R$ {comissao_evelyn:.2f}")
-    c4.metric("Lucro do salão", f"R$ {lucro:.2f}")
+    c4.metric("Lucro do salão", f"R$ {totais['lucro']:.2f}", delta("lucro"))
+    st.caption(f"Despesas no período: R$ {totais['gastos']:.2f} • Comissões: R$ {totais['comissao']:.2f}")
 
-    st.subheader("Detalhe por profissional")
-    if df_v.empty:
-        st.info("Sem vendas registradas neste mês.")
-    else:
-        resumo = (
-            df_v.groupby("profissional", as_index=False)
-                .agg(vendas=("valor", "sum"), comissao=("comissao", "sum"))
+    if consolidado:
+        totais_unidades = ler_bi.mapear(bi_totais, ini, fim)
+        st.dataframe(
+            [{"unidade": u, **{k: round(v, 2) for k, v in t.items()}} for u, t in totais_unidades.items()],
+            use_container_width=True, hide_index=True
         )
-        st.dataframe(resumo, use_container_width=True)
 
-        fig = px.bar(
-            resumo,
-            x="profissional",
-            y="vendas",
-            title="Faturamento por profissional (mês)"
-        )
-        st.plotly_chart(fig, use_container_width=True)
+    st.subheader("Detalhe")
+    agrupamento = st.selectbox("Agrupar por", list(BI_AGRUPAMENTOS), key="bi_agrupamento")
+    detalhe = bi_agrupado(ler_bi, ini, fim, agrupamento)
+    if detalhe.empty:
+        st.info("Sem vendas registradas neste período.")
+    else:
+        st.dataframe(detalhe, use_container_width=True)
 
-    st.subheader("Últimas vendas do mês")
-    if df_v.empty:
+        grafico("detalhe", agrupamento)
+
+    if periodo == "Ano x ano anterior":
+        st.subheader(f"{year} x {year - 1}")
+        yoy = bi_ano_a_ano(ler_bi, ini, fim)
+        if yoy.empty:
+            st.info("Sem dados para comparar.")
+        else:
+            grafico("ano_a_ano")
+            yoy["mes"] = yoy["mes"].map(lambda m: MESES_PT[int(m) - 1])
+            st.dataframe(yoy, use_container_width=True)
+
+    st.subheader("Gráficos do período")
+    # um gráfico por vez: cada gráfico a mais na tela seria mais JSON em todo rerun
+    extra = st.radio("Gráfico", list(BI_GRAFICOS_EXTRAS), horizontal=True, key="bi_grafico")
+    if not grafico(BI_GRAFICOS_EXTRAS[extra]):
+        st.info("Sem dados para este gráfico no período.")
+
+    if HAS_ARROW and not consolidado and exportado(pasta_analitico):
+        st.subheader("Melhores clientes do período")
+        # linha a linha do histórico, na cópia colunar (ver artmax/analitico.py); quem atualiza a cópia
+        # é a thread de get_atualizacao_analitica ou o Backup, não o rerun do BI
+        with DIAG.span("relatório", "clientes do período (analítico)"):
+            top = clientes_do_periodo(db, ini, fim, pasta=pasta_analitico)
+        info = resumo_exportacao(pasta_analitico)
+        if info:
+            st.caption(f"Cópia analítica de {info['atualizado_em']} (atualizada em segundo plano ou no Backup).")
+        if top.empty:
+            st.info("Sem vendas de clientes cadastradas no período.")
+        else:
+            st.dataframe(top, use_container_width=True, hide_index=True)
+
+    st.subheader("Últimas vendas do período")
+    df_ult = ultimas_vendas(ler_bi, ini, fim)
+    if df_ult.empty:
         st.info("Sem vendas registradas.")
     else:
-        st.dataframe(
-            df_v.sort_values(["data", "id"], ascending=[False, False]).head(25),
-            use_container_width=True
-        )
+        st.dataframe(df_ult, use_container_width=True)
 
     st.markdown("---")
     st.subheader("Exportar para Google Sheets")
 
-    df_ag = pd.read_sql(
-        "SELECT * FROM agenda WHERE data >= ? AND data < ? ORDER BY data, hora",
-        db,
-        params=[date_iso(start_m), date_iso(end_m)]
-    )
-
     if not HAS_SHEETS:
         st.info("Para exportar para Google Sheets, instale: pip install gspread google-auth.")
     else:
         st.caption("Requer st.secrets['gcp_service_account'] configurado.")
 
-        if st.button("📄 Criar planilha no Google Sheets com o mês selecionado"):
+        exporter = get_sheets_exporter(unidade)
+        with db.reader() as conn:
+            ja_exportado = conn.execute(
+                "SELECT url FROM sheets_sync WHERE ano = ? AND mes = ? LIMIT 1", (year, month)
+            ).fetchone()
+
+        incremental = False
+        if ja_exportado:
+            st.link_button("Abrir planilha deste mês", ja_exportado[0])
+            incremental = st.checkbox(
+                "Só enviar os registros novos desde a última exportação",
+                value=True,
+                help="Desmarque para criar uma planilha nova com o mês completo (ex.: após exclusões)."
+            )
+
+        if st.button("📄 Exportar o mês selecionado para o Google Sheets"):
             try:
-                url = export_mes_para_sheets(
-                    df_ag, df_v, df_g,
-                    sheet_title=f"{APP_NAME} - {month_name}/{year}"
+                exporter.iniciar(
+                    year, month,
+                    titulo=f"{APP_NAME} - {unidade + ' - ' if len(unidades) > 1 else ''}{month_name}/{year}",
+                    incremental=incremental,
+                    client=sheets_client(st.secrets["gcp_service_account"])
                 )
-                st.success("Planilha criada no Google Sheets!")
-                st.link_button("Abrir planilha", url)
             except Exception as e:
                 st.error(f"Falha ao exportar: {e}")
 
+        # o painel só se atualiza sozinho enquanto há envio em andamento
+        job_atual = exporter.jobs.get((year, month))
+        em_andamento = job_atual is not None and job_atual.ativo
+
+        @st.fragment(run_every="2s" if em_andamento else None)
+        def painel_export():
+            job = exporter.jobs.get((year, month))
+            if job is None:
+                return
+            if em_andamento and not job.ativo:
+                # terminou: a página roda de novo e registra o painel sem o polling
+                st.rerun()
+            st.progress(job.progresso, text=f"{job.status} • {job.mensagem}")
+            if job.status == "concluído" and job.url:
+                st.success("Planilha atualizada no Google Sheets!")
+                st.link_button("Abrir planilha", job.url)
+            elif job.status == "falhou":
+                st.error(f"Falha ao exportar: {job.erro}")
+
+        painel_export()
+
+# =========================================================
+# COMISSÕES: regras + recálculo em lote
+# =========================================================
+elif menu == "Comissões":
+    st.subheader("Regras de comissão")
+    st.caption(
+        "Percentual (0 a 1) por profissional e serviço. Datas no formato AAAA-MM-DD; "
+        "'vigente até' vazio = sem fim. Havendo sobreposição, vale a regra com início mais recente."
+    )
+
+    regras = ler_df(
+        "comissao_regras", None,
+        "SELECT profissional, servico, pct, vigente_de, vigente_ate FROM comissao_regras "
+        "ORDER BY profissional, servico, vigente_de"
+    )
+    editadas = st.data_editor(
+        regras,
+        num_rows="dynamic",
+        use_container_width=True,
+        column_config={
+            "profissional": st.column_config.SelectboxColumn("Profissional", options=PROFISSIONAIS, required=True),
+            "servico": st.column_config.TextColumn("Serviço", required=True),
+            "pct": st.column_config.NumberColumn("Percentual", min_value=0.0, max_value=1.0, format="%.2f", required=True),
+            "vigente_de": st.column_config.TextColumn("Vigente de", default="0000-01-01"),
+            "vigente_ate": st.column_config.TextColumn("Vigente até"),
+        },
+        key="editor_comissao"
+    )
+
+    if st.button("💾 Salvar regras"):
+        novas, erros = validar_regras(
+            (r.profissional, r.servico, r.pct, r.vigente_de, r.vigente_ate)
+            for r in editadas.itertuples(index=False)
+        )
+        if erros:
+            for e in erros:
+                st.error(e)
+        else:
+            salvar_regras(db, novas)
+            invalidar("comissao_regras")
+            st.success(f"{len(novas)} regra(s) salva(s). Recalcule as vendas abaixo para aplicar.")
+
+    st.markdown("---")
+    st.subheader("Recalcular comissões das vendas")
+    escopo = st.radio("Período", ["Mês selecionado", "Todo o histórico"], horizontal=True)
+    conf_recalc = st.checkbox("Confirmo que quero reprecificar as comissões já registradas.", key="conf_recalc")
+
+    if st.button("🔁 Recalcular", disabled=not conf_recalc):
+        ini, fim = (start_m, end_m) if escopo == "Mês selecionado" else (date.min, date.max)
+        t0 = time.perf_counter()
+        with db.writer() as conn:
+            alteradas = recalcular_comissoes(conn, ini, fim)
+        invalidar("vendas")
+        st.success(f"{alteradas} venda(s) atualizada(s) em {(time.perf_counter() - t0) * 1000:.0f} ms.")
+
 # =========================================================
 # BACKUP
 # =========================================================
 elif menu == "Backup":
     st.subheader("Backup dos dados")
+    chave_zip = f"backup_zip:{unidade}"
     st.caption("Baixe cópias de segurança da agenda, vendas e despesas.")
 
-    df_ag_backup = pd.read_sql(
-        "SELECT * FROM agenda ORDER BY data, hora",
-        db
-    )
+    st.caption("O arquivo ZIP traz agenda_backup.csv, vendas_backup.csv e gastos_backup.csv.")
+    if st.button("📦 Gerar backup"):
+        st.session_state[chave_zip] = build_backup_zip(db, pasta_backup)
+
+    backup_zip = st.session_state.get(chave_zip)
+    if backup_zip and os.path.exists(backup_zip):
+        with open(backup_zip, "rb") as fh:
+            st.download_button(
+                "⬇️ Baixar backup (ZIP)",
+                data=fh,
+                file_name="artmax_backup.zip",
+                mime="application/zip"
+            )
 
-    df_v_backup = pd.read_sql(
-        "SELECT * FROM vendas ORDER BY data DESC, id DESC",
-        db
+    st.markdown("---")
+    st.subheader("Importar histórico")
+    st.caption(
+        "CSV de agenda, vendas ou despesas (mesmas colunas do backup) ou o próprio ZIP do backup. "
+        "Datas em AAAA-MM-DD ou DD/MM/AAAA; valores como 80,50. Importar de novo o mesmo arquivo não duplica."
     )
+    arquivo_imp = st.file_uploader("Arquivo", type=["csv", "zip"], key="importar_arquivo")
+    if arquivo_imp is not None and st.button("📥 Importar"):
+        status_imp = st.empty()
+        try:
+            with st.spinner("Importando..."):
+                resultados = importar_arquivo(
+                    db, arquivo_imp, progresso=lambda n: status_imp.caption(f"{n:,} linhas lidas".replace(",", "."))
+                )
+        except ValueError as e:
+            st.error(str(e))
+        else:
+            status_imp.empty()
+            for res in resultados:
+                if res["inseridas"]:
+                    invalidar(res["tabela"])
+                    if res["tabela"] == "agenda":
+                        agenda_slots.descartar()
+                st.success(
+                    f"{res['arquivo']}: {res['inseridas']} novas • {res['duplicadas']} já existiam • "
+                    f"{res['invalidas']} inválidas ({res['por_segundo'] or 0:,} linhas/s)".replace(",", ".")
+                )
+                if res["erros"]:
+                    with st.expander(f"Linhas recusadas em {res['arquivo']}"):
+                        st.dataframe(
+                            [{"linha": n, "motivo": msg} for n, msg in res["erros"]],
+                            use_container_width=True, hide_index=True
+                        )
+            st.session_state.pop(chave_zip, None)
 
-    df_g_backup = pd.read_sql(
-        "SELECT * FROM gastos ORDER BY data DESC, id DESC",
-        db
-    )
+    st.markdown("---")
+    st.subheader("Exportação analítica")
+    if not HAS_ARROW:
+        st.info("Para a exportação colunar (Arrow/Parquet) do histórico, instale: pip install pyarrow.")
+    else:
+        st.caption(
+            "Cópia colunar de agenda, vendas e despesas, particionada por mês, para análises de vários anos "
+            "(ranking de clientes no BI). Depois da primeira, só os meses alterados são regravados."
+        )
+        if st.button("🗂️ Atualizar exportação analítica"):
+            with st.spinner("Exportando..."):
+                res = exportar_analitico(db, pasta_analitico)
+            meses = sum(res[t]["meses"] for t in ("agenda", "vendas", "gastos"))
+            st.success(f"{meses} meses regravados em {res['segundos']:.1f} s.")
+        info = resumo_exportacao(pasta_analitico)
+        if info:
+            st.caption(
+                f"Formato {info['formato']} • {info['mb']} MB • atualizada em {info['atualizado_em']} • "
+                + " • ".join(f"{t}: {n} meses" for t, n in info["meses"].items())
+            )
 
-    c1, c2, c3 = st.columns(3)
+    st.markdown("---")
+    st.subheader("Snapshots do banco")
+    st.caption("Cópia completa e consistente do banco, feita sem travar o caixa.")
 
-    with c1:
-        st.download_button(
-            "⬇️ Baixar Agenda CSV",
-            data=df_to_csv_download(df_ag_backup),
-            file_name="agenda_backup.csv",
-            mime="text/csv"
-        )
+    if st.button("📸 Criar snapshot agora"):
+        barra = st.progress(0.0)
 
-    with c2:
-        st.download_button(
-            "⬇️ Baixar Vendas CSV",
-            data=df_to_csv_download(df_v_backup),
-            file_name="vendas_backup.csv",
-            mime="text/csv"
-        )
+        def _progresso(status, restantes, total):
+            barra.progress((total - restantes) / total if total else 1.0)
 
-    with c3:
-        st.download_button(
-            "⬇️ Baixar Gastos CSV",
-            data=df_to_csv_download(df_g_backup),
-            file_name="gastos_backup.csv",
-            mime="text/csv"
+        snap = criar_snapshot(db, progress=_progresso, pasta=pasta_snapshots)
+        st.success(f"Snapshot criado: {os.path.basename(snap)}")
+
+    snapshots = listar_snapshots(pasta_snapshots)
+    if not snapshots:
+        st.info("Nenhum snapshot criado ainda.")
+    else:
+        snap_sel = st.selectbox(
+            f"Snapshots disponíveis ({len(snapshots)})",
+            snapshots,
+            format_func=lambda p: f"{os.path.basename(p)} • {os.path.getsize(p) / 1024:.0f} KB"
+        )
+        conf_rest = st.checkbox(
+            "Confirmo que quero substituir os dados atuais por este snapshot.",
+            key="conf_restaurar_snapshot"
         )
+        if st.button("♻️ Restaurar snapshot", disabled=not conf_rest):
+            restaurar(snap_sel)
+            st.session_state.pop(chave_zip, None)
+            st.success("Snapshot restaurado. O estado anterior foi salvo como novo snapshot.")
+            st.rerun()
 
     st.markdown("---")
     st.subheader("Resumo rápido do backup")
 
+    def contar(tabela):
+        return int(ler_df(tabela, None, f"SELECT COUNT(*) AS n FROM {tabela} WHERE {ativos(tabela)}")["n"].iloc[0])
+
     r1, r2, r3 = st.columns(3)
-    r1.metric("Registros da agenda", len(df_ag_backup))
-    r2.metric("Registros de vendas", len(df_v_backup))
-    r3.metric("Registros de gastos", len(df_g_backup))
+    r1.metric("Registros da agenda", contar("agenda"))
+    r2.metric("Registros de vendas", contar("vendas"))
+    r3.metric("Registros de gastos", contar("gastos"))
 
     with st.expander("Visualizar dados da agenda"):
-        st.dataframe(df_ag_backup, use_container_width=True)
+        tabela_paginada("agenda", "tab_bkp_agenda", chave=("data", "hora", "id"))
 
     with st.expander("Visualizar dados de vendas"):
-        st.dataframe(df_v_backup, use_container_width=True)
+        tabela_paginada("vendas", "tab_bkp_vendas")
 
     with st.expander("Visualizar dados de gastos"):
-        st.dataframe(df_g_backup, use_container_width=True)
\ No newline at end of file
+        tabela_paginada("gastos", "tab_bkp_gastos")
+
+# =========================================================
+# DIAGNÓSTICO (menu escondido)
+# =========================================================
+elif menu == "Diagnóstico":
+    st.subheader("Diagnóstico de desempenho")
+    st.caption(
+        f"Últimas {DIAG.amostras} medidas de cada item, neste processo do servidor. "
+        "Reruns interrompidos (erro de formulário, st.rerun) não entram no tempo de página."
+    )
+
+    ligado = st.toggle("Instrumentação ligada", value=DIAG.ativo, key="diag_ligado")
+    if ligado != DIAG.ativo:
+        DIAG.ativo = ligado
+        st.rerun()
+
+    c1, c2 = st.columns(2)
+    if c1.button("🧹 Zerar medidas"):
+        DIAG.zerar()
+        st.rerun()
+    if c2.button("💾 Salvar agora", disabled=not DIAG.arquivo,
+                 help="Grava em ARTMAX_DIAG_ARQUIVO" if DIAG.arquivo else "Defina ARTMAX_DIAG_ARQUIVO para guardar as medidas"):
+        DIAG.salvar()
+        st.success(f"Medidas gravadas em {DIAG.arquivo}")
+
+    st.caption(
+        f"Cache de leitura: {read_cache.hits} acertos • {read_cache.misses} consultas ao banco • "
+        f"Gráficos do BI: {graficos.hits} reaproveitados • {graficos.misses} montados"
+    )
+
+    colunas_diag = ["nome", "n", "p50", "p95", "max", "total"]
+
+    st.markdown("#### Páginas (rerun completo, ms)")
+    paginas = DIAG.resumo("página")
+    if paginas:
+        st.dataframe([{c: r[c] for c in colunas_diag} for r in paginas], use_container_width=True, hide_index=True)
+    else:
+        st.info("Nenhuma medida ainda: ligue a instrumentação e navegue pelas telas.")
+
+    st.markdown("#### Consultas mais lentas (ms)")
+    consultas = DIAG.resumo("consulta")[:50]
+    if consultas:
+        st.dataframe(
+            [{**{c: r[c] for c in colunas_diag}, "nome": r["nome"][:120]} for r in consultas],
+            use_container_width=True, hide_index=True
+        )
+        sql_sel = st.selectbox(
+            "Plano de execução (EXPLAIN QUERY PLAN)",
+            [r["nome"] for r in consultas],
+            format_func=lambda q: q[:100]
+        )
+        st.code(sql_sel, language="sql")
+        st.code("\n".join(DIAG.plano(sql_sel) or ["(plano não capturado)"]))
+
+    st.markdown("#### Relatórios, gráficos e blocos de tela (ms)")
+    blocos = [r for r in DIAG.resumo() if r["tipo"] not in ("página", "consulta")]
+    if blocos:
+        st.dataframe(
+            [{"tipo": r["tipo"], **{c: r[c] for c in colunas_diag}} for r in blocos],
+            use_container_width=True, hide_index=True
+        )
+
+# =========================================================
+# Tempo do rerun (só quando a instrumentação está ligada)
+# =========================================================
+if DIAG.ativo:
+    DIAG.registrar("página", menu, (time.perf_counter() - t_rerun) * 1000)
+    DIAG.salvar_periodico()
@@ -0,0 +1,22 @@
+# Regras de negócio do Artmax, sem Streamlit: o app.py é só a tela e o
+# `python -m artmax` (cli.py) usa os mesmos serviços para lotes, rotinas e testes de carga.
+#
+#   config     constantes do salão (profissionais, serviços, horários, caminhos)
+#   datas      meses e períodos
+#   db         schema, migrações e o Database (1 escrita + pool de leitura)
+#   cache      cache de leituras e os leitores de DataFrames e de registros
+#   registros  linhas tipadas (tuplas nomeadas) de agenda/vendas/gastos, direto do cursor
+#   clientes   cadastro e busca FTS de clientes
+#   agenda     agendamentos e índice de horários
+#   vendas     checkout e comissões
+#   despesas   gastos
+#   exclusoes  exclusão lógica em lotes de agenda/vendas, desfazer e purga
+#   relatorios agregações do BI
+#   lembretes  fila de lembretes do WhatsApp
+#   sheets     exportação para o Google Sheets
+#   backup     ZIP de CSVs e snapshots do banco
+#   importacao carga de CSVs históricos (idempotente)
+#   diagnostico tempos por página/consulta/bloco (tela Diagnóstico)
+#   graficos   figuras do BI memorizadas por período e versão dos dados
+#   analitico  cópia colunar (Arrow/Parquet) do histórico para análises de vários anos
+#   unidades   um banco por filial e o BI consolidado em paralelo
@@ -0,0 +1,158 @@
+import bisect
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+
+from .config import DURACAO_SERVICO, DURACAO_PADRAO, HORARIO_ABERTURA, HORARIO_FECHAMENTO, SLOT_PASSO
+from .db import upsert_cliente
+
+# =========================================================
+# AGENDA: índice de horários por profissional/dia
+# =========================================================
+def hora_min(hora: str) -> int:
+    h, m = (hora or "00:00")[:5].split(":")
+    return int(h) * 60 + int(m)
+
+def min_hora(minutos: int) -> str:
+    return f"{minutos // 60:02d}:{minutos % 60:02d}"
+
+def duracao_servico(servico: str) -> int:
+    return DURACAO_SERVICO.get(servico, DURACAO_PADRAO)
+
+class SlotIndex:
+    # por (profissional, dia): inícios ordenados + maior fim até cada posição,
+    # o que deixa a checagem de conflito em O(log n) mesmo com encaixes já sobrepostos.
+    # Guarda no máximo max_dias dias (LRU): o processo fica de pé por meses.
+    def __init__(self, database, max_dias=256):
+        self.db = database
+        self.max_dias = max_dias
+        self._dias = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _carregar(self, profissional: str, dia: str):
+        with self.db.reader() as conn:
+            rows = conn.execute(
+                "SELECT hora, servico, id FROM agenda WHERE profissional = ? AND data = ? AND exclusao_id IS NULL",
+                (profissional, dia)
+            ).fetchall()
+        return sorted((hora_min(h), hora_min(h) + duracao_servico(s), i) for h, s, i in rows)
+
+    def _dia(self, profissional: str, dia: str):
+        chave = (profissional, dia)
+        if chave in self._dias:
+            self._dias.move_to_end(chave)
+            return self._dias[chave]
+        self._dias[chave] = self._montar(self._carregar(profissional, dia))
+        while len(self._dias) > self.max_dias:
+            self._dias.popitem(last=False)
+        return self._dias[chave]
+
+    @staticmethod
+    def _montar(intervalos):
+        inicios = [i[0] for i in intervalos]
+        max_fim = []
+        maior = -1
+        for _, fim, _ in intervalos:
+            maior = max(maior, fim)
+            max_fim.append(maior)
+        return intervalos, inicios, max_fim
+
+    def conflito(self, profissional: str, dia: date, hora: str, duracao: int):
+        # devolve o id de um agendamento que se sobrepõe, ou None
+        ini = hora_min(hora)
+        fim = ini + duracao
+        with self._lock:
+            intervalos, inicios, max_fim = self._dia(profissional, dia.isoformat())
+            k = bisect.bisect_left(inicios, fim)  # candidatos: os que começam antes do fim
+            # de trás para frente; quando o maior fim até j não passa de ini, nada antes passa
+            for j in range(k - 1, -1, -1):
+                if max_fim[j] <= ini:
+                    break
+                if intervalos[j][1] > ini:
+                    return intervalos[j][2]
+        return None
+
+    def adicionar(self, profissional: str, dia: date, hora: str, duracao: int, agenda_id: int):
+        with self._lock:
+            chave = (profissional, dia.isoformat())
+            if chave not in self._dias:
+                return  # será carregado do banco quando for consultado
+            intervalos, inicios, max_fim = self._dias[chave]
+            ini = hora_min(hora)
+            fim = ini + duracao
+            pos = bisect.bisect(intervalos, (ini, fim, agenda_id))
+            intervalos.insert(pos, (ini, fim, agenda_id))
+            inicios.insert(pos, ini)
+            max_fim.insert(pos, max(max_fim[pos - 1], fim) if pos else fim)
+            # o maior fim só muda daqui para frente, e só até alcançar um fim maior
+            for j in range(pos + 1, len(max_fim)):
+                if max_fim[j] >= fim:
+                    break
+                max_fim[j] = fim
+
+    def descartar(self):
+        with self._lock:
+            self._dias.clear()
+
+    def proximos_livres(self, profissional: str, duracao: int, a_partir: datetime, n: int = 6, dias: int = 30):
+        abre, fecha = hora_min(HORARIO_ABERTURA), hora_min(HORARIO_FECHAMENTO)
+        livres = []
+        for d in range(dias):
+            dia = a_partir.date() + timedelta(days=d)
+            ini = abre
+            if d == 0:
+                agora = a_partir.hour * 60 + a_partir.minute
+                ini = max(abre, -(-agora // SLOT_PASSO) * SLOT_PASSO)
+            for m in range(ini, fecha - duracao + 1, SLOT_PASSO):
+                if self.conflito(profissional, dia, min_hora(m), duracao) is None:
+                    livres.append((dia, min_hora(m)))
+                    if len(livres) >= n:
+                        return livres
+        return livres
+
+# =========================================================
+# AGENDA: inclusão e exclusão
+# =========================================================
+class HorarioOcupado(ValueError):
+    # a_partir/duracao: para a tela sugerir os próximos livres (SlotIndex.proximos_livres)
+    def __init__(self, profissional: str, agenda_id: int, a_partir: datetime, duracao: int):
+        self.profissional = profissional
+        self.agenda_id = agenda_id
+        self.a_partir = a_partir
+        self.duracao = duracao
+        super().__init__(f"{profissional} já tem atendimento nesse horário (agendamento ID {agenda_id}).")
+
+def inserir_agendamento(conn, slots: SlotIndex, data: date, hora: str, cliente: str, telefone: str,
+                        servico: str, profissional: str) -> int:
+    # conn precisa ser a de escrita (db.writer()): checagem e inserção na mesma transação,
+    # então dois tablets não pegam o mesmo horário
+    cliente, telefone, hora = (cliente or "").strip(), (telefone or "").strip(), hora[:5]
+    if not cliente:
+        raise ValueError("Informe o nome do cliente.")
+    if not telefone:
+        raise ValueError("Informe o WhatsApp.")
+
+    duracao = duracao_servico(servico)
+    conflito = slots.conflito(profissional, data, hora, duracao)
+    if conflito is not None:
+        a_partir = datetime.combine(data, datetime.strptime(hora, "%H:%M").time())
+        raise HorarioOcupado(profissional, conflito, a_partir, duracao)
+
+    cliente_id = upsert_cliente(conn, cliente, telefone)
+    agenda_id = conn.execute(
+        "INSERT INTO agenda (data, hora, cliente, telefone, servico, profissional, cliente_id) "
+        "VALUES (?,?,?,?,?,?,?)",
+        (data.isoformat(), hora, cliente, telefone, servico, profissional, cliente_id)
+    ).lastrowid
+    slots.adicionar(profissional, data, hora, duracao, agenda_id)
+    return agenda_id
+
+def agendar(database, slots: SlotIndex, data: date, hora: str, cliente: str, telefone: str,
+            servico: str, profissional: str) -> int:
+    try:
+        with database.writer() as conn:
+            return inserir_agendamento(conn, slots, data, hora, cliente, telefone, servico, profissional)
+    except Exception as e:
+        if not isinstance(e, ValueError):
+            slots.descartar()  # rollback: o índice pode ter recebido o horário
+        raise
@@ -0,0 +1,256 @@
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import date, datetime
+
+from .config import ANALITICO_DIR, ANALITICO_FORMATO
+from .db import ativos
+
+# =========================================================
+# EXPORTAÇÃO ANALÍTICA (Arrow IPC / Parquet, particionada por ano/mês)
+# =========================================================
+# Cópia colunar de agenda/vendas/gastos para análises de vários anos linha a
+# linha (o BI do dia a dia continua nas tabelas de resumo):
+#   analitico/vendas/ano=2024/mes=5/dados.arrow
+# Atualização incremental: uma tabela cuja versão (versao_dados) não mudou nem é
+# consultada; nas outras, só são regravados os meses cuja assinatura mudou
+# (contagem, maior id, soma dos ids e dos valores, comissão). A leitura usa
+# pyarrow.dataset: só as partições do período, só as colunas pedidas e, em Arrow
+# IPC, com os arquivos mapeados em memória. pyarrow é opcional: sem ele, nada
+# aqui é importado e as telas escondem a parte analítica.
+# A atualização roda pelo botão do Backup, pelo CLI ou em segundo plano
+# (AtualizacaoAnalitica); a tela de BI só lê o que já foi exportado.
+ANALITICO_TABELAS = {
+    # tabela: [(coluna, tipo)], assinatura do mês em SQL
+    "vendas": (
+        [("id", "int64"), ("data", "date32"), ("cliente", "string"), ("valor", "float64"),
+         ("servico", "string"), ("profissional", "string"), ("comissao", "float64"), ("cliente_id", "int64")],
+        "COUNT(*), MAX(id), TOTAL(id), TOTAL(valor), TOTAL(comissao)",
+    ),
+    "gastos": (
+        [("id", "int64"), ("data", "date32"), ("descricao", "string"), ("valor", "float64")],
+        "COUNT(*), MAX(id), TOTAL(id), TOTAL(valor)",
+    ),
+    "agenda": (
+        [("id", "int64"), ("data", "date32"), ("hora", "string"), ("cliente", "string"), ("telefone", "string"),
+         ("servico", "string"), ("profissional", "string"), ("cliente_id", "int64")],
+        "COUNT(*), MAX(id), TOTAL(id)",
+    ),
+}
+ANALITICO_EXTENSAO = {"arrow": "arrow", "parquet": "parquet"}
+MANIFESTO = "manifesto.json"
+ANALITICO_INTERVALO = 600  # segundos entre atualizações em segundo plano
+
+_lock = threading.Lock()  # uma exportação por vez no processo (sessões do app)
+
+def _manifesto(pasta: str):
+    try:
+        with open(os.path.join(pasta, MANIFESTO), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def exportado(pasta: str = ANALITICO_DIR) -> bool:
+    return _manifesto(pasta) is not None
+
+def _particao(pasta: str, tabela: str, ym: str) -> str:
+    return os.path.join(pasta, tabela, f"ano={int(ym[:4])}", f"mes={int(ym[5:7])}")
+
+def _gravar_mes(conn, pasta: str, tabela: str, ym: str, formato: str):
+    import pyarrow as pa
+
+    colunas, _ = ANALITICO_TABELAS[tabela]
+    ano, mes = int(ym[:4]), int(ym[5:7])
+    fim = f"{ano + mes // 12:04d}-{mes % 12 + 1:02d}-01"
+    rows = conn.execute(
+        f"SELECT {', '.join(c for c, _ in colunas)} FROM {tabela} "
+        f"WHERE data >= ? AND data < ? AND {ativos(tabela)} ORDER BY data, id",
+        (f"{ym}-01", fim)
+    ).fetchall()
+    valores = list(zip(*rows)) if rows else [()] * len(colunas)
+    tabela_arrow = pa.table({
+        # data chega como texto ISO: vira date32 (filtros e group_by nativos)
+        nome: pa.array(vals, pa.string()).cast(pa.date32()) if tipo == "date32" else pa.array(vals, getattr(pa, tipo)())
+        for (nome, tipo), vals in zip(colunas, valores)
+    })
+
+    destino = _particao(pasta, tabela, ym)
+    os.makedirs(destino, exist_ok=True)
+    path = os.path.join(destino, f"dados.{ANALITICO_EXTENSAO[formato]}")
+    tmp = os.path.join(destino, f".dados.{ANALITICO_EXTENSAO[formato]}.tmp")  # "." fica fora da leitura
+    if formato == "parquet":
+        import pyarrow.parquet as pq
+
+        pq.write_table(tabela_arrow, tmp, compression="zstd")
+    else:
+        import pyarrow.feather as feather
+
+        # sem compressão: é o que permite ler mapeado em memória, sem copiar
+        feather.write_feather(tabela_arrow, tmp, compression="uncompressed")
+    os.replace(tmp, path)
+    return len(rows)
+
+def exportar_analitico(database, pasta: str = ANALITICO_DIR, formato: str = ANALITICO_FORMATO, progresso=None):
+    # devolve {tabela: {"meses": regravados, "linhas": linhas regravadas}, "segundos": ...}
+    if formato not in ANALITICO_EXTENSAO:
+        raise ValueError(f"formato desconhecido: {formato!r} (use arrow ou parquet)")
+    t0 = time.perf_counter()
+    with _lock:
+        manifesto = _manifesto(pasta)
+        if manifesto is None or manifesto.get("formato") != formato:
+            # primeira exportação ou troca de formato: começa do zero
+            shutil.rmtree(pasta, ignore_errors=True)
+            manifesto = {"formato": formato, "tabelas": {}}
+        os.makedirs(pasta, exist_ok=True)
+
+        resultado = {}
+        with database.reader() as conn:
+            conn.execute("BEGIN")  # todas as tabelas do mesmo instante do banco
+            versoes = dict(conn.execute("SELECT tabela, versao FROM versao_dados").fetchall())
+            for tabela, (_, assinatura) in ANALITICO_TABELAS.items():
+                atual = manifesto["tabelas"].get(tabela, {"versao": None, "meses": {}})
+                resultado[tabela] = {"meses": 0, "linhas": 0}
+                if atual["versao"] is not None and atual["versao"] == versoes.get(tabela):
+                    continue
+
+                meses = {
+                    ym: list(sig) for ym, *sig in conn.execute(
+                        f"SELECT substr(data, 1, 7) AS ym, {assinatura} FROM {tabela} "
+                        f"WHERE data IS NOT NULL AND {ativos(tabela)} GROUP BY ym"
+                    )
+                }
+                for ym, sig in sorted(meses.items()):
+                    if atual["meses"].get(ym) == sig:
+                        continue
+                    resultado[tabela]["linhas"] += _gravar_mes(conn, pasta, tabela, ym, formato)
+                    resultado[tabela]["meses"] += 1
+                    if progresso:
+                        progresso(tabela, ym)
+                for ym in set(atual["meses"]) - set(meses):
+                    # mês que ficou vazio (exclusões)
+                    shutil.rmtree(_particao(pasta, tabela, ym), ignore_errors=True)
+                    resultado[tabela]["meses"] += 1
+                manifesto["tabelas"][tabela] = {"versao": versoes.get(tabela), "meses": meses}
+
+        manifesto["atualizado_em"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        _salvar_manifesto(pasta, manifesto)
+
+    resultado["segundos"] = round(time.perf_counter() - t0, 3)
+    return resultado
+
+def _salvar_manifesto(pasta: str, manifesto):
+    tmp = os.path.join(pasta, MANIFESTO + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifesto, f)
+    os.replace(tmp, os.path.join(pasta, MANIFESTO))
+
+def esquecer_versoes(pasta: str = ANALITICO_DIR):
+    # depois de restaurar um snapshot a versao_dados volta atrás e pode repetir um número já
+    # exportado com outros dados: a próxima exportação confere as assinaturas de todos os meses
+    with _lock:
+        manifesto = _manifesto(pasta)
+        if manifesto is None:
+            return
+        for atual in manifesto["tabelas"].values():
+            atual["versao"] = None
+        _salvar_manifesto(pasta, manifesto)
+
+class AtualizacaoAnalitica:
+    # uma thread por banco e processo, como o robô de lembretes. Só atualiza o que já foi
+    # exportado uma vez (a primeira exportação é pedida no Backup); sem escrita nova, a
+    # rodada não passa da consulta às versões
+    def __init__(self, database, pasta: str = ANALITICO_DIR, intervalo: int = ANALITICO_INTERVALO):
+        self.db = database
+        self.pasta = pasta
+        self.intervalo = intervalo
+        self.ultima_execucao = None
+        self.ultimo_erro = None
+        self._thread = threading.Thread(target=self._loop, name="artmax-analitico", daemon=True)
+        self._thread.start()
+
+    def _loop(self):
+        while True:
+            time.sleep(self.intervalo)
+            if not exportado(self.pasta):
+                continue
+            try:
+                exportar_analitico(self.db, self.pasta, _manifesto(self.pasta)["formato"])
+                self.ultima_execucao = datetime.now()
+                self.ultimo_erro = None
+            except Exception as e:
+                self.ultimo_erro = str(e)
+
+# =========================================================
+# Leitura
+# =========================================================
+def ler_analitico(tabela: str, ini: date = None, fim: date = None, colunas=None, pasta: str = ANALITICO_DIR):
+    # pyarrow.Table com as colunas pedidas do período [ini, fim); poda por partição (ano) + filtro por data
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    from pyarrow import fs
+
+    manifesto = _manifesto(pasta)
+    if manifesto is None:
+        raise ValueError("exportação analítica ainda não foi gerada")
+    base = os.path.join(pasta, tabela)
+    schema = pa.schema([(c, pa.date32() if t == "date32" else getattr(pa, t)()) for c, t in ANALITICO_TABELAS[tabela][0]])
+    if not os.path.isdir(base):
+        return schema.empty_table().select(colunas or schema.names)
+
+    dataset = ds.dataset(
+        base,
+        schema=schema.append(pa.field("ano", pa.int32())).append(pa.field("mes", pa.int32())),
+        format="ipc" if manifesto["formato"] == "arrow" else "parquet",
+        partitioning=ds.partitioning(pa.schema([("ano", pa.int32()), ("mes", pa.int32())]), flavor="hive"),
+        filesystem=fs.LocalFileSystem(use_mmap=True),
+    )
+    filtro = None
+    if ini is not None:
+        filtro = (ds.field("ano") >= ini.year) & (ds.field("data") >= pa.scalar(ini, pa.date32()))
+    if fim is not None:
+        f_fim = (ds.field("ano") <= fim.year) & (ds.field("data") < pa.scalar(fim, pa.date32()))
+        filtro = f_fim if filtro is None else filtro & f_fim
+    return dataset.to_table(columns=colunas or schema.names, filter=filtro)
+
+def clientes_do_periodo(database, ini: date, fim: date, n: int = 20, pasta: str = ANALITICO_DIR):
+    # ranking de clientes no período (vários anos): visitas, faturamento, ticket médio, 1ª e última visita.
+    # Agregação vetorizada no Arrow; só os n primeiros vão para o pandas com o nome do cadastro.
+    import pyarrow.compute as pc
+
+    t = ler_analitico("vendas", ini, fim, ["cliente_id", "valor", "data"], pasta)
+    t = t.filter(pc.is_valid(t["cliente_id"]))
+    agg = t.group_by("cliente_id").aggregate([
+        ("valor", "count"), ("valor", "sum"), ("data", "min"), ("data", "max"),
+    ])
+    agg = agg.sort_by([("valor_sum", "descending")]).slice(0, n)
+    nomes_col = {"valor_count": "visitas", "valor_sum": "faturamento", "data_min": "primeira_visita",
+                 "data_max": "ultima_visita"}
+    df = agg.rename_columns([nomes_col.get(c, c) for c in agg.column_names]).to_pandas()
+    if df.empty:
+        return df
+    df["ticket_medio"] = (df["faturamento"] / df["visitas"]).round(2)
+
+    ids = [int(i) for i in df["cliente_id"]]
+    with database.reader() as conn:
+        nomes = dict(conn.execute(
+            f"SELECT id, nome FROM clientes WHERE id IN ({','.join(['?'] * len(ids))})", ids
+        ).fetchall())
+    df.insert(0, "cliente", df["cliente_id"].map(nomes))
+    return df.drop(columns=["cliente_id"])
+
+def resumo_exportacao(pasta: str = ANALITICO_DIR):
+    # {tabela: meses exportados}, data da última atualização e tamanho em disco (MB)
+    manifesto = _manifesto(pasta)
+    if manifesto is None:
+        return None
+    tamanho = sum(
+        os.path.getsize(os.path.join(raiz, a)) for raiz, _, arquivos in os.walk(pasta) for a in arquivos
+    )
+    return {
+        "formato": manifesto["formato"],
+        "atualizado_em": manifesto.get("atualizado_em"),
+        "meses": {t: len(v["meses"]) for t, v in manifesto["tabelas"].items()},
+        "mb": round(tamanho / 2**20, 1),
+    }
@@ -0,0 +1,133 @@
+import csv
+import glob
+import io
+import os
+import sqlite3
+import tempfile
+import time
+import zipfile
+from datetime import datetime
+
+from .config import BACKUP_DIR, SNAPSHOT_DIR
+from .db import migrate, ativos, colunas_visiveis
+
+# =========================================================
+# BACKUP (ZIP com CSVs, gerado em streaming)
+# =========================================================
+BACKUP_TABELAS = [
+    ("agenda", "data, hora"),
+    ("vendas", "data DESC, id DESC"),
+    ("gastos", "data DESC, id DESC"),
+]
+BACKUP_CHUNK = 5000
+
+def build_backup_zip(database, pasta: str = BACKUP_DIR) -> str:
+    # várias sessões podem gerar ao mesmo tempo: cada uma grava no próprio temporário,
+    # e a limpeza só apaga ZIPs mais antigos que o início desta chamada (com folga para
+    # a resolução do mtime), então não some o arquivo que outra sessão acabou de entregar
+    inicio = time.time() - 1
+    # uma única transação de leitura: os três CSVs e as versões saem do
+    # mesmo instante do banco (em WAL isso não segura as escritas)
+    with database.reader() as conn:
+        conn.execute("BEGIN")
+        versoes = dict(conn.execute("SELECT tabela, versao FROM versao_dados").fetchall())
+        tag = "-".join(f"{t}{versoes.get(t, 0)}" for t, _ in BACKUP_TABELAS)
+        path = os.path.join(pasta, f"artmax_backup_{tag}.zip")
+        if os.path.exists(path):
+            # reaproveitado conta como recém-entregue para a limpeza das outras sessões
+            os.utime(path)
+            return path
+
+        os.makedirs(pasta, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=pasta, prefix="artmax_backup_", suffix=".zip.tmp")
+        os.close(fd)
+        try:
+            with zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+                for tabela, order_by in BACKUP_TABELAS:
+                    cur = conn.execute(
+                        f"SELECT {', '.join(colunas_visiveis(conn, tabela))} FROM {tabela} "
+                        f"WHERE {ativos(tabela)} ORDER BY {order_by}"
+                    )
+                    with zf.open(f"{tabela}_backup.csv", "w") as raw, \
+                            io.TextIOWrapper(raw, encoding="utf-8-sig", newline="") as fh:
+                        w = csv.writer(fh, lineterminator="\n")
+                        w.writerow([c[0] for c in cur.description])
+                        while True:
+                            rows = cur.fetchmany(BACKUP_CHUNK)
+                            if not rows:
+                                break
+                            w.writerows(rows)
+            os.replace(tmp, path)
+        except BaseException:
+            os.remove(tmp)
+            raise
+
+    # só o arquivo da versão atual fica em disco (e os que outras sessões geraram agora)
+    for old in glob.glob(os.path.join(pasta, "artmax_backup_*.zip")):
+        try:
+            if old != path and os.path.getmtime(old) < inicio:
+                os.remove(old)
+        except FileNotFoundError:
+            pass  # outra sessão apagou antes
+    return path
+
+# =========================================================
+# SNAPSHOTS (cópia consistente do banco via API de backup do SQLite)
+# =========================================================
+SNAPSHOT_PAGES = 256     # páginas copiadas por passo; entre passos o banco fica livre para escrita
+SNAPSHOT_KEEP = 10       # últimos snapshots sempre mantidos
+SNAPSHOT_DIAS = 30       # além deles, o mais recente de cada um dos últimos N dias
+
+def listar_snapshots(pasta: str = SNAPSHOT_DIR):
+    # nome artmax_AAAAMMDD_HHMMSS_ffffff.db: ordem alfabética = ordem cronológica
+    return sorted(glob.glob(os.path.join(pasta, "artmax_*.db")), reverse=True)
+
+def rotacionar_snapshots(pasta: str = SNAPSHOT_DIR):
+    arquivos = listar_snapshots(pasta)
+    manter = set(arquivos[:SNAPSHOT_KEEP])
+    por_dia = {}
+    for path in arquivos:
+        dia = os.path.basename(path)[len("artmax_"):len("artmax_AAAAMMDD")]
+        if dia not in por_dia and len(por_dia) < SNAPSHOT_DIAS:
+            por_dia[dia] = path
+    manter.update(por_dia.values())
+    for path in arquivos:
+        if path not in manter:
+            os.remove(path)
+
+def criar_snapshot(database, progress=None, pasta: str = SNAPSHOT_DIR) -> str:
+    os.makedirs(pasta, exist_ok=True)
+    # microssegundos no nome: o snapshot de segurança da restauração sai no mesmo
+    # segundo do escolhido e não pode sobrescrevê-lo
+    path = os.path.join(pasta, datetime.now().strftime("artmax_%Y%m%d_%H%M%S_%f.db"))
+    tmp = path + ".tmp"
+    dst = sqlite3.connect(tmp)
+    try:
+        with database.reader() as conn:
+            # transação de leitura aberta durante toda a cópia: sem ela, cada commit de
+            # outra conexão reinicia o backup e, com o caixa gravando sem parar, ele
+            # nunca termina. Em WAL isso não segura as escritas.
+            conn.execute("BEGIN")
+            conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+            conn.backup(dst, pages=SNAPSHOT_PAGES, progress=progress, sleep=0.005)
+    finally:
+        dst.close()
+    os.replace(tmp, path)
+    rotacionar_snapshots(pasta)
+    return path
+
+def restaurar_snapshot(database, path: str, pasta: str = SNAPSHOT_DIR, pasta_backup: str = BACKUP_DIR):
+    # o estado atual vira um snapshot (em `pasta`) antes de ser sobrescrito; caches do
+    # processo (leituras, índice de horários) ficam por conta de quem chama
+    criar_snapshot(database, pasta=pasta)
+    src = sqlite3.connect(path)
+    try:
+        with database.writer_raw() as conn:
+            src.backup(conn, pages=SNAPSHOT_PAGES)
+            migrate(conn)
+    finally:
+        src.close()
+    # a versao_dados volta junto com o snapshot e, com escritas novas, pode repetir a tag de um
+    # ZIP de outros dados: os ZIPs em cache não valem mais
+    for old in glob.glob(os.path.join(pasta_backup, "artmax_backup_*.zip")):
+        os.remove(old)
@@ -0,0 +1,97 @@
+import threading
+from collections import OrderedDict
+from datetime import date
+
+from .datas import ym_of
+from .diagnostico import DIAG
+from .registros import ler_registros
+
+# =========================================================
+# CACHE DE LEITURAS (tabela/mês, LRU)
+# =========================================================
+class ReadCache:
+    # chave: (tabela, (ano, mes) ou None, sql, params)
+    # None = leitura sem recorte de mês (ex.: backup), invalidada por qualquer escrita na tabela
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._geracao = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, loader):
+        tabela = key[0]
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            geracao = self._geracao.get(tabela, 0)
+
+        value = loader()
+
+        with self._lock:
+            # se houve escrita na tabela durante a leitura, não guarda o resultado
+            if self._geracao.get(tabela, 0) == geracao:
+                self._data[key] = value
+                self._data.move_to_end(key)
+                while len(self._data) > self.max_entries:
+                    self._data.popitem(last=False)
+        return value
+
+    def invalidate(self, tabela, ym=None):
+        with self._lock:
+            self._geracao[tabela] = self._geracao.get(tabela, 0) + 1
+            for k in [k for k in self._data if k[0] == tabela and (ym is None or k[1] in (ym, None))]:
+                del self._data[k]
+
+    def invalidar(self, tabela: str, d: date = None):
+        self.invalidate(tabela, ym_of(d) if d else None)
+        if tabela in ("agenda", "vendas"):
+            # cadastro e histórico de clientes mudam junto
+            self.invalidate("clientes")
+        if tabela == "agenda":
+            # lembretes saem junto com o agendamento (ON DELETE CASCADE e trigger da exclusão lógica)
+            self.invalidate("lembretes")
+        if tabela in ("vendas", "gastos"):
+            # relatórios que cruzam vendas e despesas
+            self.invalidate("bi", ym_of(d) if d else None)
+
+    def clear(self):
+        with self._lock:
+            for tabela in {k[0] for k in self._data}:
+                self._geracao[tabela] = self._geracao.get(tabela, 0) + 1
+            self._data.clear()
+
+def leitor(database, cache: ReadCache = None):
+    # ler(tabela, ym, sql, params) -> DataFrame; com cache, a chave é (tabela, ym, sql, params)
+    def ler(tabela: str, ym, sql: str, params=()):
+        def _load():
+            import pandas as pd
+
+            with database.reader() as conn, DIAG.consulta(conn, sql, params):
+                return pd.read_sql(sql, conn, params=list(params))
+
+        if cache is None:
+            return _load()
+        df = cache.get((tabela, ym, sql, tuple(params)), _load)
+        # cópia: as telas alteram colunas (to_numeric, sort) sem sujar o cache
+        return df.copy()
+
+    return ler
+
+def leitor_registros(database, cache: ReadCache = None):
+    # ler(modelo, tabela, ym, sql, params) -> tupla de registros (artmax.registros), no mesmo cache;
+    # imutável, então sai do cache sem cópia
+    def ler(modelo, tabela: str, ym, sql: str, params=()):
+        def _load():
+            with database.reader() as conn, DIAG.consulta(conn, sql, params):
+                return tuple(ler_registros(conn, modelo, sql, params))
+
+        if cache is None:
+            return _load()
+        return cache.get((tabela, ym, sql, tuple(params), modelo.__name__), _load)
+
+    return ler
@@ -0,0 +1,258 @@
+import argparse
+import json
+import sys
+import time
+from datetime import date, timedelta
+
+from .config import DB_PATH, UNIDADES, ANALITICO_DIR, ANALITICO_FORMATO, BACKUP_DIR, SNAPSHOT_DIR
+from .datas import date_iso
+from .db import abrir_banco
+from .cache import leitor
+from .agenda import SlotIndex, agendar, inserir_agendamento
+from .vendas import registrar_venda, inserir_venda, recalcular_comissoes
+from .despesas import registrar_gasto, inserir_gasto
+from .relatorios import BI_AGRUPAMENTOS, bi_totais, bi_agrupado
+from .lembretes import gerar_lembretes
+from .backup import build_backup_zip, criar_snapshot
+from .importacao import IMPORT_LOTE, importar_arquivo
+from .unidades import Unidades, Consolidado
+from .analitico import exportar_analitico
+from .exclusoes import EXCLUSAO_DESFAZER, desfazer, purgar
+
+# =========================================================
+# CLI: python -m artmax <comando> (mesmas regras do app, sem Streamlit)
+# =========================================================
+# Escritas daqui aparecem no app na próxima interação: ele detecta commits de
+# outros processos (Database.alterado_por_fora) e descarta o que tem em memória.
+LOTE_TAMANHO = 1000  # linhas por transação no comando "lote"
+
+def _saida(obj):
+    print(json.dumps(obj, ensure_ascii=False, default=str))
+
+def _pasta(base: str, args) -> str:
+    # com --unidade, a subpasta da unidade (a mesma que o app usa); com --db, a pasta de sempre
+    return Unidades(UNIDADES).pasta(base, args.unidade) if args.unidade else base
+
+# =========================================================
+# LOTE: uma operação por linha (JSON), N linhas por transação
+# =========================================================
+# {"op": "venda", "data": "2024-05-02", "cliente": "Ana", "telefone": "...", "servico": "Escova",
+#  "profissional": "Evelyn", "valor": 80}
+# {"op": "agendamento", "data": "...", "hora": "14:00", "cliente": "...", "telefone": "...", "servico": "...", "profissional": "..."}
+# {"op": "despesa", "data": "...", "descricao": "Aluguel", "valor": 1500}
+def _executar_op(conn, slots, op: dict):
+    tipo = op.get("op")
+    dia = date.fromisoformat(op["data"]) if op.get("data") else date.today()
+    if tipo == "venda":
+        return inserir_venda(conn, dia, op.get("cliente"), op.get("telefone"), op.get("servico", ""),
+                             op.get("profissional", ""), op.get("valor"))[0]
+    if tipo == "agendamento":
+        return inserir_agendamento(conn, slots, dia, op.get("hora", ""), op.get("cliente"), op.get("telefone"),
+                                   op.get("servico", ""), op.get("profissional", ""))
+    if tipo == "despesa":
+        return inserir_gasto(conn, dia, op.get("descricao"), op.get("valor"))
+    raise ValueError(f"op desconhecida: {tipo!r}")
+
+def executar_lote(database, linhas, tamanho: int = LOTE_TAMANHO, erros=None):
+    # linhas: iterável de str (JSON); devolve {"ok", "erros", "segundos", "por_segundo"}.
+    # Linha inválida não derruba o lote: vai para `erros` como (nº da linha, mensagem).
+    slots = SlotIndex(database)
+    erros = [] if erros is None else erros
+    ok = 0
+    t0 = time.perf_counter()
+
+    def _gravar(bloco):
+        nonlocal ok
+        try:
+            with database.writer() as conn:
+                for n, op in bloco:
+                    try:
+                        _executar_op(conn, slots, op)
+                        ok += 1
+                    except (ValueError, KeyError, TypeError) as e:
+                        erros.append((n, str(e)))
+        except Exception:
+            slots.descartar()
+            raise
+
+    bloco = []
+    for n, linha in enumerate(linhas, start=1):
+        if not linha.strip():
+            continue
+        try:
+            bloco.append((n, json.loads(linha)))
+        except json.JSONDecodeError as e:
+            erros.append((n, f"JSON inválido: {e}"))
+            continue
+        if len(bloco) >= tamanho:
+            _gravar(bloco)
+            bloco = []
+    if bloco:
+        _gravar(bloco)
+
+    segundos = time.perf_counter() - t0
+    return {
+        "ok": ok,
+        "erros": len(erros),
+        "segundos": round(segundos, 3),
+        "por_segundo": round(ok / segundos) if segundos else None,
+    }
+
+# =========================================================
+# Comandos
+# =========================================================
+def cmd_migrar(database, args):
+    with database.reader() as conn:
+        versao = conn.execute("PRAGMA user_version").fetchone()[0]
+    _saida({"banco": database.path, "versao": versao})
+
+def cmd_agendar(database, args):
+    agenda_id = agendar(database, SlotIndex(database), args.data, args.hora, args.cliente, args.telefone,
+                        args.servico, args.profissional)
+    _saida({"id": agenda_id})
+
+def cmd_venda(database, args):
+    venda_id, comissao = registrar_venda(database, args.data, args.cliente, args.telefone, args.servico,
+                                         args.profissional, args.valor)
+    _saida({"id": venda_id, "comissao": comissao})
+
+def cmd_despesa(database, args):
+    _saida({"id": registrar_gasto(database, args.data, args.descricao, args.valor)})
+
+def cmd_relatorio(database, args):
+    if args.todas:
+        unidades = Unidades(UNIDADES)
+        ler = Consolidado(unidades, {nome: leitor(unidades.banco(nome)) for nome in unidades.nomes})
+    else:
+        ler = leitor(database)
+    fim = args.ate + timedelta(days=1)  # --ate é inclusivo na linha de comando
+    _saida({
+        "unidade": "todas" if args.todas else args.unidade,
+        "de": date_iso(args.de),
+        "ate": date_iso(args.ate),
+        "totais": bi_totais(ler, args.de, fim),
+        args.por: bi_agrupado(ler, args.de, fim, args.por).to_dict("records"),
+    })
+
+def cmd_recalcular(database, args):
+    with database.writer() as conn:
+        alteradas = recalcular_comissoes(conn, args.de, args.ate + timedelta(days=1) if args.ate else date.max)
+    _saida({"alteradas": alteradas})
+
+def cmd_lembretes(database, args):
+    _saida({"gerados": gerar_lembretes(database, args.dia)})
+
+def cmd_backup(database, args):
+    _saida({"zip": build_backup_zip(database, _pasta(BACKUP_DIR, args))})
+
+def cmd_snapshot(database, args):
+    _saida({"snapshot": criar_snapshot(database, pasta=_pasta(SNAPSHOT_DIR, args))})
+
+def cmd_lote(database, args):
+    erros = []
+    with (open(args.arquivo, encoding="utf-8") if args.arquivo != "-" else sys.stdin) as fh:
+        resumo = executar_lote(database, fh, args.tamanho, erros)
+    for n, msg in erros:
+        print(f"linha {n}: {msg}", file=sys.stderr)
+    _saida(resumo)
+
+def cmd_importar(database, args):
+    for res in importar_arquivo(database, args.arquivo, args.tabela, args.tamanho):
+        for n, msg in res.pop("erros"):
+            print(f"{res['arquivo']} linha {n}: {msg}", file=sys.stderr)
+        _saida(res)
+
+def cmd_exportar_analitico(database, args):
+    _saida(exportar_analitico(database, args.pasta or _pasta(ANALITICO_DIR, args), args.formato))
+
+def cmd_desfazer_exclusao(database, args):
+    res = desfazer(database, args.id, SlotIndex(database))
+    _saida({"tabela": res["tabela"], "restauradas": res["qtd"], "conflitos": res["conflitos"]})
+
+def cmd_purgar_exclusoes(database, args):
+    _saida({"purgadas": purgar(database, args.prazo)})
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m artmax", description="Artmax sem a tela: lotes, rotinas e cargas")
+    parser.add_argument("--db", default=DB_PATH, help=f"arquivo do banco (padrão: {DB_PATH})")
+    parser.add_argument("--unidade", choices=list(UNIDADES), help="usa o banco da unidade (ARTMAX_UNIDADES) no lugar do --db")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    sub.add_parser("migrar", help="aplica as migrações pendentes").set_defaults(fn=cmd_migrar)
+
+    p = sub.add_parser("agendar", help="novo agendamento (recusa horário ocupado)")
+    p.add_argument("--data", type=date.fromisoformat, default=date.today())
+    p.add_argument("--hora", required=True)
+    p.add_argument("--cliente", required=True)
+    p.add_argument("--telefone", required=True)
+    p.add_argument("--servico", required=True)
+    p.add_argument("--profissional", required=True)
+    p.set_defaults(fn=cmd_agendar)
+
+    p = sub.add_parser("venda", help="registra uma venda (comissão pelas regras vigentes)")
+    p.add_argument("--data", type=date.fromisoformat, default=date.today())
+    p.add_argument("--cliente", required=True)
+    p.add_argument("--telefone", default="")
+    p.add_argument("--servico", required=True)
+    p.add_argument("--profissional", required=True)
+    p.add_argument("--valor", type=float, required=True)
+    p.set_defaults(fn=cmd_venda)
+
+    p = sub.add_parser("despesa", help="registra uma despesa")
+    p.add_argument("--data", type=date.fromisoformat, default=date.today())
+    p.add_argument("--descricao", required=True)
+    p.add_argument("--valor", type=float, required=True)
+    p.set_defaults(fn=cmd_despesa)
+
+    p = sub.add_parser("relatorio", help="totais e agrupamento do período (JSON; requer pandas)")
+    p.add_argument("--de", type=date.fromisoformat, required=True)
+    p.add_argument("--ate", type=date.fromisoformat, required=True, help="inclusive")
+    p.add_argument("--por", choices=list(BI_AGRUPAMENTOS), default="Mês")
+    p.add_argument("--todas", action="store_true", help="consolidado de todas as unidades (em paralelo)")
+    p.set_defaults(fn=cmd_relatorio)
+
+    p = sub.add_parser("recalcular-comissoes", help="reprecifica as comissões pelas regras atuais")
+    p.add_argument("--de", type=date.fromisoformat, default=date.min)
+    p.add_argument("--ate", type=date.fromisoformat, help="inclusive; sem ele, até o fim do histórico")
+    p.set_defaults(fn=cmd_recalcular)
+
+    p = sub.add_parser("lembretes", help="monta a fila de lembretes do dia")
+    p.add_argument("--dia", type=date.fromisoformat, default=date.today())
+    p.set_defaults(fn=cmd_lembretes)
+
+    sub.add_parser("backup", help="gera o ZIP de CSVs").set_defaults(fn=cmd_backup)
+    sub.add_parser("snapshot", help="cópia consistente do banco").set_defaults(fn=cmd_snapshot)
+
+    p = sub.add_parser("lote", help="executa operações JSON (uma por linha) em transações de N linhas")
+    p.add_argument("arquivo", nargs="?", default="-", help="arquivo .jsonl ou - para stdin")
+    p.add_argument("--tamanho", type=int, default=LOTE_TAMANHO, help="linhas por transação")
+    p.set_defaults(fn=cmd_lote)
+
+    p = sub.add_parser("importar", help="carga de CSVs históricos (formato do backup; reimportar não duplica)")
+    p.add_argument("arquivo", help=".csv ou o .zip da tela de Backup")
+    p.add_argument("--tabela", choices=["agenda", "vendas", "gastos"], help="sem ele, pelo nome do arquivo/colunas")
+    p.add_argument("--tamanho", type=int, default=IMPORT_LOTE, help="linhas por transação")
+    p.set_defaults(fn=cmd_importar)
+
+    p = sub.add_parser("exportar-analitico", help="atualiza a cópia colunar do histórico (requer pyarrow)")
+    p.add_argument("--pasta", help=f"padrão: {ANALITICO_DIR} (com --unidade, a subpasta da unidade)")
+    p.add_argument("--formato", choices=["arrow", "parquet"], default=ANALITICO_FORMATO,
+                   help="arrow: leitura mapeada em memória; parquet: arquivos menores (zstd)")
+    p.set_defaults(fn=cmd_exportar_analitico)
+
+    p = sub.add_parser("desfazer-exclusao", help="restaura as linhas de uma exclusão (dentro do prazo)")
+    p.add_argument("--id", type=int, required=True, help="id na tabela exclusoes")
+    p.set_defaults(fn=cmd_desfazer_exclusao)
+
+    p = sub.add_parser("purgar-exclusoes", help="apaga de vez as exclusões vencidas ou desfeitas")
+    p.add_argument("--prazo", type=int, default=EXCLUSAO_DESFAZER, help="segundos (0: todas as pendentes)")
+    p.set_defaults(fn=cmd_purgar_exclusoes)
+
+    args = parser.parse_args(argv)
+    database = abrir_banco(UNIDADES[args.unidade] if args.unidade else args.db)
+    try:
+        args.fn(database, args)
+    except ValueError as e:
+        print(f"erro: {e}", file=sys.stderr)
+        return 1
+    return 0
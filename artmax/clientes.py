@@ -0,0 +1,50 @@
+import re
+import difflib
+import unicodedata
+
+# =========================================================
+# BUSCA DE CLIENTES (FTS5: sem acento, prefixo e tolerante a erro de digitação)
+# =========================================================
+def sem_acento(s: str) -> str:
+    return "".join(c for c in unicodedata.normalize("NFKD", s) if not unicodedata.combining(c)).lower()
+
+def _termos_parecidos(conn, termo: str, n: int = 3):
+    # vocabulário do índice com a mesma inicial; erro na primeira letra é raro
+    candidatos = [r[0] for r in conn.execute(
+        "SELECT term FROM busca_clientes_vocab WHERE term >= ? AND term < ?",
+        (termo[0], termo[0] + "\uffff")
+    )]
+    return difflib.get_close_matches(termo, candidatos, n=n, cutoff=0.75)
+
+def fts_query(database, texto: str):
+    # expressão MATCH: todos os termos, cada um como prefixo; se nada casar,
+    # troca cada termo pelos termos mais parecidos do vocabulário
+    if re.fullmatch(r"[\d\s()+./-]+", texto):
+        digitos = re.sub(r"\D", "", texto)  # telefone digitado com máscara
+        termos = [digitos] if digitos else []
+    else:
+        termos = re.findall(r"\w+", sem_acento(texto))
+    if not termos:
+        return None
+
+    estrita = " AND ".join(f'"{t}"*' for t in termos)
+    with database.reader() as conn:
+        if conn.execute("SELECT 1 FROM busca_clientes WHERE busca_clientes MATCH ? LIMIT 1", (estrita,)).fetchone():
+            return estrita
+
+        partes = []
+        for t in termos:
+            alternativas = [f'"{t}"*'] + [f'"{p}"' for p in _termos_parecidos(conn, t)]
+            partes.append("(" + " OR ".join(alternativas) + ")")
+    return " AND ".join(partes)
+
+def filtro_busca_clientes(database, tabela: str, texto: str):
+    # trecho de WHERE (+ parâmetros) que restringe ids de agenda/vendas à busca
+    match = fts_query(database, texto)
+    if match is None:
+        return "", []
+    paridade = 1 if tabela == "vendas" else 0
+    return (
+        f" AND id IN (SELECT rowid / 2 FROM busca_clientes WHERE busca_clientes MATCH ? AND rowid % 2 = {paridade})",
+        [match],
+    )
@@ -0,0 +1,53 @@
+import os
+
+# =========================================================
+# CONFIG
+# =========================================================
+APP_NAME = "Artmax Cabeleleiros"
+# ARTMAX_DB permite apontar o app/CLI para outro arquivo (cópia, carga de teste)
+DB_PATH = os.environ.get("ARTMAX_DB", "artmax.db")
+# várias unidades, um banco por filial: ARTMAX_UNIDADES="Centro=artmax_centro.db;Vila Nova=artmax_vila.db"
+# (escolhidas na barra lateral; ver artmax/unidades.py). Sem ela, uma unidade só, em DB_PATH.
+UNIDADES = {
+    nome.strip(): path.strip()
+    for nome, _, path in (item.partition("=") for item in os.environ.get("ARTMAX_UNIDADES", "").split(";"))
+    if nome.strip() and path.strip()
+} or {"Matriz": DB_PATH}
+BACKUP_DIR = "backups"
+# instrumentação (tela Diagnóstico): ARTMAX_DIAG=1 liga desde o início; com
+# ARTMAX_DIAG_ARQUIVO os tempos sobrevivem a reinícios do servidor
+DIAG_ATIVO = os.environ.get("ARTMAX_DIAG") == "1"
+DIAG_ARQUIVO = os.environ.get("ARTMAX_DIAG_ARQUIVO")
+SNAPSHOT_DIR = os.path.join(BACKUP_DIR, "snapshots")
+# cópia colunar para análises de vários anos (ver artmax/analitico.py; requer pyarrow)
+ANALITICO_DIR = "analitico"
+ANALITICO_FORMATO = "arrow"  # "arrow" (IPC, lido mapeado em memória) ou "parquet" (menor em disco)
+
+PROFISSIONAIS = ["Eunides", "Evelyn"]
+SERVICOS = ["Escova", "Progressiva", "Luzes", "Coloração", "Botox", "Relaxamento", "Sobrancelha", "Corte", "Outros"]
+
+# duração (min) de cada serviço na agenda; serviços fora da lista usam o padrão
+DURACAO_SERVICO = {
+    "Escova": 60,
+    "Progressiva": 180,
+    "Luzes": 180,
+    "Coloração": 120,
+    "Botox": 120,
+    "Relaxamento": 120,
+    "Sobrancelha": 30,
+    "Corte": 45,
+}
+DURACAO_PADRAO = 60
+HORARIO_ABERTURA = "08:00"
+HORARIO_FECHAMENTO = "19:00"
+SLOT_PASSO = 15  # min entre horários sugeridos
+
+# Carga inicial de comissao_regras; depois disso as regras são editadas na tela "Comissões"
+COMISSAO_EVELYN = {
+    "Escova": 0.50,
+    "Progressiva": 0.50,
+    "Botox": 0.50,
+    "Sobrancelha": 0.60,
+    "Coloração": 0.40,
+    "Relaxamento": 0.50,
+}
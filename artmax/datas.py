@@ -0,0 +1,33 @@
+from datetime import date, timedelta
+
+# =========================================================
+# FUNÇÕES DE MÊS/ANO
+# =========================================================
+MESES_PT = [
+    "Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho",
+    "Julho", "Agosto", "Setembro", "Outubro", "Novembro", "Dezembro"
+]
+
+def month_range(year: int, month: int):
+    start = date(year, month, 1)
+    if month == 12:
+        end = date(year + 1, 1, 1)
+    else:
+        end = date(year, month + 1, 1)
+    return start, end
+
+def date_iso(d: date) -> str:
+    return d.isoformat()
+
+def ym_of(d: date):
+    return (d.year, d.month)
+
+def ano_anterior(d: date) -> date:
+    try:
+        return d.replace(year=d.year - 1)
+    except ValueError:  # 29/02
+        return d.replace(year=d.year - 1, day=28)
+
+def ym_do_periodo(ini: date, fim: date):
+    # período dentro de um mês só: a entrada do cache cai só com escrita naquele mês
+    return ym_of(ini) if ym_of(ini) == ym_of(fim - timedelta(days=1)) else None
@@ -0,0 +1,716 @@
+import sqlite3
+import threading
+import queue
+from contextlib import contextmanager
+
+from .config import DB_PATH, COMISSAO_EVELYN
+
+# =========================================================
+# DB
+# =========================================================
+def normalizar_telefone(tel):
+    # só dígitos, com DDD e sem o 55; None se não parece um telefone
+    digitos = "".join(filter(str.isdigit, tel or ""))
+    if len(digitos) > 11 and digitos.startswith("55"):
+        digitos = digitos[2:]
+    digitos = digitos.lstrip("0")
+    return digitos if len(digitos) >= 8 else None
+
+def upsert_cliente(conn, nome: str, telefone=None) -> int:
+    # identidade do cliente: telefone normalizado; sem telefone, o nome (sem diferenciar maiúsculas)
+    nome = (nome or "").strip()
+    tel = normalizar_telefone(telefone)
+    if tel:
+        row = conn.execute("SELECT id FROM clientes WHERE telefone = ?", (tel,)).fetchone()
+        if row:
+            conn.execute("UPDATE clientes SET nome = ? WHERE id = ?", (nome, row[0]))
+            return row[0]
+        # completa o cadastro de quem só tinha nome
+        row = conn.execute(
+            "SELECT id FROM clientes WHERE telefone IS NULL AND nome = ? COLLATE NOCASE LIMIT 1", (nome,)
+        ).fetchone()
+        if row:
+            conn.execute("UPDATE clientes SET telefone = ? WHERE id = ?", (tel, row[0]))
+            return row[0]
+    else:
+        row = conn.execute(
+            "SELECT id FROM clientes WHERE nome = ? COLLATE NOCASE ORDER BY ultima_visita DESC, id DESC LIMIT 1",
+            (nome,)
+        ).fetchone()
+        if row:
+            return row[0]
+    return conn.execute("INSERT INTO clientes (nome, telefone) VALUES (?, ?)", (nome, tel)).lastrowid
+
+# agenda e vendas têm exclusão lógica (exclusao_id preenchido = excluída, ver exclusoes.py).
+# Toda leitura dessas tabelas filtra as ativas com ativos(tabela): além de esconder as
+# excluídas, é a condição que deixa o SQLite usar os índices parciais (WHERE exclusao_id IS NULL).
+TABELAS_COM_EXCLUSAO = ("agenda", "vendas")
+
+def ativos(tabela: str, alias: str = "") -> str:
+    return f"{alias}exclusao_id IS NULL" if tabela in TABELAS_COM_EXCLUSAO else "1=1"
+
+def colunas_visiveis(conn, tabela: str):
+    # colunas para exportar/mostrar (sem a marca de exclusão)
+    return [r[1] for r in conn.execute(f"PRAGMA table_info({tabela})") if r[1] != "exclusao_id"]
+
+# Migrações versionadas: cada função leva o schema da versão N-1 para N.
+# A versão aplicada fica em PRAGMA user_version (e em schema_version, para consulta).
+def _mig_001_tabelas(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS agenda (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            data TEXT,
+            hora TEXT,
+            cliente TEXT,
+            telefone TEXT,
+            servico TEXT,
+            profissional TEXT
+        )
+    """)
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS vendas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            data TEXT,
+            cliente TEXT,
+            valor REAL,
+            servico TEXT,
+            profissional TEXT,
+            comissao REAL DEFAULT 0
+        )
+    """)
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS gastos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            data TEXT,
+            descricao TEXT,
+            valor REAL
+        )
+    """)
+
+def _mig_002_comissao(conn):
+    # bancos antigos foram criados antes da coluna comissao
+    cols = [r[1] for r in conn.execute("PRAGMA table_info(vendas)").fetchall()]
+    if "comissao" not in cols:
+        conn.execute("ALTER TABLE vendas ADD COLUMN comissao REAL DEFAULT 0")
+
+def _mig_003_indices(conn):
+    # datas ficam em ISO (YYYY-MM-DD), que já ordena como texto:
+    # os filtros "data >= ? AND data < ?" passam a usar os índices abaixo
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_agenda_data_hora ON agenda (data, hora)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_agenda_prof_data ON agenda (profissional, data)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_vendas_data_id ON vendas (data, id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_vendas_prof_data ON vendas (profissional, data)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_gastos_data_id ON gastos (data, id)")
+
+def _mig_004_resumos(conn):
+    # agregados diários mantidos por triggers: o BI lê poucas linhas em vez de todas as vendas
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS resumo_vendas (
+            data TEXT NOT NULL,
+            profissional TEXT NOT NULL,
+            servico TEXT NOT NULL,
+            qtd INTEGER NOT NULL DEFAULT 0,
+            valor REAL NOT NULL DEFAULT 0,
+            comissao REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (data, profissional, servico)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS resumo_gastos (
+            data TEXT NOT NULL,
+            descricao TEXT NOT NULL,
+            qtd INTEGER NOT NULL DEFAULT 0,
+            valor REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (data, descricao)
+        ) WITHOUT ROWID
+    """)
+
+    soma_venda = """
+        INSERT INTO resumo_vendas (data, profissional, servico, qtd, valor, comissao)
+        VALUES (COALESCE(NEW.data, ''), COALESCE(NEW.profissional, ''), COALESCE(NEW.servico, ''),
+                1, COALESCE(NEW.valor, 0), COALESCE(NEW.comissao, 0))
+        ON CONFLICT (data, profissional, servico) DO UPDATE SET
+            qtd = qtd + 1,
+            valor = valor + excluded.valor,
+            comissao = comissao + excluded.comissao;
+    """
+    tira_venda = """
+        UPDATE resumo_vendas SET
+            qtd = qtd - 1,
+            valor = valor - COALESCE(OLD.valor, 0),
+            comissao = comissao - COALESCE(OLD.comissao, 0)
+        WHERE data = COALESCE(OLD.data, '')
+          AND profissional = COALESCE(OLD.profissional, '')
+          AND servico = COALESCE(OLD.servico, '');
+        DELETE FROM resumo_vendas
+        WHERE data = COALESCE(OLD.data, '')
+          AND profissional = COALESCE(OLD.profissional, '')
+          AND servico = COALESCE(OLD.servico, '')
+          AND qtd <= 0;
+    """
+    soma_gasto = """
+        INSERT INTO resumo_gastos (data, descricao, qtd, valor)
+        VALUES (COALESCE(NEW.data, ''), COALESCE(NEW.descricao, ''), 1, COALESCE(NEW.valor, 0))
+        ON CONFLICT (data, descricao) DO UPDATE SET
+            qtd = qtd + 1,
+            valor = valor + excluded.valor;
+    """
+    tira_gasto = """
+        UPDATE resumo_gastos SET
+            qtd = qtd - 1,
+            valor = valor - COALESCE(OLD.valor, 0)
+        WHERE data = COALESCE(OLD.data, '') AND descricao = COALESCE(OLD.descricao, '');
+        DELETE FROM resumo_gastos
+        WHERE data = COALESCE(OLD.data, '') AND descricao = COALESCE(OLD.descricao, '') AND qtd <= 0;
+    """
+
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS trg_vendas_resumo_ins AFTER INSERT ON vendas BEGIN {soma_venda} END")
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS trg_vendas_resumo_del AFTER DELETE ON vendas BEGIN {tira_venda} END")
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS trg_vendas_resumo_upd AFTER UPDATE ON vendas BEGIN {tira_venda} {soma_venda} END")
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS trg_gastos_resumo_ins AFTER INSERT ON gastos BEGIN {soma_gasto} END")
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS trg_gastos_resumo_del AFTER DELETE ON gastos BEGIN {tira_gasto} END")
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS trg_gastos_resumo_upd AFTER UPDATE ON gastos BEGIN {tira_gasto} {soma_gasto} END")
+
+    # carga inicial com o histórico existente
+    conn.execute("DELETE FROM resumo_vendas")
+    conn.execute("""
+        INSERT INTO resumo_vendas (data, profissional, servico, qtd, valor, comissao)
+        SELECT COALESCE(data, ''), COALESCE(profissional, ''), COALESCE(servico, ''),
+               COUNT(*), COALESCE(SUM(valor), 0), COALESCE(SUM(comissao), 0)
+        FROM vendas
+        GROUP BY 1, 2, 3
+    """)
+    conn.execute("DELETE FROM resumo_gastos")
+    conn.execute("""
+        INSERT INTO resumo_gastos (data, descricao, qtd, valor)
+        SELECT COALESCE(data, ''), COALESCE(descricao, ''), COUNT(*), COALESCE(SUM(valor), 0)
+        FROM gastos
+        GROUP BY 1, 2
+    """)
+
+def _mig_005_versoes(conn):
+    # contador de escritas por tabela: identifica se um artefato (ex.: backup) ainda vale
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS versao_dados (
+            tabela TEXT PRIMARY KEY,
+            versao INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    """)
+    for tabela in ("agenda", "vendas", "gastos"):
+        conn.execute("INSERT OR IGNORE INTO versao_dados (tabela, versao) VALUES (?, 0)", (tabela,))
+        for evento in ("INSERT", "UPDATE", "DELETE"):
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{tabela}_versao_{evento.lower()}
+                AFTER {evento} ON {tabela}
+                BEGIN
+                    UPDATE versao_dados SET versao = versao + 1 WHERE tabela = '{tabela}';
+                END
+            """)
+
+def _so_digitos(col):
+    # número completo + finais de 9 e 8 dígitos: busca por prefixo acha com ou sem DDD
+    expr = f"COALESCE({col}, '')"
+    for ch in (" ", "-", "(", ")", "+", ".", "/"):
+        expr = f"REPLACE({expr}, '{ch}', '')"
+    return f"{expr} || ' ' || substr({expr}, -9) || ' ' || substr({expr}, -8)"
+
+# tabela, paridade do rowid em busca_clientes, expressão do telefone ({r} = NEW/OLD/tabela)
+_BUSCA_FONTES = [
+    ("agenda", 0, _so_digitos("{r}.telefone")),
+    ("vendas", 1, "''"),
+]
+
+def _mig_006_busca_clientes(conn):
+    # índice FTS5 de clientes de agenda + vendas; rowid = id * 2 (+1 para vendas),
+    # o que permite apagar/atualizar a linha do índice sem varrer a tabela virtual
+    conn.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS busca_clientes USING fts5(
+            cliente, telefone, servico,
+            tokenize = 'unicode61 remove_diacritics 2'
+        )
+    """)
+    conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS busca_clientes_vocab USING fts5vocab(busca_clientes, 'row')")
+
+    for tabela, paridade, tel in _BUSCA_FONTES:
+        insere = f"""
+            INSERT INTO busca_clientes (rowid, cliente, telefone, servico)
+            VALUES (NEW.id * 2 + {paridade}, NEW.cliente, {tel.format(r="NEW")}, NEW.servico);
+        """
+        apaga = f"DELETE FROM busca_clientes WHERE rowid = OLD.id * 2 + {paridade};"
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{tabela}_busca_ins AFTER INSERT ON {tabela} BEGIN {insere} END")
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{tabela}_busca_del AFTER DELETE ON {tabela} BEGIN {apaga} END")
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{tabela}_busca_upd
+            AFTER UPDATE OF cliente, servico{", telefone" if tabela == "agenda" else ""} ON {tabela}
+            BEGIN {apaga} {insere} END
+        """)
+        conn.execute(f"""
+            INSERT INTO busca_clientes (rowid, cliente, telefone, servico)
+            SELECT id * 2 + {paridade}, cliente, {tel.format(r=tabela)}, servico FROM {tabela}
+        """)
+
+def _mig_007_clientes(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS clientes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome TEXT NOT NULL,
+            telefone TEXT,
+            visitas INTEGER NOT NULL DEFAULT 0,
+            total_gasto REAL NOT NULL DEFAULT 0,
+            ultima_visita TEXT,
+            criado_em TEXT DEFAULT (date('now'))
+        )
+    """)
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_clientes_telefone ON clientes (telefone) WHERE telefone IS NOT NULL")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_clientes_nome ON clientes (nome COLLATE NOCASE)")
+
+    for tabela in ("agenda", "vendas"):
+        cols = [r[1] for r in conn.execute(f"PRAGMA table_info({tabela})").fetchall()]
+        if "cliente_id" not in cols:
+            conn.execute(f"ALTER TABLE {tabela} ADD COLUMN cliente_id INTEGER REFERENCES clientes (id)")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{tabela}_cliente ON {tabela} (cliente_id, data)")
+
+    # unificação do histórico: agenda primeiro (tem telefone), depois vendas pelo nome
+    for tabela, com_tel in (("agenda", True), ("vendas", False)):
+        tel_col = "telefone" if com_tel else "NULL"
+        rows = conn.execute(f"SELECT id, cliente, {tel_col} FROM {tabela} WHERE cliente_id IS NULL ORDER BY id").fetchall()
+        vinculos = [
+            (upsert_cliente(conn, nome, tel), rid)
+            for rid, nome, tel in rows
+            if (nome or "").strip()
+        ]
+        conn.executemany(f"UPDATE {tabela} SET cliente_id = ? WHERE id = ?", vinculos)
+
+    # histórico/LTV materializado no cadastro: leitura O(1) por cliente
+    conn.execute("""
+        UPDATE clientes SET
+            visitas = (SELECT COUNT(*) FROM vendas v WHERE v.cliente_id = clientes.id),
+            total_gasto = (SELECT COALESCE(SUM(valor), 0) FROM vendas v WHERE v.cliente_id = clientes.id),
+            ultima_visita = (SELECT MAX(data) FROM vendas v WHERE v.cliente_id = clientes.id)
+    """)
+    soma = """
+        UPDATE clientes SET
+            visitas = visitas + 1,
+            total_gasto = total_gasto + COALESCE(NEW.valor, 0),
+            ultima_visita = MAX(COALESCE(ultima_visita, ''), COALESCE(NEW.data, ''))
+        WHERE id = NEW.cliente_id;
+    """
+    tira = """
+        UPDATE clientes SET
+            visitas = visitas - 1,
+            total_gasto = total_gasto - COALESCE(OLD.valor, 0),
+            ultima_visita = (SELECT MAX(data) FROM vendas WHERE cliente_id = OLD.cliente_id)
+        WHERE id = OLD.cliente_id;
+    """
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS trg_vendas_cliente_ins AFTER INSERT ON vendas BEGIN {soma} END")
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS trg_vendas_cliente_del AFTER DELETE ON vendas BEGIN {tira} END")
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_vendas_cliente_upd
+        AFTER UPDATE OF valor, data, cliente_id ON vendas
+        BEGIN {tira} {soma} END
+    """)
+
+def _mig_008_lembretes(conn):
+    # fila de lembretes do dia, montada pelo agendador em segundo plano
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS lembretes (
+            agenda_id INTEGER PRIMARY KEY REFERENCES agenda (id) ON DELETE CASCADE,
+            data TEXT NOT NULL,
+            hora TEXT,
+            cliente TEXT,
+            servico TEXT,
+            profissional TEXT,
+            link TEXT,
+            status TEXT NOT NULL DEFAULT 'pendente',
+            gerado_em TEXT DEFAULT (datetime('now', 'localtime')),
+            enviado_em TEXT
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_lembretes_data_status ON lembretes (data, status, hora)")
+
+def _mig_009_sheets_sync(conn):
+    # última planilha e último id enviado por (mês, tabela): base da sincronização incremental
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS sheets_sync (
+            ano INTEGER NOT NULL,
+            mes INTEGER NOT NULL,
+            tabela TEXT NOT NULL,
+            planilha_id TEXT NOT NULL,
+            url TEXT,
+            ultimo_id INTEGER NOT NULL DEFAULT 0,
+            linhas INTEGER NOT NULL DEFAULT 0,
+            atualizado_em TEXT DEFAULT (datetime('now', 'localtime')),
+            PRIMARY KEY (ano, mes, tabela)
+        )
+    """)
+
+def _mig_010_comissao_regras(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS comissao_regras (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            profissional TEXT NOT NULL COLLATE NOCASE,
+            servico TEXT NOT NULL,
+            pct REAL NOT NULL,
+            vigente_de TEXT NOT NULL DEFAULT '0000-01-01',
+            vigente_ate TEXT
+        )
+    """)
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_comissao_regras ON comissao_regras (profissional, servico, vigente_de)"
+    )
+    if conn.execute("SELECT COUNT(*) FROM comissao_regras").fetchone()[0] == 0:
+        conn.executemany(
+            "INSERT INTO comissao_regras (profissional, servico, pct) VALUES ('Evelyn', ?, ?)",
+            list(COMISSAO_EVELYN.items())
+        )
+
+def _mig_011_importacoes(conn):
+    # chaves das linhas já importadas de CSV: reimportar o mesmo arquivo não duplica nada
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS importacoes (
+            chave TEXT PRIMARY KEY,
+            tabela TEXT NOT NULL,
+            importado_em TEXT DEFAULT (datetime('now', 'localtime'))
+        ) WITHOUT ROWID
+    """)
+
+def _mig_012_exclusao_logica(conn):
+    # agenda/vendas: exclusao_id preenchido = linha excluída, ainda recuperável (ver exclusoes.py).
+    # Resumos, busca, histórico de clientes e lembretes passam a considerar só as linhas ativas;
+    # a purga (DELETE de uma linha já excluída) não mexe em nada disso.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS exclusoes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tabela TEXT NOT NULL,
+            qtd INTEGER NOT NULL DEFAULT 0,
+            maior_id INTEGER NOT NULL DEFAULT 0,
+            criada_em TEXT NOT NULL DEFAULT (datetime('now', 'localtime')),
+            desfeita_em TEXT,
+            purgada_em TEXT
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_exclusoes_pendentes ON exclusoes (criada_em) WHERE purgada_em IS NULL")
+    for tabela in TABELAS_COM_EXCLUSAO:
+        cols = [r[1] for r in conn.execute(f"PRAGMA table_info({tabela})").fetchall()]
+        if "exclusao_id" not in cols:
+            conn.execute(f"ALTER TABLE {tabela} ADD COLUMN exclusao_id INTEGER")
+        # só as excluídas: desfazer e purgar acham as linhas de uma exclusão sem varrer a tabela
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{tabela}_exclusao ON {tabela} (exclusao_id) WHERE exclusao_id IS NOT NULL"
+        )
+
+    # índices parciais: só linhas ativas. Toda leitura filtra "exclusao_id IS NULL" (db.ativos),
+    # que é a condição para o SQLite usar estes índices
+    for nome, tabela, colunas in (
+        ("idx_agenda_data_hora", "agenda", "data, hora"),
+        ("idx_agenda_prof_data", "agenda", "profissional, data"),
+        ("idx_agenda_cliente", "agenda", "cliente_id, data"),
+        ("idx_vendas_data_id", "vendas", "data, id"),
+        ("idx_vendas_prof_data", "vendas", "profissional, data"),
+        ("idx_vendas_cliente", "vendas", "cliente_id, data"),
+    ):
+        conn.execute(f"DROP INDEX IF EXISTS {nome}")
+        conn.execute(f"CREATE INDEX {nome} ON {tabela} ({colunas}) WHERE exclusao_id IS NULL")
+
+    for trigger in (
+        "trg_vendas_resumo_ins", "trg_vendas_resumo_del", "trg_vendas_resumo_upd",
+        "trg_vendas_cliente_ins", "trg_vendas_cliente_del", "trg_vendas_cliente_upd",
+        "trg_agenda_busca_ins", "trg_agenda_busca_del", "trg_agenda_busca_upd",
+        "trg_vendas_busca_ins", "trg_vendas_busca_del", "trg_vendas_busca_upd",
+        "trg_agenda_versao_delete", "trg_vendas_versao_delete",
+    ):
+        conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+
+    # resumo_vendas: só vendas ativas
+    soma_venda = """
+        INSERT INTO resumo_vendas (data, profissional, servico, qtd, valor, comissao)
+        VALUES (COALESCE(NEW.data, ''), COALESCE(NEW.profissional, ''), COALESCE(NEW.servico, ''),
+                1, COALESCE(NEW.valor, 0), COALESCE(NEW.comissao, 0))
+        ON CONFLICT (data, profissional, servico) DO UPDATE SET
+            qtd = qtd + 1,
+            valor = valor + excluded.valor,
+            comissao = comissao + excluded.comissao;
+    """
+    tira_venda = """
+        UPDATE resumo_vendas SET
+            qtd = qtd - 1,
+            valor = valor - COALESCE(OLD.valor, 0),
+            comissao = comissao - COALESCE(OLD.comissao, 0)
+        WHERE data = COALESCE(OLD.data, '')
+          AND profissional = COALESCE(OLD.profissional, '')
+          AND servico = COALESCE(OLD.servico, '');
+        DELETE FROM resumo_vendas
+        WHERE data = COALESCE(OLD.data, '')
+          AND profissional = COALESCE(OLD.profissional, '')
+          AND servico = COALESCE(OLD.servico, '')
+          AND qtd <= 0;
+    """
+    campos_resumo = "data, profissional, servico, valor, comissao, exclusao_id"
+    conn.execute(f"""
+        CREATE TRIGGER trg_vendas_resumo_ins AFTER INSERT ON vendas
+        WHEN NEW.exclusao_id IS NULL BEGIN {soma_venda} END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER trg_vendas_resumo_del AFTER DELETE ON vendas
+        WHEN OLD.exclusao_id IS NULL BEGIN {tira_venda} END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER trg_vendas_resumo_upd_tira AFTER UPDATE OF {campos_resumo} ON vendas
+        WHEN OLD.exclusao_id IS NULL BEGIN {tira_venda} END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER trg_vendas_resumo_upd_soma AFTER UPDATE OF {campos_resumo} ON vendas
+        WHEN NEW.exclusao_id IS NULL BEGIN {soma_venda} END
+    """)
+
+    # histórico/LTV do cadastro: só vendas ativas
+    soma_cliente = """
+        UPDATE clientes SET
+            visitas = visitas + 1,
+            total_gasto = total_gasto + COALESCE(NEW.valor, 0),
+            ultima_visita = MAX(COALESCE(ultima_visita, ''), COALESCE(NEW.data, ''))
+        WHERE id = NEW.cliente_id;
+    """
+    tira_cliente = """
+        UPDATE clientes SET
+            visitas = visitas - 1,
+            total_gasto = total_gasto - COALESCE(OLD.valor, 0),
+            ultima_visita = (
+                SELECT MAX(data) FROM vendas WHERE cliente_id = OLD.cliente_id AND exclusao_id IS NULL
+            )
+        WHERE id = OLD.cliente_id;
+    """
+    campos_cliente = "valor, data, cliente_id, exclusao_id"
+    conn.execute(f"""
+        CREATE TRIGGER trg_vendas_cliente_ins AFTER INSERT ON vendas
+        WHEN NEW.exclusao_id IS NULL BEGIN {soma_cliente} END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER trg_vendas_cliente_del AFTER DELETE ON vendas
+        WHEN OLD.exclusao_id IS NULL BEGIN {tira_cliente} END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER trg_vendas_cliente_upd_tira AFTER UPDATE OF {campos_cliente} ON vendas
+        WHEN OLD.exclusao_id IS NULL BEGIN {tira_cliente} END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER trg_vendas_cliente_upd_soma AFTER UPDATE OF {campos_cliente} ON vendas
+        WHEN NEW.exclusao_id IS NULL BEGIN {soma_cliente} END
+    """)
+
+    # busca de clientes: excluída sai do índice, desfeita volta
+    for tabela, paridade, tel in _BUSCA_FONTES:
+        insere = f"""
+            INSERT INTO busca_clientes (rowid, cliente, telefone, servico)
+            VALUES (NEW.id * 2 + {paridade}, NEW.cliente, {tel.format(r="NEW")}, NEW.servico);
+        """
+        apaga = f"DELETE FROM busca_clientes WHERE rowid = OLD.id * 2 + {paridade};"
+        conn.execute(f"""
+            CREATE TRIGGER trg_{tabela}_busca_ins AFTER INSERT ON {tabela}
+            WHEN NEW.exclusao_id IS NULL BEGIN {insere} END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER trg_{tabela}_busca_del AFTER DELETE ON {tabela}
+            WHEN OLD.exclusao_id IS NULL BEGIN {apaga} END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER trg_{tabela}_busca_upd
+            AFTER UPDATE OF cliente, servico{", telefone" if tabela == "agenda" else ""} ON {tabela}
+            WHEN OLD.exclusao_id IS NULL AND NEW.exclusao_id IS NULL BEGIN {apaga} {insere} END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER trg_{tabela}_busca_exclusao AFTER UPDATE OF exclusao_id ON {tabela}
+            WHEN OLD.exclusao_id IS NULL AND NEW.exclusao_id IS NOT NULL BEGIN {apaga} END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER trg_{tabela}_busca_restauracao AFTER UPDATE OF exclusao_id ON {tabela}
+            WHEN OLD.exclusao_id IS NOT NULL AND NEW.exclusao_id IS NULL BEGIN {insere} END
+        """)
+
+        # purga não muda o que se vê: não invalida backups, caches e exportações
+        conn.execute(f"""
+            CREATE TRIGGER trg_{tabela}_versao_delete AFTER DELETE ON {tabela}
+            WHEN OLD.exclusao_id IS NULL
+            BEGIN
+                UPDATE versao_dados SET versao = versao + 1 WHERE tabela = '{tabela}';
+            END
+        """)
+
+    # agendamento excluído sai da fila de lembretes (desfeito, o robô gera de novo)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_agenda_lembretes_exclusao AFTER UPDATE OF exclusao_id ON agenda
+        WHEN NEW.exclusao_id IS NOT NULL
+        BEGIN
+            DELETE FROM lembretes WHERE agenda_id = NEW.id;
+        END
+    """)
+
+def _mig_013_busca_telefone_vendas(conn):
+    # vendas não guardam telefone: a linha da venda no índice leva o do cadastro (cliente_id),
+    # para "Buscar cliente (nome ou telefone)" achar vendas pelo telefone também
+    tel = f"COALESCE((SELECT {_so_digitos('c.telefone')} FROM clientes c WHERE c.id = {{r}}.cliente_id), '')"
+    insere = f"""
+        INSERT INTO busca_clientes (rowid, cliente, telefone, servico)
+        VALUES (NEW.id * 2 + 1, NEW.cliente, {tel.format(r="NEW")}, NEW.servico);
+    """
+    apaga = "DELETE FROM busca_clientes WHERE rowid = OLD.id * 2 + 1;"
+    for trigger in ("trg_vendas_busca_ins", "trg_vendas_busca_upd", "trg_vendas_busca_restauracao"):
+        conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    conn.execute(f"""
+        CREATE TRIGGER trg_vendas_busca_ins AFTER INSERT ON vendas
+        WHEN NEW.exclusao_id IS NULL BEGIN {insere} END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER trg_vendas_busca_upd AFTER UPDATE OF cliente, servico, cliente_id ON vendas
+        WHEN OLD.exclusao_id IS NULL AND NEW.exclusao_id IS NULL BEGIN {apaga} {insere} END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER trg_vendas_busca_restauracao AFTER UPDATE OF exclusao_id ON vendas
+        WHEN OLD.exclusao_id IS NOT NULL AND NEW.exclusao_id IS NULL BEGIN {insere} END
+    """)
+
+    # telefone novo no cadastro (upsert_cliente completa quem só tinha nome): reindexa as vendas dele
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_clientes_busca_telefone AFTER UPDATE OF telefone ON clientes
+        WHEN NEW.telefone IS NOT OLD.telefone
+        BEGIN
+            DELETE FROM busca_clientes WHERE rowid IN (
+                SELECT id * 2 + 1 FROM vendas WHERE cliente_id = NEW.id AND exclusao_id IS NULL
+            );
+            INSERT INTO busca_clientes (rowid, cliente, telefone, servico)
+            SELECT id * 2 + 1, cliente, {_so_digitos("NEW.telefone")}, servico
+            FROM vendas WHERE cliente_id = NEW.id AND exclusao_id IS NULL;
+        END
+    """)
+
+    # backfill: as linhas de vendas já indexadas, agora com o telefone
+    conn.execute("DELETE FROM busca_clientes WHERE rowid % 2 = 1")
+    conn.execute(f"""
+        INSERT INTO busca_clientes (rowid, cliente, telefone, servico)
+        SELECT v.id * 2 + 1, v.cliente, {_so_digitos("c.telefone")}, v.servico
+        FROM vendas v LEFT JOIN clientes c ON c.id = v.cliente_id
+        WHERE v.exclusao_id IS NULL
+    """)
+
+MIGRATIONS = [
+    _mig_001_tabelas,
+    _mig_002_comissao,
+    _mig_003_indices,
+    _mig_004_resumos,
+    _mig_005_versoes,
+    _mig_006_busca_clientes,
+    _mig_007_clientes,
+    _mig_008_lembretes,
+    _mig_009_sheets_sync,
+    _mig_010_comissao_regras,
+    _mig_011_importacoes,
+    _mig_012_exclusao_logica,
+    _mig_013_busca_telefone_vendas,
+]
+
+def migrate(conn, ate: int = None):
+    # ate: para numa versão intermediária (carga de dados antes das triggers, ver benchmarks/gerar_dados.py)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            versao INTEGER PRIMARY KEY,
+            nome TEXT,
+            aplicada_em TEXT DEFAULT (datetime('now'))
+        )
+    """)
+    atual = conn.execute("PRAGMA user_version").fetchone()[0]
+
+    for versao, mig in enumerate(MIGRATIONS[:ate], start=1):
+        if versao <= atual:
+            continue
+        try:
+            conn.execute("BEGIN")
+            mig(conn)
+            conn.execute(
+                "INSERT OR REPLACE INTO schema_version (versao, nome) VALUES (?, ?)",
+                (versao, mig.__name__)
+            )
+            conn.execute(f"PRAGMA user_version = {versao}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+# Uma conexão de escrita (serializada por lock) + um pool de conexões de leitura.
+# Em WAL, leituras não bloqueiam a escrita e vice-versa.
+DB_PRAGMAS = [
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -32000",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA foreign_keys = ON",
+]
+DB_READERS = 4
+
+class Database:
+    def __init__(self, path: str, readers: int = DB_READERS):
+        self.path = path
+        self._write_lock = threading.Lock()
+        self._writer = self._connect()
+        migrate(self._writer)
+        self._data_version = self._writer.execute("PRAGMA data_version").fetchone()[0]
+        self._readers = queue.LifoQueue()
+        for _ in range(readers):
+            self._readers.put(None)  # conexões abertas sob demanda
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+        for pragma in DB_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    @contextmanager
+    def reader(self):
+        conn = self._readers.get()
+        try:
+            if conn is None:
+                conn = self._connect()
+            yield conn
+        finally:
+            if conn is not None and conn.in_transaction:
+                conn.rollback()
+            self._readers.put(conn)
+
+    @contextmanager
+    def writer(self):
+        # todas as instruções do bloco saem numa única transação
+        with self._write_lock:
+            conn = self._writer
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+    @contextmanager
+    def writer_raw(self):
+        # acesso exclusivo à conexão de escrita, sem transação aberta (restauração)
+        with self._write_lock:
+            yield self._writer
+
+    def alterado_por_fora(self) -> bool:
+        # PRAGMA data_version da conexão de escrita só muda com commits de outras conexões;
+        # as de leitura não escrevem, então isso = outro processo (CLI, importação).
+        # Com a escrita ocupada, fica para a próxima consulta.
+        if not self._write_lock.acquire(blocking=False):
+            return False
+        try:
+            versao = self._writer.execute("PRAGMA data_version").fetchone()[0]
+        finally:
+            self._write_lock.release()
+        mudou = versao != self._data_version
+        self._data_version = versao
+        return mudou
+
+def abrir_banco(path: str = DB_PATH) -> Database:
+    return Database(path)
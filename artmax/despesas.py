@@ -0,0 +1,19 @@
+from datetime import date
+
+# =========================================================
+# DESPESAS
+# =========================================================
+def inserir_gasto(conn, data: date, descricao: str, valor: float) -> int:
+    descricao = (descricao or "").strip()
+    if not descricao:
+        raise ValueError("Informe a descrição.")
+    if not valor or float(valor) <= 0:
+        raise ValueError("Informe um valor maior que zero.")
+    return conn.execute(
+        "INSERT INTO gastos (data, descricao, valor) VALUES (?,?,?)",
+        (data.isoformat(), descricao, float(valor))
+    ).lastrowid
+
+def registrar_gasto(database, data: date, descricao: str, valor: float) -> int:
+    with database.writer() as conn:
+        return inserir_gasto(conn, data, descricao, valor)
@@ -0,0 +1,143 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+
+from .config import DIAG_ATIVO, DIAG_ARQUIVO
+
+# =========================================================
+# DIAGNÓSTICO: tempos por página, consulta e bloco de tela
+# =========================================================
+# Um Diagnostico por processo (DIAG): as sessões do Streamlit e as threads de
+# exportação registram no mesmo lugar. Cada (tipo, nome) guarda as últimas
+# DIAG_AMOSTRAS medidas num buffer circular, de onde saem p50/p95.
+# Desligado, span() devolve sempre o mesmo nullcontext: nem relógio, nem lock.
+DIAG_AMOSTRAS = 200
+DIAG_PLANOS = 500              # planos de consulta guardados (um por SQL distinto)
+DIAG_SALVAR_INTERVALO = 60     # segundos entre gravações do arquivo
+
+_NADA = nullcontext()
+
+def _percentil(valores, p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p * (len(ordenados) - 1))))]
+
+class Diagnostico:
+    def __init__(self, ativo: bool = False, arquivo: str = None, amostras: int = DIAG_AMOSTRAS):
+        self.ativo = ativo
+        self.arquivo = arquivo
+        self.amostras = amostras
+        self._tempos = {}   # (tipo, nome) -> deque de ms
+        self._planos = {}   # sql -> linhas do EXPLAIN QUERY PLAN
+        self._lock = threading.Lock()
+        self._salvo_em = time.monotonic()
+        if arquivo and os.path.exists(arquivo):
+            self.carregar()
+
+    # ---------- medição ----------
+    def registrar(self, tipo: str, nome: str, ms: float):
+        with self._lock:
+            buf = self._tempos.get((tipo, nome))
+            if buf is None:
+                buf = self._tempos[(tipo, nome)] = deque(maxlen=self.amostras)
+            buf.append(ms)
+
+    @contextmanager
+    def _medir(self, tipo: str, nome: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar(tipo, nome, (time.perf_counter() - t0) * 1000)
+
+    def span(self, tipo: str, nome: str):
+        if not self.ativo:
+            return _NADA
+        return self._medir(tipo, nome)
+
+    def consulta(self, conn, sql: str, params=()):
+        # span da consulta; na primeira vez que o SQL aparece, guarda o plano do SQLite
+        if not self.ativo:
+            return _NADA
+        chave = " ".join(sql.split())
+        if chave not in self._planos and len(self._planos) < DIAG_PLANOS:
+            try:
+                plano = [r[-1] for r in conn.execute(f"EXPLAIN QUERY PLAN {sql}", list(params))]
+            except sqlite3.Error as e:
+                plano = [f"(sem plano: {e})"]
+            with self._lock:
+                self._planos[chave] = plano
+        return self._medir("consulta", chave)
+
+    # ---------- leitura ----------
+    def resumo(self, tipo: str = None):
+        # [{tipo, nome, n, p50, p95, max, total}] do mais lento (p95) para o mais rápido
+        with self._lock:
+            itens = [(k, list(v)) for k, v in self._tempos.items() if tipo is None or k[0] == tipo]
+        linhas = [{
+            "tipo": t,
+            "nome": nome,
+            "n": len(ms),
+            "p50": round(_percentil(ms, 0.50), 3),
+            "p95": round(_percentil(ms, 0.95), 3),
+            "max": round(max(ms), 3),
+            "total": round(sum(ms), 1),
+        } for (t, nome), ms in itens if ms]
+        return sorted(linhas, key=lambda r: r["p95"], reverse=True)
+
+    def plano(self, sql: str):
+        return self._planos.get(" ".join(sql.split()))
+
+    def zerar(self):
+        with self._lock:
+            self._tempos.clear()
+            self._planos.clear()
+
+    # ---------- persistência ----------
+    def salvar(self):
+        if not self.arquivo:
+            return
+        with self._lock:
+            dados = {
+                "tempos": [[t, nome, list(ms)] for (t, nome), ms in self._tempos.items()],
+                "planos": self._planos.copy(),
+            }
+            self._salvo_em = time.monotonic()
+        tmp = self.arquivo + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(dados, f, ensure_ascii=False)
+        os.replace(tmp, self.arquivo)
+
+    def salvar_periodico(self):
+        # chamado no fim de cada rerun; grava no máximo a cada DIAG_SALVAR_INTERVALO
+        if self.ativo and self.arquivo and time.monotonic() - self._salvo_em >= DIAG_SALVAR_INTERVALO:
+            self.salvar()
+
+    def carregar(self):
+        try:
+            with open(self.arquivo, encoding="utf-8") as f:
+                dados = json.load(f)
+        except (OSError, ValueError):
+            return
+        with self._lock:
+            for t, nome, ms in dados.get("tempos", []):
+                self._tempos[(t, nome)] = deque(ms, maxlen=self.amostras)
+            self._planos.update(dados.get("planos", {}))
+
+DIAG = Diagnostico(DIAG_ATIVO, DIAG_ARQUIVO)
+
+def medido(tipo: str):
+    # decorador: mede a função com o nome dela quando o DIAG está ligado
+    def decorador(fn):
+        @wraps(fn)
+        def medida(*args, **kwargs):
+            if not DIAG.ativo:
+                return fn(*args, **kwargs)
+            with DIAG._medir(tipo, fn.__name__):
+                return fn(*args, **kwargs)
+        return medida
+    return decorador
@@ -0,0 +1,194 @@
+import json
+import threading
+import time
+from datetime import date, datetime
+
+from .agenda import duracao_servico, hora_min
+from .db import TABELAS_COM_EXCLUSAO
+
+# =========================================================
+# EXCLUSÕES (lógicas, em lotes, com desfazer e purga em segundo plano)
+# =========================================================
+# Excluir marca as linhas com o id da exclusão (tabela exclusoes) em vez de
+# apagá-las: as triggers tiram a linha dos resumos, da busca e do histórico do
+# cliente na hora, e ela continua recuperável por EXCLUSAO_DESFAZER segundos.
+# Seleções grandes vão em transações de EXCLUSAO_LOTE linhas (os ids vão num
+# único parâmetro JSON, sem o limite de variáveis do SQLite) e entre um lote e
+# outro a escrita fica livre: um caixa gravando não espera a exclusão inteira.
+# A purga apaga de vez, também em lotes, o que passou do prazo ou foi desfeito.
+EXCLUSAO_LOTE = 500
+EXCLUSAO_DESFAZER = 30 * 60     # segundos em que uma exclusão ainda pode ser desfeita
+EXCLUSAO_PURGA_INTERVALO = 300  # segundos entre purgas
+
+def _tabela(tabela: str) -> str:
+    if tabela not in TABELAS_COM_EXCLUSAO:
+        raise ValueError(f"tabela sem exclusão lógica: {tabela!r}")
+    return tabela
+
+def _datas(conn, tabela: str, where: str, params):
+    rows = conn.execute(f"SELECT DISTINCT data FROM {tabela} WHERE {where}", params)
+    return {date.fromisoformat(r[0]) for r in rows if r[0]}
+
+def excluir(database, tabela: str, ids, slots=None, lote: int = EXCLUSAO_LOTE) -> dict:
+    # devolve {"exclusao_id", "qtd", "datas"}; datas: dias atingidos (a seleção pode cobrir vários meses)
+    _tabela(tabela)
+    ids = sorted({int(x) for x in ids})
+    resultado = {"exclusao_id": None, "qtd": 0, "datas": set()}
+    if not ids:
+        return resultado
+
+    with database.writer() as conn:
+        # maior id da tabela agora: no desfazer, só conflita o que foi criado depois da exclusão
+        resultado["exclusao_id"] = conn.execute(
+            f"INSERT INTO exclusoes (tabela, maior_id) SELECT ?, COALESCE(MAX(id), 0) FROM {tabela}", (tabela,)
+        ).lastrowid
+    where = "id IN (SELECT value FROM json_each(?)) AND exclusao_id IS NULL"
+    try:
+        for i in range(0, len(ids), lote):
+            parte = json.dumps(ids[i:i + lote])
+            with database.writer() as conn:
+                resultado["datas"] |= _datas(conn, tabela, where, (parte,))
+                n = conn.execute(
+                    f"UPDATE {tabela} SET exclusao_id = ? WHERE {where}", (resultado["exclusao_id"], parte)
+                ).rowcount
+                conn.execute("UPDATE exclusoes SET qtd = qtd + ? WHERE id = ?", (n, resultado["exclusao_id"]))
+            resultado["qtd"] += n
+            time.sleep(0)  # cede a vez: quem espera a escrita entra entre os lotes
+    finally:
+        if slots is not None:
+            slots.descartar()
+    return resultado
+
+def _marcados_depois(conn, maior_id: int):
+    # agendamentos criados depois da exclusão, por (profissional, dia): só eles podem ter tomado
+    # o horário de um excluído (sobreposições que já existiam antes dela não contam)
+    novos = {}
+    for data, hora, servico, profissional in conn.execute(
+        "SELECT data, hora, servico, profissional FROM agenda WHERE id > ? AND exclusao_id IS NULL", (maior_id,)
+    ):
+        ini = hora_min(hora)
+        novos.setdefault((profissional, data), []).append((ini, ini + duracao_servico(servico)))
+    return novos
+
+def desfazer(database, exclusao_id: int, slots=None, lote: int = EXCLUSAO_LOTE,
+             prazo: int = EXCLUSAO_DESFAZER) -> dict:
+    # devolve {"tabela", "qtd", "conflitos", "datas"}. Agendamento cujo horário foi ocupado
+    # depois da exclusão continua excluído (conta em "conflitos"), como no agendar.
+    with database.reader() as conn:
+        row = conn.execute(
+            "SELECT tabela, maior_id, desfeita_em, purgada_em, criada_em >= datetime('now', 'localtime', ?) "
+            "FROM exclusoes WHERE id = ?",
+            (f"-{int(prazo)} seconds", int(exclusao_id))
+        ).fetchone()
+    if row is None:
+        raise ValueError(f"exclusão {exclusao_id} não encontrada.")
+    tabela, maior_id, desfeita_em, purgada_em, no_prazo = row
+    if desfeita_em:
+        raise ValueError("Essa exclusão já foi desfeita.")
+    if purgada_em or not no_prazo:
+        raise ValueError("O prazo para desfazer essa exclusão já passou.")
+
+    resultado = {"tabela": tabela, "qtd": 0, "conflitos": 0, "datas": set()}
+    ultimo_id = 0
+    try:
+        while True:
+            with database.writer() as conn:
+                rows = conn.execute(
+                    f"SELECT id, data, {'hora, servico, profissional' if tabela == 'agenda' else 'NULL, NULL, NULL'} "
+                    f"FROM {tabela} WHERE exclusao_id = ? AND id > ? ORDER BY id LIMIT ?",
+                    (int(exclusao_id), ultimo_id, lote)
+                ).fetchall()
+                if not rows:
+                    conn.execute(
+                        "UPDATE exclusoes SET desfeita_em = datetime('now', 'localtime') WHERE id = ?", (int(exclusao_id),)
+                    )
+                    break
+                ultimo_id = rows[-1][0]
+                # relido a cada lote, na mesma transação: pega também o que foi marcado entre os lotes
+                novos = _marcados_depois(conn, maior_id) if tabela == "agenda" else {}
+                ok = []
+                for rid, data, hora, servico, profissional in rows:
+                    if (profissional, data) in novos:
+                        ini = hora_min(hora)
+                        fim = ini + duracao_servico(servico)
+                        if any(a < fim and b > ini for a, b in novos[(profissional, data)]):
+                            resultado["conflitos"] += 1
+                            continue
+                    ok.append((rid, data, hora, servico, profissional))
+                    if data:
+                        resultado["datas"].add(date.fromisoformat(data))
+                conn.execute(
+                    f"UPDATE {tabela} SET exclusao_id = NULL WHERE id IN (SELECT value FROM json_each(?))",
+                    (json.dumps([r[0] for r in ok]),)
+                )
+            resultado["qtd"] += len(ok)
+            if tabela == "agenda" and slots is not None:
+                # os restaurados voltam ao índice já: quem agenda entre um lote e outro vê o horário ocupado
+                for rid, data, hora, servico, profissional in ok:
+                    slots.adicionar(profissional, date.fromisoformat(data), hora, duracao_servico(servico), rid)
+            time.sleep(0)
+    except Exception:
+        if slots is not None:
+            slots.descartar()
+        raise
+    return resultado
+
+def exclusoes_recentes(database, tabela: str, prazo: int = EXCLUSAO_DESFAZER, n: int = 5):
+    # as últimas exclusões da tabela que ainda podem ser desfeitas (de qualquer sessão)
+    with database.reader() as conn:
+        rows = conn.execute(
+            "SELECT id, qtd, criada_em FROM exclusoes "
+            "WHERE tabela = ? AND desfeita_em IS NULL AND purgada_em IS NULL AND qtd > 0 "
+            "AND criada_em >= datetime('now', 'localtime', ?) ORDER BY id DESC LIMIT ?",
+            (_tabela(tabela), f"-{int(prazo)} seconds", n)
+        ).fetchall()
+    return [{"id": i, "qtd": q, "criada_em": c} for i, q, c in rows]
+
+def purgar(database, prazo: int = EXCLUSAO_DESFAZER, lote: int = EXCLUSAO_LOTE) -> int:
+    # apaga de vez as linhas das exclusões vencidas ou desfeitas (as que sobraram por conflito);
+    # devolve quantas linhas saíram
+    with database.reader() as conn:
+        pendentes = conn.execute(
+            "SELECT id, tabela FROM exclusoes WHERE purgada_em IS NULL "
+            "AND (desfeita_em IS NOT NULL OR criada_em <= datetime('now', 'localtime', ?)) ORDER BY id",
+            (f"-{int(prazo)} seconds",)
+        ).fetchall()
+    total = 0
+    for exclusao_id, tabela in pendentes:
+        while True:
+            with database.writer() as conn:
+                n = conn.execute(
+                    f"DELETE FROM {tabela} WHERE id IN (SELECT id FROM {tabela} WHERE exclusao_id = ? LIMIT ?)",
+                    (exclusao_id, lote)
+                ).rowcount
+                if n < lote:
+                    conn.execute(
+                        "UPDATE exclusoes SET purgada_em = datetime('now', 'localtime') WHERE id = ?", (exclusao_id,)
+                    )
+            total += n
+            if n < lote:
+                break
+            time.sleep(0)
+    return total
+
+class PurgaExclusoes:
+    # uma thread por banco e processo, como o robô de lembretes
+    def __init__(self, database, intervalo: int = EXCLUSAO_PURGA_INTERVALO, prazo: int = EXCLUSAO_DESFAZER):
+        self.db = database
+        self.intervalo = intervalo
+        self.prazo = prazo
+        self.ultima_execucao = None
+        self.ultimas_purgadas = 0
+        self.ultimo_erro = None
+        self._thread = threading.Thread(target=self._loop, name="artmax-purga", daemon=True)
+        self._thread.start()
+
+    def _loop(self):
+        while True:
+            try:
+                self.ultimas_purgadas = purgar(self.db, self.prazo)
+                self.ultima_execucao = datetime.now()
+                self.ultimo_erro = None
+            except Exception as e:
+                self.ultimo_erro = str(e)
+            time.sleep(self.intervalo)
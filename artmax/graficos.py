@@ -0,0 +1,144 @@
+import threading
+from collections import OrderedDict
+
+from .datas import MESES_PT
+from .relatorios import (
+    BI_AGRUPAMENTOS_TEMPO, bi_agrupado, bi_ano_a_ano, bi_serie_diaria, bi_gastos_por_descricao,
+)
+
+# =========================================================
+# GRÁFICOS DO BI (figuras memorizadas por período + versão dos dados)
+# =========================================================
+# Montar a figura no plotly.express custa mais que a consulta (que já vem do
+# cache de leituras). Aqui cada figura é montada uma vez por (gráfico, período,
+# agrupamento, versão de vendas/gastos) e reaproveitada por todas as sessões até
+# alguém gravar. O tema é enxuto (sem o template padrão do plotly, que sozinho
+# tem ~10 KB de JSON) e os valores vão arredondados: menos JSON a cada envio.
+GRAFICOS_MAX = 64  # figuras guardadas (LRU)
+GRAFICOS_FATIAS = 8  # despesas: as maiores categorias; o resto vira "Outras"
+GRAFICO_CONFIG = {"displayModeBar": False, "responsive": True}
+
+def versao_bi(database):
+    # muda a cada escrita em vendas/gastos, de qualquer processo (triggers em versao_dados)
+    with database.reader() as conn:
+        versoes = dict(conn.execute(
+            "SELECT tabela, versao FROM versao_dados WHERE tabela IN ('vendas', 'gastos')"
+        ).fetchall())
+    return versoes.get("vendas", 0), versoes.get("gastos", 0)
+
+# ---------- construção (plotly só é importado aqui) ----------
+def _fig_detalhe(px, tema, ler, ini, fim, agrupamento):
+    df = bi_agrupado(ler, ini, fim, agrupamento).round(2)
+    if df.empty:
+        return None
+    if agrupamento in BI_AGRUPAMENTOS_TEMPO:
+        return px.line(df, x="grupo", y=["vendas", "lucro"], markers=True,
+                       title=f"Faturamento e lucro por {agrupamento.lower()}", template=tema)
+    return px.bar(df, x="grupo", y="vendas", title=f"Faturamento por {agrupamento.lower()}", template=tema)
+
+def _fig_ano_a_ano(px, tema, ler, ini, fim, _):
+    df = bi_ano_a_ano(ler, ini, fim).round(2)
+    if df.empty:
+        return None
+    df["mes"] = df["mes"].map(lambda m: MESES_PT[int(m) - 1])
+    return px.bar(df, x="mes", y=["vendas_atual", "vendas_anterior"], barmode="group",
+                  title="Faturamento por mês", template=tema)
+
+def _fig_diaria(px, tema, ler, ini, fim, _):
+    import pandas as pd
+
+    df = bi_serie_diaria(ler, ini, fim)
+    if df.empty:
+        return None
+    # dias sem movimento entram como zero para a média móvel não pular
+    dias = pd.date_range(ini, fim, inclusive="left").strftime("%Y-%m-%d")
+    df = df.set_index("data").reindex(dias, fill_value=0).rename_axis("data").reset_index()
+    df["media_7_dias"] = df["vendas"].rolling(7, min_periods=1).mean()
+    fig = px.bar(df.round(2), x="data", y="vendas", title="Faturamento diário", template=tema)
+    fig.add_scatter(x=df["data"], y=df["media_7_dias"].round(2), mode="lines", name="média 7 dias")
+    return fig
+
+def _fig_servicos(px, tema, ler, ini, fim, _):
+    df = bi_agrupado(ler, ini, fim, "Serviço").round(2)
+    if df.empty:
+        return None
+    return px.pie(df, names="grupo", values="vendas", hole=0.55, title="Mix de serviços (faturamento)",
+                  template=tema)
+
+def _fig_gastos(px, tema, ler, ini, fim, _):
+    df = bi_gastos_por_descricao(ler, ini, fim)
+    if df.empty:
+        return None
+    if len(df) > GRAFICOS_FATIAS:
+        resto = df.iloc[GRAFICOS_FATIAS - 1:]
+        df = df.iloc[:GRAFICOS_FATIAS - 1].copy()
+        df.loc[len(df)] = ["Outras", resto["lancamentos"].sum(), resto["valor"].sum()]
+    return px.bar(df.round(2), x="valor", y="descricao", orientation="h", title="Despesas por descrição",
+                  template=tema)
+
+GRAFICOS = {
+    "detalhe": _fig_detalhe,
+    "ano_a_ano": _fig_ano_a_ano,
+    "diaria": _fig_diaria,
+    "servicos": _fig_servicos,
+    "gastos": _fig_gastos,
+}
+# rótulo na tela -> gráfico (além do detalhe e do ano x ano)
+BI_GRAFICOS_EXTRAS = {
+    "Faturamento diário": "diaria",
+    "Mix de serviços": "servicos",
+    "Despesas": "gastos",
+}
+
+class Graficos:
+    def __init__(self, cores, texto: str, grade: str, maxsize: int = GRAFICOS_MAX):
+        self.cores = list(cores)
+        self.texto = texto
+        self.grade = grade
+        self.maxsize = maxsize
+        self._figs = OrderedDict()
+        self._lock = threading.Lock()
+        self._tema = None
+        self.hits = 0
+        self.misses = 0
+
+    def tema(self):
+        if self._tema is None:
+            import plotly.graph_objects as go
+
+            eixo = dict(gridcolor=self.grade, zeroline=False, title=None)
+            self._tema = go.layout.Template(layout=dict(
+                colorway=self.cores,
+                font=dict(color=self.texto, size=12),
+                paper_bgcolor="rgba(0,0,0,0)",
+                plot_bgcolor="rgba(0,0,0,0)",
+                xaxis=eixo,
+                yaxis=eixo,
+                margin=dict(l=8, r=8, t=40, b=8),
+                legend=dict(orientation="h", y=-0.15, title=None),
+            ))
+        return self._tema
+
+    def figura(self, nome: str, ler, ini, fim, versao, agrupamento: str = None):
+        # None quando não há dados no período; a figura é compartilhada: não alterar
+        chave = (nome, ini, fim, agrupamento, versao)
+        with self._lock:
+            if chave in self._figs:
+                self._figs.move_to_end(chave)
+                self.hits += 1
+                return self._figs[chave]
+            self.misses += 1
+
+        import plotly.express as px
+
+        fig = GRAFICOS[nome](px, self.tema(), ler, ini, fim, agrupamento)
+
+        with self._lock:
+            self._figs[chave] = fig
+            while len(self._figs) > self.maxsize:
+                self._figs.popitem(last=False)
+        return fig
+
+    def clear(self):
+        with self._lock:
+            self._figs.clear()
@@ -0,0 +1,316 @@
+import csv
+import hashlib
+import io
+import math
+import os
+import re
+import time
+import zipfile
+from datetime import date
+
+from .clientes import sem_acento
+from .db import normalizar_telefone, upsert_cliente, ativos
+from .vendas import tabela_comissao
+
+# =========================================================
+# IMPORTAÇÃO EM LOTE (CSVs no formato do backup)
+# =========================================================
+# Lê o CSV em streaming, valida/normaliza cada linha e grava IMPORT_LOTE linhas
+# por transação com executemany. Cada linha vira uma chave (sha1 do conteúdo
+# normalizado + id de origem ou nº de ocorrência) guardada em `importacoes`:
+# reimportar o mesmo arquivo, ou um backup deste mesmo banco, não duplica nada.
+IMPORT_LOTE = 5000
+IMPORT_ERROS_GUARDADOS = 200  # os demais erros só entram na contagem
+
+# colunas aceitas no cabeçalho (sem acento, minúsculas) -> coluna da tabela
+IMPORT_ALIASES = {
+    "id": "id",
+    "data": "data",
+    "hora": "hora",
+    "horario": "hora",
+    "cliente": "cliente",
+    "nome": "cliente",
+    "telefone": "telefone",
+    "whatsapp": "telefone",
+    "servico": "servico",
+    "procedimento": "servico",
+    "profissional": "profissional",
+    "valor": "valor",
+    "comissao": "comissao",
+    "descricao": "descricao",
+}
+
+# colunas obrigatórias e colunas que identificam a linha (dedup) por tabela
+IMPORT_TABELAS = {
+    "agenda": (("data", "hora", "cliente"), ("data", "hora", "cliente", "telefone", "servico", "profissional")),
+    "vendas": (("data", "cliente", "valor"), ("data", "cliente", "valor", "servico", "profissional")),
+    "gastos": (("data", "descricao", "valor"), ("data", "descricao", "valor")),
+}
+
+# =========================================================
+# Normalização de campos
+# =========================================================
+_RE_DATA_BR = re.compile(r"(\d{1,2})/(\d{1,2})/(\d{2}|\d{4})")
+_RE_HORA = re.compile(r"(\d{1,2})[:h](\d{2})(?::\d{2})?")
+
+def normalizar_data(v: str) -> str:
+    v = (v or "").strip()
+    try:
+        if len(v) >= 10 and v[4] == "-":
+            return date.fromisoformat(v[:10]).isoformat()
+        m = _RE_DATA_BR.fullmatch(v)
+        if m:
+            d, mes, ano = int(m[1]), int(m[2]), int(m[3])
+            return date(ano + 2000 if ano < 100 else ano, mes, d).isoformat()
+    except ValueError:
+        pass
+    raise ValueError(f"data inválida: {v!r}")
+
+def normalizar_hora(v: str) -> str:
+    m = _RE_HORA.fullmatch((v or "").strip())
+    if not m or int(m[1]) > 23 or int(m[2]) > 59:
+        raise ValueError(f"horário inválido: {v!r}")
+    return f"{int(m[1]):02d}:{m[2]}"
+
+def normalizar_valor(v: str) -> float:
+    # aceita 80 / 80.5 / 80,50 / 1.234,56 / R$ 80,00
+    s = (v or "").strip().replace("R$", "").replace(" ", "")
+    if "," in s:
+        s = s.replace(".", "").replace(",", ".")
+    try:
+        x = float(s)
+    except ValueError:
+        raise ValueError(f"valor inválido: {v!r}") from None
+    if x < 0 or not math.isfinite(x):
+        raise ValueError(f"valor inválido: {v!r}")
+    return round(x, 2)
+
+def _normalizar_linha(tabela: str, r: dict) -> dict:
+    obrigatorias, _ = IMPORT_TABELAS[tabela]
+    for col in obrigatorias:
+        if not (r.get(col) or "").strip():
+            raise ValueError(f"campo '{col}' vazio")
+
+    out = {"data": normalizar_data(r["data"])}
+    if tabela == "gastos":
+        out["descricao"] = r["descricao"].strip()
+        out["valor"] = normalizar_valor(r["valor"])
+        return out
+
+    out["cliente"] = " ".join(r["cliente"].split())
+    out["servico"] = (r.get("servico") or "").strip()
+    out["profissional"] = (r.get("profissional") or "").strip()
+    if tabela == "agenda":
+        out["hora"] = normalizar_hora(r["hora"])
+        tel = (r.get("telefone") or "").strip()
+        out["telefone"] = normalizar_telefone(tel) or tel
+    else:
+        out["valor"] = normalizar_valor(r["valor"])
+        com = (r.get("comissao") or "").strip()
+        out["comissao"] = normalizar_valor(com) if com else None
+    return out
+
+def _chave(tabela: str, linha: dict, origem_id=None) -> str:
+    _, identidade = IMPORT_TABELAS[tabela]
+    partes = [tabela, str(origem_id or "")] + [str(linha.get(c, "")) for c in identidade]
+    return hashlib.sha1("\x1f".join(partes).encode("utf-8")).hexdigest()
+
+# =========================================================
+# Leitura
+# =========================================================
+def detectar_tabela(colunas, nome_arquivo: str = "") -> str:
+    base = os.path.basename(nome_arquivo).lower()
+    for tabela in IMPORT_TABELAS:
+        if base.startswith(tabela):
+            return tabela
+    colunas = set(colunas)
+    if "descricao" in colunas:
+        return "gastos"
+    if "hora" in colunas:
+        return "agenda"
+    if "valor" in colunas:
+        return "vendas"
+    raise ValueError(f"não foi possível identificar a tabela de {nome_arquivo or 'arquivo'}: colunas {sorted(colunas)}")
+
+def _leitor_csv(fh):
+    # planilhas brasileiras costumam sair com ';'
+    amostra = fh.read(4096)
+    fh.seek(0)
+    try:
+        dialeto = csv.Sniffer().sniff(amostra, delimiters=",;\t")
+    except csv.Error:
+        dialeto = csv.excel
+    leitor = csv.reader(fh, dialeto)
+    cabecalho = next(leitor, None) or []
+    colunas = [IMPORT_ALIASES.get(sem_acento(c.strip()), sem_acento(c.strip())) for c in cabecalho]
+    return colunas, leitor
+
+# =========================================================
+# Gravação
+# =========================================================
+class _Clientes:
+    # upsert_cliente memorizado: cada cliente do arquivo custa uma ida ao banco, não uma por linha
+    def __init__(self):
+        self._ids = {}
+
+    def id(self, conn, nome: str, telefone=None) -> int:
+        chave = normalizar_telefone(telefone) or nome.lower()
+        if chave not in self._ids:
+            self._ids[chave] = upsert_cliente(conn, nome, telefone)
+        return self._ids[chave]
+
+def _ja_existem(conn, tabela: str, candidatos):
+    # linhas com id de origem que já estão neste banco com o mesmo conteúdo (backup do próprio banco)
+    _, identidade = IMPORT_TABELAS[tabela]
+    ids = [c[1] for c in candidatos if c[1] is not None]
+    existentes = {}
+    for i in range(0, len(ids), 500):
+        parte = ids[i:i + 500]
+        for row in conn.execute(
+            f"SELECT id, {', '.join(identidade)} FROM {tabela} "
+            f"WHERE id IN ({','.join(['?'] * len(parte))}) AND {ativos(tabela)}", parte
+        ):
+            try:
+                existentes[row[0]] = _normalizar_linha(tabela, dict(zip(identidade, (
+                    "" if v is None else str(v) for v in row[1:]
+                ))))
+            except ValueError:
+                pass
+    return {
+        n for n, (_, origem_id, linha, _) in enumerate(candidatos)
+        if origem_id in existentes and all(existentes[origem_id].get(c) == linha.get(c) for c in identidade)
+    }
+
+def _gravar_lote(database, tabela: str, candidatos, clientes: _Clientes, comissao):
+    # candidatos: [(chave, origem_id, linha normalizada, nº da linha)]; devolve (inseridas, duplicadas)
+    with database.writer() as conn:
+        chaves = [c[0] for c in candidatos]
+        vistas = set()
+        for i in range(0, len(chaves), 500):
+            parte = chaves[i:i + 500]
+            vistas.update(r[0] for r in conn.execute(
+                f"SELECT chave FROM importacoes WHERE chave IN ({','.join(['?'] * len(parte))})", parte
+            ))
+        presentes = _ja_existem(conn, tabela, candidatos)
+
+        novas = []
+        for n, (chave, _, linha, _) in enumerate(candidatos):
+            if chave in vistas or n in presentes:
+                continue
+            if tabela == "agenda":
+                cid = clientes.id(conn, linha["cliente"], linha["telefone"])
+                novas.append((linha["data"], linha["hora"], linha["cliente"], linha["telefone"],
+                              linha["servico"], linha["profissional"], cid))
+            elif tabela == "vendas":
+                cid = clientes.id(conn, linha["cliente"])
+                com = linha["comissao"]
+                if com is None:
+                    com = comissao(linha["profissional"], linha["servico"], linha["valor"], linha["data"])
+                novas.append((linha["data"], linha["cliente"], linha["valor"], linha["servico"],
+                              linha["profissional"], com, cid))
+            else:
+                novas.append((linha["data"], linha["descricao"], linha["valor"]))
+
+        if tabela == "agenda":
+            conn.executemany(
+                "INSERT INTO agenda (data, hora, cliente, telefone, servico, profissional, cliente_id) "
+                "VALUES (?,?,?,?,?,?,?)", novas
+            )
+        elif tabela == "vendas":
+            conn.executemany(
+                "INSERT INTO vendas (data, cliente, valor, servico, profissional, comissao, cliente_id) "
+                "VALUES (?,?,?,?,?,?,?)", novas
+            )
+        else:
+            conn.executemany("INSERT INTO gastos (data, descricao, valor) VALUES (?,?,?)", novas)
+
+        conn.executemany(
+            "INSERT OR IGNORE INTO importacoes (chave, tabela) VALUES (?, ?)",
+            [(chave, tabela) for chave in chaves]
+        )
+    return len(novas), len(candidatos) - len(novas)
+
+def importar_csv(database, fh, nome_arquivo: str = "", tabela: str = None, lote: int = IMPORT_LOTE, progresso=None):
+    # fh: arquivo texto (utf-8-sig, newline=""). progresso(linhas_lidas) a cada lote.
+    colunas, leitor = _leitor_csv(fh)
+    tabela = tabela or detectar_tabela(colunas, nome_arquivo)
+    if tabela not in IMPORT_TABELAS:
+        raise ValueError(f"tabela desconhecida: {tabela!r}")
+    faltando = [c for c in IMPORT_TABELAS[tabela][0] if c not in colunas]
+    if faltando:
+        raise ValueError(f"{nome_arquivo or 'arquivo'}: faltam as colunas {', '.join(faltando)}")
+
+    with database.reader() as conn:
+        comissao = tabela_comissao(conn)
+    clientes = _Clientes()
+    i_id = colunas.index("id") if "id" in colunas else None
+    ocorrencias = {}  # sem id de origem: nº de vezes que o mesmo conteúdo já apareceu no arquivo
+
+    res = {"arquivo": nome_arquivo, "tabela": tabela, "lidas": 0, "inseridas": 0, "duplicadas": 0,
+           "invalidas": 0, "erros": []}
+    t0 = time.perf_counter()
+    candidatos = []
+
+    def _descarregar():
+        inseridas, duplicadas = _gravar_lote(database, tabela, candidatos, clientes, comissao)
+        res["inseridas"] += inseridas
+        res["duplicadas"] += duplicadas
+        candidatos.clear()
+        if progresso:
+            progresso(res["lidas"])
+
+    for n, valores in enumerate(leitor, start=2):  # linha 1 = cabeçalho
+        if not any(v.strip() for v in valores):
+            continue
+        res["lidas"] += 1
+        try:
+            linha = _normalizar_linha(tabela, dict(zip(colunas, valores)))
+            origem_id = None
+            if i_id is not None and i_id < len(valores):
+                bruto = valores[i_id].strip()
+                origem_id = int(bruto) if bruto.isdigit() else None
+        except ValueError as e:
+            res["invalidas"] += 1
+            if len(res["erros"]) < IMPORT_ERROS_GUARDADOS:
+                res["erros"].append((n, str(e)))
+            continue
+
+        chave = _chave(tabela, linha, origem_id)
+        if origem_id is None:
+            # duas vendas iguais no mesmo dia são legítimas: a 2ª ocorrência ganha outra chave
+            ocorrencia = ocorrencias.get(chave, 0)
+            ocorrencias[chave] = ocorrencia + 1
+            if ocorrencia:
+                chave = f"{chave}:{ocorrencia}"
+        candidatos.append((chave, origem_id, linha, n))
+        if len(candidatos) >= lote:
+            _descarregar()
+    if candidatos:
+        _descarregar()
+
+    res["segundos"] = round(time.perf_counter() - t0, 3)
+    res["por_segundo"] = round(res["lidas"] / res["segundos"]) if res["segundos"] else None
+    return res
+
+def importar_arquivo(database, fonte, tabela: str = None, lote: int = IMPORT_LOTE, progresso=None):
+    # fonte: caminho ou arquivo binário (upload da tela) de um .csv ou do .zip gerado pela
+    # tela de Backup (um CSV por tabela); devolve um resultado por CSV
+    nome = os.path.basename(fonte if isinstance(fonte, str) else getattr(fonte, "name", ""))
+    if zipfile.is_zipfile(fonte):
+        resultados = []
+        with zipfile.ZipFile(fonte) as zf:
+            for membro in sorted(zf.namelist()):
+                if not membro.lower().endswith(".csv"):
+                    continue
+                with zf.open(membro) as raw, io.TextIOWrapper(raw, encoding="utf-8-sig", newline="") as fh:
+                    resultados.append(importar_csv(database, fh, membro, tabela, lote, progresso))
+        return resultados
+    if isinstance(fonte, str):
+        with open(fonte, encoding="utf-8-sig", newline="") as fh:
+            return [importar_csv(database, fh, nome, tabela, lote, progresso)]
+    fonte.seek(0)
+    fh = io.TextIOWrapper(fonte, encoding="utf-8-sig", newline="")
+    try:
+        return [importar_csv(database, fh, nome, tabela, lote, progresso)]
+    finally:
+        fh.detach()  # o arquivo é de quem chamou
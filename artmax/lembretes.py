@@ -0,0 +1,93 @@
+import threading
+import time
+from datetime import date, datetime
+
+from .whatsapp import build_whatsapp_link
+
+# =========================================================
+# ROBÔ DE LEMBRETES: fila do dia montada em segundo plano
+# =========================================================
+LEMBRETES_INTERVALO = 60  # segundos entre varreduras da agenda do dia
+
+def gerar_lembretes(database, dia: date = None) -> int:
+    dia = dia or date.today()
+
+    # só os agendamentos do dia ainda sem lembrete (índice (data, hora) + PK de lembretes)
+    with database.reader() as conn:
+        rows = conn.execute(
+            """
+            SELECT a.id, a.data, a.hora, a.cliente, a.telefone, a.servico, a.profissional
+            FROM agenda a
+            LEFT JOIN lembretes l ON l.agenda_id = a.id
+            WHERE a.data = ? AND a.exclusao_id IS NULL AND l.agenda_id IS NULL
+            ORDER BY a.hora
+            """,
+            (dia.isoformat(),)
+        ).fetchall()
+
+    novos = []
+    for agenda_id, data, hora, cliente, telefone, servico, profissional in rows:
+        link = build_whatsapp_link(cliente, telefone, servico, hora, "lembrete")
+        novos.append((
+            agenda_id, data, hora, cliente, servico, profissional, link,
+            "pendente" if link else "sem_telefone"
+        ))
+
+    if novos:
+        with database.writer() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO lembretes "
+                "(agenda_id, data, hora, cliente, servico, profissional, link, status) "
+                "VALUES (?,?,?,?,?,?,?,?)",
+                novos
+            )
+
+    return len(novos)
+
+class ReminderScheduler:
+    def __init__(self, database, cache=None, intervalo: int = LEMBRETES_INTERVALO):
+        self.db = database
+        self.cache = cache
+        self.intervalo = intervalo
+        self.ultima_execucao = None
+        self.ultima_duracao = 0.0
+        self.ultimos_gerados = 0
+        self.ultimo_erro = None
+        self._acordar = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="artmax-lembretes", daemon=True)
+        self._thread.start()
+
+    def _loop(self):
+        while True:
+            try:
+                self.executar()
+                self.ultimo_erro = None
+            except Exception as e:
+                self.ultimo_erro = str(e)
+            self._acordar.wait(self.intervalo)
+            self._acordar.clear()
+
+    def acordar(self):
+        # agendamento novo para hoje: não espera a próxima varredura
+        self._acordar.set()
+
+    def executar(self, dia: date = None) -> int:
+        t0 = time.perf_counter()
+        n = gerar_lembretes(self.db, dia)
+        if n and self.cache is not None:
+            self.cache.invalidate("lembretes")
+
+        self.ultima_execucao = datetime.now()
+        self.ultima_duracao = time.perf_counter() - t0
+        self.ultimos_gerados = n
+        return n
+
+    def marcar_enviados(self, agenda_ids):
+        with self.db.writer() as conn:
+            conn.executemany(
+                "UPDATE lembretes SET status = 'enviado', enviado_em = datetime('now', 'localtime') "
+                "WHERE agenda_id = ? AND status = 'pendente'",
+                [(int(i),) for i in agenda_ids]
+            )
+        if self.cache is not None:
+            self.cache.invalidate("lembretes")
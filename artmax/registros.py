@@ -0,0 +1,54 @@
+from typing import NamedTuple
+
+# =========================================================
+# REGISTROS (linhas tipadas direto do cursor, sem pandas)
+# =========================================================
+# Listas que a tela só percorre para montar rótulos (multiselects de exclusão)
+# não precisam de DataFrame: cada linha do sqlite3 vira uma tupla nomeada, sem
+# __dict__ e sem o Series que o iterrows monta por linha. DataFrame continua
+# onde é tabela ou gráfico (no pandas 3 as colunas de texto já são Arrow).
+# Os campos seguem a ordem das colunas: SELECT {colunas(Venda)} FROM vendas ...
+class Agendamento(NamedTuple):
+    id: int
+    data: str
+    hora: str
+    cliente: str
+    telefone: str
+    servico: str
+    profissional: str
+    cliente_id: int
+
+    def rotulo(self) -> str:
+        return f"ID {self.id} • {self.data} {self.hora} • {self.cliente} • {self.servico} • {self.profissional}"
+
+class Venda(NamedTuple):
+    id: int
+    data: str
+    cliente: str
+    valor: float
+    servico: str
+    profissional: str
+    comissao: float
+    cliente_id: int
+
+    def rotulo(self) -> str:
+        return (f"ID {self.id} • {self.data} • {self.cliente} • {self.servico} • {self.profissional} • "
+                f"R$ {float(self.valor or 0):.2f}")
+
+class Gasto(NamedTuple):
+    id: int
+    data: str
+    descricao: str
+    valor: float
+
+    def rotulo(self) -> str:
+        return f"ID {self.id} • {self.data} • {self.descricao} • R$ {float(self.valor or 0):.2f}"
+
+REGISTROS = {"agenda": Agendamento, "vendas": Venda, "gastos": Gasto}
+
+def colunas(modelo) -> str:
+    return ", ".join(modelo._fields)
+
+def ler_registros(conn, modelo, sql: str, params=()):
+    # lista de `modelo`; o SELECT precisa trazer as colunas na ordem dos campos
+    return list(map(modelo._make, conn.execute(sql, list(params))))
@@ -0,0 +1,192 @@
+from datetime import date
+
+from .datas import date_iso, ano_anterior, ym_do_periodo
+from .diagnostico import medido
+from .unidades import por_unidade, somar, somar_totais
+
+# =========================================================
+# RELATÓRIOS: agregações por período direto nas tabelas de resumo
+# =========================================================
+# Todas recebem ler(tabela, ym, sql, params) -> DataFrame (ver cache.leitor):
+# no app, com o cache de leituras; no CLI, direto do banco. Com um
+# unidades.Consolidado no lugar do ler, rodam em todas as unidades e juntam os
+# resultados pela regra do @por_unidade.
+BI_PERIODOS = ["Mês selecionado", "Intervalo de datas", "Últimos 12 meses", "Ano x ano anterior"]
+
+# expressão SQL de cada agrupamento; semana = segunda-feira da semana
+BI_AGRUPAMENTOS = {
+    "Profissional": "profissional",
+    "Serviço": "servico",
+    "Semana": "date(data, 'weekday 0', '-6 days')",
+    "Mês": "substr(data, 1, 7)",
+}
+BI_AGRUPAMENTOS_TEMPO = ("Semana", "Mês")
+
+@medido("relatório")
+@por_unidade(somar_totais)
+def bi_totais(ler, ini: date, fim: date):
+    df = ler(
+        "bi", ym_do_periodo(ini, fim),
+        """
+        SELECT
+            COALESCE((SELECT SUM(valor) FROM resumo_vendas WHERE data >= ? AND data < ?), 0) AS vendas,
+            COALESCE((SELECT SUM(comissao) FROM resumo_vendas WHERE data >= ? AND data < ?), 0) AS comissao,
+            COALESCE((SELECT SUM(valor) FROM resumo_gastos WHERE data >= ? AND data < ?), 0) AS gastos
+        """,
+        [date_iso(ini), date_iso(fim)] * 3
+    )
+    t = {k: float(df[k].iloc[0]) for k in ("vendas", "comissao", "gastos")}
+    t["lucro"] = t["vendas"] - t["comissao"] - t["gastos"]
+    return t
+
+def _juntar_agrupado(partes, ini, fim, agrupamento):
+    if agrupamento in BI_AGRUPAMENTOS_TEMPO:
+        return somar("grupo")(partes)
+    return somar("grupo", "vendas", decrescente=True)(partes)
+
+@medido("relatório")
+@por_unidade(_juntar_agrupado)
+def bi_agrupado(ler, ini: date, fim: date, agrupamento: str):
+    expr = BI_AGRUPAMENTOS[agrupamento]
+    params = [date_iso(ini), date_iso(fim)]
+    if agrupamento not in BI_AGRUPAMENTOS_TEMPO:
+        # despesas não têm profissional/serviço: só vendas e comissão
+        return ler(
+            "bi", ym_do_periodo(ini, fim),
+            f"""
+            SELECT {expr} AS grupo, SUM(qtd) AS atendimentos, SUM(valor) AS vendas, SUM(comissao) AS comissao,
+                   SUM(valor) - SUM(comissao) AS liquido
+            FROM resumo_vendas
+            WHERE data >= ? AND data < ?
+            GROUP BY grupo
+            ORDER BY vendas DESC
+            """,
+            params
+        )
+    return ler(
+        "bi", ym_do_periodo(ini, fim),
+        f"""
+        SELECT grupo, SUM(atendimentos) AS atendimentos, SUM(vendas) AS vendas, SUM(comissao) AS comissao,
+               SUM(gastos) AS gastos, SUM(vendas) - SUM(comissao) - SUM(gastos) AS lucro
+        FROM (
+            SELECT {expr} AS grupo, qtd AS atendimentos, valor AS vendas, comissao, 0 AS gastos
+            FROM resumo_vendas WHERE data >= ? AND data < ?
+            UNION ALL
+            SELECT {expr}, 0, 0, 0, valor
+            FROM resumo_gastos WHERE data >= ? AND data < ?
+        )
+        GROUP BY grupo
+        ORDER BY grupo
+        """,
+        params * 2
+    )
+
+@medido("relatório")
+@por_unidade(somar("mes"))
+def bi_ano_a_ano(ler, ini: date, fim: date):
+    # faturamento e lucro por mês do período contra os mesmos meses do ano anterior
+    ini_ant, fim_ant = ano_anterior(ini), ano_anterior(fim)
+    return ler(
+        "bi", None,
+        """
+        SELECT mes,
+               SUM(CASE WHEN atual THEN vendas ELSE 0 END) AS vendas_atual,
+               SUM(CASE WHEN atual THEN 0 ELSE vendas END) AS vendas_anterior,
+               SUM(CASE WHEN atual THEN lucro ELSE 0 END) AS lucro_atual,
+               SUM(CASE WHEN atual THEN 0 ELSE lucro END) AS lucro_anterior
+        FROM (
+            SELECT substr(data, 6, 2) AS mes, data >= ? AS atual, valor AS vendas, valor - comissao AS lucro
+            FROM resumo_vendas WHERE (data >= ? AND data < ?) OR (data >= ? AND data < ?)
+            UNION ALL
+            SELECT substr(data, 6, 2), data >= ?, 0, -valor
+            FROM resumo_gastos WHERE (data >= ? AND data < ?) OR (data >= ? AND data < ?)
+        )
+        GROUP BY mes
+        ORDER BY mes
+        """,
+        [date_iso(ini), date_iso(ini), date_iso(fim), date_iso(ini_ant), date_iso(fim_ant)] * 2
+    )
+
+@medido("relatório")
+@por_unidade(somar("data"))
+def bi_serie_diaria(ler, ini: date, fim: date):
+    # faturamento e despesas por dia (só dias com movimento)
+    return ler(
+        "bi", ym_do_periodo(ini, fim),
+        """
+        SELECT data, SUM(vendas) AS vendas, SUM(gastos) AS gastos
+        FROM (
+            SELECT data, valor AS vendas, 0 AS gastos FROM resumo_vendas WHERE data >= ? AND data < ?
+            UNION ALL
+            SELECT data, 0, valor FROM resumo_gastos WHERE data >= ? AND data < ?
+        )
+        GROUP BY data
+        ORDER BY data
+        """,
+        [date_iso(ini), date_iso(fim)] * 2
+    )
+
+@medido("relatório")
+@por_unidade(somar("descricao", "valor", decrescente=True))
+def bi_gastos_por_descricao(ler, ini: date, fim: date):
+    return ler(
+        "bi", ym_do_periodo(ini, fim),
+        """
+        SELECT descricao, SUM(qtd) AS lancamentos, SUM(valor) AS valor
+        FROM resumo_gastos
+        WHERE data >= ? AND data < ?
+        GROUP BY descricao
+        ORDER BY valor DESC
+        """,
+        [date_iso(ini), date_iso(fim)]
+    )
+
+@medido("relatório")
+@por_unidade(lambda partes, padrao: min(partes.values()))
+def primeiro_ano_com_dados(ler, padrao: int) -> int:
+    df = ler(
+        "bi", None,
+        """
+        SELECT MIN(d) AS primeira FROM (
+            SELECT MIN(data) AS d FROM resumo_vendas
+            UNION ALL SELECT MIN(data) FROM resumo_gastos
+        )
+        """
+    )
+    primeira = df["primeira"].iloc[0]
+    return min(int(primeira[:4]), padrao) if isinstance(primeira, str) else padrao
+
+@medido("relatório")
+@por_unidade(somar("profissional"))
+def vendas_por_profissional(ler, ini: date, fim: date):
+    return ler(
+        "vendas", ym_do_periodo(ini, fim),
+        """
+        SELECT profissional, SUM(valor) AS vendas, SUM(comissao) AS comissao
+        FROM resumo_vendas
+        WHERE data >= ? AND data < ?
+        GROUP BY profissional
+        ORDER BY profissional
+        """,
+        [date_iso(ini), date_iso(fim)]
+    )
+
+def _juntar_ultimas(partes, ini, fim, n: int = 25):
+    # as n mais recentes entre todas as unidades, com a unidade de cada uma
+    import pandas as pd
+
+    com_dados = [df.assign(unidade=nome) for nome, df in partes.items() if not df.empty]
+    if not com_dados:
+        return next(iter(partes.values()))
+    df = pd.concat(com_dados, ignore_index=True)
+    return df.sort_values(["data", "id"], ascending=False, ignore_index=True).head(n)
+
+@medido("relatório")
+@por_unidade(_juntar_ultimas)
+def ultimas_vendas(ler, ini: date, fim: date, n: int = 25):
+    return ler(
+        "vendas", ym_do_periodo(ini, fim),
+        "SELECT id, data, cliente, valor, servico, profissional, comissao, cliente_id FROM vendas "
+        "WHERE data >= ? AND data < ? AND exclusao_id IS NULL ORDER BY data DESC, id DESC LIMIT ?",
+        [date_iso(ini), date_iso(fim), n]
+    )
@@ -0,0 +1,193 @@
+import threading
+import time
+
+from .datas import month_range, date_iso
+from .db import ativos, colunas_visiveis
+from .diagnostico import DIAG
+
+# =========================================================
+# Google Sheets: export mês
+# =========================================================
+# Roda fora da thread da requisição: envia em lotes, tenta de novo com espera
+# crescente em erros temporários e, no modo incremental, só acrescenta as linhas
+# com id maior que o último enviado. O cliente (gspread ou o falso de tests/fake_gspread.py) é injetado.
+SHEETS_ABAS = [("agenda", "Agenda"), ("vendas", "Vendas"), ("gastos", "Gastos")]
+SHEETS_LOTE = 500
+SHEETS_TENTATIVAS = 5
+SHEETS_ERROS_TEMPORARIOS = (429, 500, 502, 503, 504)
+
+def sheets_client(credenciais: dict):
+    # credenciais: a service account (no app, st.secrets["gcp_service_account"])
+    import gspread
+    from google.oauth2.service_account import Credentials
+
+    scopes = [
+        "https://www.googleapis.com/auth/spreadsheets",
+        "https://www.googleapis.com/auth/drive"
+    ]
+    creds = Credentials.from_service_account_info(credenciais, scopes=scopes)
+    return gspread.authorize(creds)
+
+def _com_retry(fn, *args, **kwargs):
+    for tentativa in range(SHEETS_TENTATIVAS):
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            status = getattr(getattr(e, "response", None), "status_code", None)
+            # erros de rede (requests.RequestException) herdam de OSError
+            temporario = status in SHEETS_ERROS_TEMPORARIOS or isinstance(e, OSError)
+            if not temporario or tentativa == SHEETS_TENTATIVAS - 1:
+                raise
+            time.sleep(min(30, 2 ** tentativa))
+
+class SheetsExportJob:
+    def __init__(self, ano: int, mes: int, titulo: str, incremental: bool):
+        self.ano = ano
+        self.mes = mes
+        self.titulo = titulo
+        self.incremental = incremental
+        self.status = "na fila"
+        self.progresso = 0.0
+        self.mensagem = ""
+        self.enviadas = 0
+        self.url = None
+        self.erro = None
+        self.thread = None
+
+    @property
+    def ativo(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def executar(self, database, client):
+        try:
+            self.status = "exportando"
+            with DIAG.span("sheets", "exportar mês incremental" if self.incremental else "exportar mês completo"):
+                self._exportar(database, client)
+            self.status = "concluído"
+            self.progresso = 1.0
+        except Exception as e:
+            self.status = "falhou"
+            self.erro = str(e)
+
+    def _exportar(self, database, gc):
+        start, end = month_range(self.ano, self.mes)
+        mes_params = [date_iso(start), date_iso(end)]
+
+        with database.reader() as conn:
+            sync = {
+                r[0]: {"planilha_id": r[1], "ultimo_id": r[2], "linhas": r[3]}
+                for r in conn.execute(
+                    "SELECT tabela, planilha_id, ultimo_id, linhas FROM sheets_sync WHERE ano = ? AND mes = ?",
+                    (self.ano, self.mes)
+                )
+            }
+            if not self.incremental:
+                sync = {}
+            pendentes = {
+                tabela: conn.execute(
+                    f"SELECT COUNT(*) FROM {tabela} WHERE data >= ? AND data < ? AND id > ? AND {ativos(tabela)}",
+                    mes_params + [sync.get(tabela, {}).get("ultimo_id", 0)]
+                ).fetchone()[0]
+                for tabela, _ in SHEETS_ABAS
+            }
+            colunas = {
+                tabela: colunas_visiveis(conn, tabela)
+                for tabela, _ in SHEETS_ABAS
+            }
+        total = sum(pendentes.values()) or 1
+
+        planilha_id = next((s["planilha_id"] for s in sync.values()), None)
+        if planilha_id:
+            self.mensagem = "Abrindo planilha existente..."
+            sh = _com_retry(gc.open_by_key, planilha_id)
+        else:
+            self.mensagem = "Criando planilha..."
+            sh = _com_retry(gc.create, self.titulo)
+            # as três abas num único batch_update, já com o tamanho certo
+            padrao = sh.sheet1.id
+            _com_retry(sh.batch_update, {"requests": [
+                {"addSheet": {"properties": {
+                    "title": aba,
+                    "gridProperties": {"rowCount": pendentes[tabela] + 1, "columnCount": len(colunas[tabela])},
+                }}}
+                for tabela, aba in SHEETS_ABAS
+            ] + [{"deleteSheet": {"sheetId": padrao}}]})
+            # planilha nova: o estado do mês passa a ser só o dela (senão as abas que já
+            # tinham linha em sheets_sync continuariam apontando para a planilha antiga)
+            with database.writer() as w:
+                w.execute("DELETE FROM sheets_sync WHERE ano = ? AND mes = ?", (self.ano, self.mes))
+        self.url = sh.url
+
+        for tabela, aba in SHEETS_ABAS:
+            ws = _com_retry(sh.worksheet, aba)
+            estado = sync.get(tabela)
+            ultimo_id = estado["ultimo_id"] if estado else 0
+            linhas = estado["linhas"] if estado else 0
+            if not estado:
+                _com_retry(ws.update, range_name="A1", values=[colunas[tabela]])
+
+            sql_lote = (
+                f"SELECT {', '.join(colunas[tabela])} FROM {tabela} "
+                f"WHERE data >= ? AND data < ? AND id > ? AND {ativos(tabela)} ORDER BY id LIMIT {SHEETS_LOTE}"
+            )
+            while True:
+                # um lote por consulta (keyset no id): a conexão volta ao pool antes do
+                # envio, que pode levar segundos entre rede e esperas do retry
+                with database.reader() as conn:
+                    lote = conn.execute(sql_lote, mes_params + [ultimo_id]).fetchall()
+                if not lote:
+                    break
+                valores = [["" if v is None else v for v in row] for row in lote]
+                _com_retry(ws.append_rows, valores, value_input_option="RAW")
+
+                ultimo_id = lote[-1][0]
+                linhas += len(lote)
+                self.enviadas += len(lote)
+                self.progresso = min(1.0, self.enviadas / total)
+                self.mensagem = f"{aba}: {linhas} linha(s) enviadas"
+                # ponto de retomada: uma falha no próximo lote não reenvia este
+                with database.writer() as w:
+                    w.execute(
+                        """
+                        INSERT INTO sheets_sync (ano, mes, tabela, planilha_id, url, ultimo_id, linhas, atualizado_em)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, datetime('now', 'localtime'))
+                        ON CONFLICT (ano, mes, tabela) DO UPDATE SET
+                            planilha_id = excluded.planilha_id,
+                            url = excluded.url,
+                            ultimo_id = excluded.ultimo_id,
+                            linhas = excluded.linhas,
+                            atualizado_em = excluded.atualizado_em
+                        """,
+                        (self.ano, self.mes, tabela, sh.id, sh.url, ultimo_id, linhas)
+                    )
+                if len(lote) < SHEETS_LOTE:
+                    break
+
+            if not estado:
+                with database.writer() as w:
+                    w.execute(
+                        "INSERT OR IGNORE INTO sheets_sync (ano, mes, tabela, planilha_id, url) VALUES (?, ?, ?, ?, ?)",
+                        (self.ano, self.mes, tabela, sh.id, sh.url)
+                    )
+
+        self.mensagem = f"{self.enviadas} linha(s) enviadas"
+
+class SheetsExporter:
+    # um job por mês; o estado fica em memória para a tela acompanhar
+    def __init__(self, database):
+        self.db = database
+        self.jobs = {}
+        self._lock = threading.Lock()
+
+    def iniciar(self, ano: int, mes: int, titulo: str, incremental: bool, client) -> SheetsExportJob:
+        with self._lock:
+            job = self.jobs.get((ano, mes))
+            if job and job.ativo:
+                return job
+            job = SheetsExportJob(ano, mes, titulo, incremental)
+            job.thread = threading.Thread(
+                target=job.executar, args=(self.db, client), name=f"artmax-sheets-{ano}-{mes}", daemon=True
+            )
+            self.jobs[(ano, mes)] = job
+            job.thread.start()
+            return job
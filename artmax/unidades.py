@@ -0,0 +1,104 @@
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+from .config import UNIDADES
+from .clientes import sem_acento
+from .db import abrir_banco
+
+# =========================================================
+# UNIDADES (um banco SQLite por filial)
+# =========================================================
+# Cada filial tem o próprio arquivo, com o schema inteiro: agenda, caixa e regras
+# de comissão não se misturam, e a escrita de uma unidade não espera a de outra.
+# O BI consolidado roda a mesma função de relatorios em todas as unidades ao
+# mesmo tempo e junta os resultados. Threads e não processos: o sqlite3 solta o
+# GIL enquanto a consulta roda e o que volta para o pandas são as tabelas de
+# resumo (poucas linhas), então o tempo fica perto do da unidade mais lenta, sem
+# pagar a cópia dos DataFrames entre processos.
+UNIDADES_THREADS = 16  # teto do pool; com menos unidades, uma thread por unidade
+
+def _pasta_slug(nome: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", sem_acento(nome)).strip("_") or "unidade"
+
+class Unidades:
+    def __init__(self, caminhos: dict = UNIDADES, threads: int = UNIDADES_THREADS):
+        if not caminhos:
+            raise ValueError("nenhuma unidade configurada")
+        self.caminhos = dict(caminhos)
+        self.nomes = list(self.caminhos)
+        self._bancos = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=min(threads, len(self.nomes)), thread_name_prefix="unidade")
+
+    def __len__(self):
+        return len(self.nomes)
+
+    def banco(self, nome: str):
+        # Database da unidade, aberto (e migrado) no primeiro uso
+        if nome not in self.caminhos:
+            raise ValueError(f"unidade desconhecida: {nome!r}")
+        with self._lock:
+            if nome not in self._bancos:
+                self._bancos[nome] = abrir_banco(self.caminhos[nome])
+            return self._bancos[nome]
+
+    def pasta(self, base: str, nome: str) -> str:
+        # backups, snapshots e exportação analítica: uma subpasta por unidade
+        # (com uma unidade só, as pastas de sempre)
+        return base if len(self.nomes) == 1 else os.path.join(base, _pasta_slug(nome))
+
+    def em_paralelo(self, fn, nomes=None) -> dict:
+        # {unidade: fn(unidade)}, todas ao mesmo tempo no pool
+        futuros = {nome: self._pool.submit(fn, nome) for nome in (nomes or self.nomes)}
+        return {nome: f.result() for nome, f in futuros.items()}
+
+# =========================================================
+# BI consolidado
+# =========================================================
+class Consolidado:
+    # faz o papel do ler(tabela, ym, sql, params) nas funções de relatorios: as marcadas
+    # com @por_unidade rodam com o leitor de cada unidade e juntam os resultados
+    def __init__(self, unidades: Unidades, leitores: dict):
+        self.unidades = unidades
+        self.leitores = leitores
+
+    def __call__(self, tabela: str, ym, sql: str, params=()):
+        raise TypeError("consulta sem regra de consolidação entre unidades (ver unidades.por_unidade)")
+
+    def mapear(self, fn, *args, **kwargs) -> dict:
+        return self.unidades.em_paralelo(lambda nome: fn(self.leitores[nome], *args, **kwargs), list(self.leitores))
+
+def por_unidade(juntar):
+    # decorador para fn(ler, ...): com um Consolidado no lugar do ler, devolve
+    # juntar({unidade: fn(ler_da_unidade, ...)}, ...)
+    def decorador(fn):
+        @wraps(fn)
+        def consolidavel(ler, *args, **kwargs):
+            if not isinstance(ler, Consolidado):
+                return fn(ler, *args, **kwargs)
+            return juntar(ler.mapear(fn, *args, **kwargs), *args, **kwargs)
+        return consolidavel
+    return decorador
+
+def somar(chave: str, ordem: str = None, decrescente: bool = False):
+    # junta agregações aditivas (SUM/COUNT): soma as colunas numéricas por chave
+    def juntar(partes: dict, *args, **kwargs):
+        import pandas as pd
+
+        # unidade sem movimento volta vazia, com colunas sem tipo: fica de fora da soma
+        com_dados = [df for df in partes.values() if not df.empty]
+        if not com_dados:
+            return next(iter(partes.values()))
+        colunas = com_dados[0].columns
+        df = pd.concat(com_dados, ignore_index=True)
+        df = df.groupby(chave, as_index=False, sort=True).sum(numeric_only=True)[colunas]
+        if ordem:
+            df = df.sort_values(ordem, ascending=not decrescente, ignore_index=True)
+        return df
+    return juntar
+
+def somar_totais(partes: dict, *args, **kwargs) -> dict:
+    return {k: sum(p[k] for p in partes.values()) for k in next(iter(partes.values()))}
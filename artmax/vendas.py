@@ -0,0 +1,113 @@
+from datetime import date
+
+from .datas import date_iso
+from .db import upsert_cliente
+
+# =========================================================
+# COMISSÃO: regras por profissional, serviço e vigência
+# =========================================================
+def calc_comissao(conn, profissional: str, servico: str, valor_venda: float, data: date = None) -> float:
+    data = (data or date.today()).isoformat()
+    row = conn.execute(
+        """
+        SELECT pct FROM comissao_regras
+        WHERE profissional = ? AND servico = ?
+          AND vigente_de <= ? AND (vigente_ate IS NULL OR ? < vigente_ate)
+        ORDER BY vigente_de DESC, id DESC
+        LIMIT 1
+        """,
+        (profissional.strip(), servico, data, data)
+    ).fetchone()
+    return float(valor_venda) * float(row[0]) if row else 0.0
+
+def _expr_comissao(conn):
+    # todas as regras num único CASE (a vigência mais recente vence): o recálculo
+    # percorre as vendas uma vez, sem subconsulta por linha. TRIM como o strip() do calc_comissao
+    casos, params = [], []
+    for profissional, servico, pct, de, ate in conn.execute(
+        "SELECT profissional, servico, pct, vigente_de, vigente_ate FROM comissao_regras "
+        "ORDER BY vigente_de DESC, id DESC"
+    ):
+        casos.append("WHEN TRIM(profissional) = ? COLLATE NOCASE AND servico = ? AND data >= ? AND data < ? THEN ?")
+        params += [profissional, servico, de, ate or "9999-12-31", pct]
+    if not casos:
+        return "0", []
+    return f"COALESCE(valor, 0) * CASE {' '.join(casos)} ELSE 0 END", params
+
+def tabela_comissao(conn):
+    # regras em memória para cargas em lote: comissao(prof, serv, valor, data_iso) sem ir ao banco.
+    # Mesma precedência do calc_comissao (início de vigência mais recente vence).
+    regras = {}
+    for profissional, servico, pct, de, ate in conn.execute(
+        "SELECT profissional, servico, pct, vigente_de, vigente_ate FROM comissao_regras "
+        "ORDER BY vigente_de DESC, id DESC"
+    ):
+        regras.setdefault((profissional.lower(), servico), []).append((de, ate or "9999-12-31", pct))
+
+    def comissao(profissional: str, servico: str, valor: float, data: str) -> float:
+        for de, ate, pct in regras.get(((profissional or "").strip().lower(), servico), ()):
+            if de <= data < ate:
+                return float(valor) * float(pct)
+        return 0.0
+
+    return comissao
+
+def recalcular_comissoes(conn, inicio: date, fim: date) -> int:
+    # só grava as linhas cujo valor muda (as triggers de resumo rodam só nelas)
+    expr, params = _expr_comissao(conn)
+    conn.execute(
+        f"UPDATE vendas SET comissao = {expr} "
+        f"WHERE data >= ? AND data < ? AND exclusao_id IS NULL AND comissao IS NOT {expr}",
+        params + [date_iso(inicio), date_iso(fim)] + params
+    )
+    return conn.execute("SELECT changes()").fetchone()[0]
+
+def validar_regras(linhas):
+    # linhas: (profissional, servico, pct, vigente_de, vigente_ate) como vêm da tela/CSV
+    novas, erros = [], []
+    for i, (profissional, servico, pct, de, ate) in enumerate(linhas, start=1):
+        de = de.strip() if isinstance(de, str) and de.strip() else "0000-01-01"
+        ate = ate.strip() if isinstance(ate, str) and ate.strip() else None
+        for d in (de, ate):
+            if d and d != "0000-01-01":
+                try:
+                    date.fromisoformat(d)
+                except ValueError:
+                    erros.append(f"Linha {i}: data inválida '{d}'.")
+        if ate and ate <= de:
+            erros.append(f"Linha {i}: 'vigente até' precisa ser depois de 'vigente de'.")
+        novas.append((profissional, str(servico).strip(), float(pct), de, ate))
+    return novas, erros
+
+def salvar_regras(database, novas):
+    with database.writer() as conn:
+        conn.execute("DELETE FROM comissao_regras")
+        conn.executemany(
+            "INSERT INTO comissao_regras (profissional, servico, pct, vigente_de, vigente_ate) "
+            "VALUES (?,?,?,?,?)",
+            novas
+        )
+
+# =========================================================
+# VENDAS: checkout e exclusão
+# =========================================================
+def inserir_venda(conn, data: date, cliente: str, telefone: str, servico: str, profissional: str, valor: float):
+    # devolve (id, comissão); a comissão sai das regras vigentes na data da venda
+    cliente = (cliente or "").strip()
+    if not cliente:
+        raise ValueError("Informe o nome do cliente.")
+    if not valor or float(valor) <= 0:
+        raise ValueError("Informe um valor maior que zero.")
+
+    comissao = calc_comissao(conn, profissional, servico, float(valor), data)
+    cliente_id = upsert_cliente(conn, cliente, telefone)
+    venda_id = conn.execute(
+        "INSERT INTO vendas (data, cliente, valor, servico, profissional, comissao, cliente_id) "
+        "VALUES (?,?,?,?,?,?,?)",
+        (data.isoformat(), cliente, float(valor), servico, profissional, float(comissao), cliente_id)
+    ).lastrowid
+    return venda_id, comissao
+
+def registrar_venda(database, data: date, cliente: str, telefone: str, servico: str, profissional: str, valor: float):
+    with database.writer() as conn:
+        return inserir_venda(conn, data, cliente, telefone, servico, profissional, valor)
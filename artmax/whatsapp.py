@@ -0,0 +1,20 @@
+import urllib.parse
+
+from .db import normalizar_telefone
+
+# =========================================================
+# WhatsApp
+# =========================================================
+def build_whatsapp_link(nome, tel, servico, hora="", tipo="confirmacao"):
+    if not tel:
+        return None
+    msgs = {
+        "confirmacao": f"Olá {nome}! ✨ Confirmamos seu horário para {servico} às {hora}.",
+        "lembrete": f"Oi {nome}! 💜 Lembrete do seu horário hoje às {hora} ({servico}).",
+        "agradecimento": f"Obrigada pela preferência, {nome}! ✨ Foi um prazer atender você ({servico})."
+    }
+    msg = msgs.get(tipo, "")
+    tel_limpo = normalizar_telefone(tel)
+    if not tel_limpo:
+        return None
+    return f"https://wa.me/55{tel_limpo}?text={urllib.parse.quote(msg)}"
@@ -0,0 +1,217 @@
+# Gerador de dados sintéticos para o schema do Artmax
+#
+#   python benchmarks/gerar_dados.py saida.db --vendas 100000
+#   python benchmarks/gerar_dados.py saida.db --vendas 1000000 --seed 7 --anos 3 --ate 2025-12-31
+#
+# Determinístico: mesma semente e mesmos parâmetros geram o mesmo banco, para
+# comparar benchmarks entre versões. Distribuições:
+#   - dias: salão fechado no domingo, sexta e sábado mais cheios, dezembro em alta;
+#   - serviços/profissionais: pesos de SERVICOS_PERFIL/PROFISSIONAIS_PESO, preço
+#     uniforme na faixa do serviço (múltiplos de R$ 5);
+#   - comissão: COMISSAO_EVELYN (a mesma carga inicial de comissao_regras);
+#   - clientes: poucas muito frequentes e uma cauda longa (Zipf), 10% sem telefone;
+#   - agenda: um agendamento por venda + ~12% de faltas; despesas fixas todo mês
+#     e variáveis proporcionais ao movimento.
+#
+# As linhas entram com o banco na versão 2 do schema (sem índices nem triggers)
+# e as migrações seguintes montam resumos, busca, clientes e índices de uma vez.
+# Muito mais rápido que inserir com as triggers ligadas, e ainda mede o tempo
+# de migração de um banco grande.
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import date, timedelta
+from itertools import accumulate
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from artmax.config import (
+    PROFISSIONAIS, SERVICOS, COMISSAO_EVELYN, HORARIO_ABERTURA, HORARIO_FECHAMENTO, SLOT_PASSO,
+)
+from artmax.db import migrate
+
+FIM_PADRAO = date(2025, 12, 31)
+
+# serviço -> (peso, preço mínimo, preço máximo); serviço novo em SERVICOS usa SERVICO_PADRAO
+SERVICOS_PERFIL = {
+    "Escova": (30, 50, 90),
+    "Corte": (18, 40, 120),
+    "Sobrancelha": (15, 25, 45),
+    "Coloração": (10, 120, 280),
+    "Progressiva": (7, 180, 450),
+    "Luzes": (6, 250, 600),
+    "Botox": (6, 150, 350),
+    "Relaxamento": (5, 100, 220),
+    "Outros": (3, 40, 200),
+}
+SERVICO_PADRAO = (5, 50, 200)
+PROFISSIONAIS_PESO = {"Eunides": 55, "Evelyn": 45}
+
+# movimento relativo por dia da semana (seg..dom) e por mês
+PESO_DIA_SEMANA = [0.5, 0.9, 0.9, 1.0, 1.3, 1.6, 0.0]
+PESO_MES = {1: 0.85, 2: 0.9, 7: 0.95, 11: 1.1, 12: 1.3}
+
+FALTAS = 0.12  # agendamentos sem venda
+
+# despesas: (descrição, dia do mês, mínimo, máximo) todo mês + variáveis
+GASTOS_FIXOS = [
+    ("Aluguel", 5, 2500, 2500),
+    ("Luz", 10, 280, 620),
+    ("Água", 10, 80, 160),
+    ("Internet", 15, 120, 120),
+    ("Contador", 20, 400, 400),
+]
+GASTOS_VARIAVEIS = {
+    "Produtos": (40, 150, 1500),
+    "Manutenção": (8, 80, 600),
+    "Marketing": (8, 50, 400),
+    "Café e copa": (20, 20, 120),
+    "Limpeza": (15, 30, 200),
+}
+VENDAS_POR_GASTO = 25
+
+NOMES = [
+    "Ana", "Maria", "Juliana", "Fernanda", "Patrícia", "Aline", "Camila", "Bruna", "Larissa", "Beatriz",
+    "Gabriela", "Letícia", "Mariana", "Carla", "Renata", "Daniela", "Vanessa", "Simone", "Luciana", "Joana",
+    "Cláudia", "Sandra", "Tatiane", "Priscila", "Roberta", "Débora", "Eliane", "Márcia", "Rosana", "Viviane",
+]
+SOBRENOMES = [
+    "Silva", "Santos", "Oliveira", "Souza", "Lima", "Pereira", "Ferreira", "Costa", "Rodrigues", "Almeida",
+    "Nascimento", "Araújo", "Carvalho", "Gomes", "Martins", "Rocha", "Ribeiro", "Barbosa", "Teixeira", "Moura",
+]
+
+def _minutos(hhmm: str) -> int:
+    h, m = hhmm.split(":")
+    return int(h) * 60 + int(m)
+
+def _clientes(rng: random.Random, n: int):
+    # nomes únicos o bastante para a busca ter o que separar: "Ana Souza Lima 123"
+    clientes = []
+    for i in range(n):
+        nome = f"{rng.choice(NOMES)} {rng.choice(SOBRENOMES)} {rng.choice(SOBRENOMES)}"
+        if i >= len(NOMES) * len(SOBRENOMES):
+            nome += f" {i}"
+        tel = "" if rng.random() < 0.10 else f"(11) 9{rng.randrange(1000, 10000)}-{rng.randrange(10000):04d}"
+        clientes.append((nome, tel))
+    return clientes
+
+def _dias(inicio: date, fim: date):
+    dias, pesos = [], []
+    d = inicio
+    while d <= fim:
+        peso = PESO_DIA_SEMANA[d.weekday()] * PESO_MES.get(d.month, 1.0)
+        if peso:
+            dias.append(d.isoformat())
+            pesos.append(peso)
+        d += timedelta(days=1)
+    return dias, list(accumulate(pesos))
+
+def gerar_linhas(n_vendas: int, seed: int = 42, anos: int = 3, fim: date = FIM_PADRAO):
+    # devolve (agenda, vendas, gastos) como listas de tuplas prontas para o INSERT
+    rng = random.Random(seed)
+    inicio = date(fim.year - anos + 1, 1, 1)
+    dias, dias_acum = _dias(inicio, fim)
+
+    clientes = _clientes(rng, max(200, n_vendas // 6))
+    cli_acum = list(accumulate(1 / (i + 1) ** 0.5 for i in range(len(clientes))))
+
+    servicos = [(s, *SERVICOS_PERFIL.get(s, SERVICO_PADRAO)) for s in SERVICOS]
+    serv_acum = list(accumulate(p for _, p, _, _ in servicos))
+    profs = list(PROFISSIONAIS)
+    prof_acum = list(accumulate(PROFISSIONAIS_PESO.get(p, 1) for p in profs))
+    horarios = [
+        f"{m // 60:02d}:{m % 60:02d}"
+        for m in range(_minutos(HORARIO_ABERTURA), _minutos(HORARIO_FECHAMENTO), SLOT_PASSO)
+    ]
+
+    n_agenda = int(n_vendas * (1 + FALTAS))
+    datas = sorted(rng.choices(dias, cum_weights=dias_acum, k=n_agenda))
+    faltas = set(rng.sample(range(n_agenda), n_agenda - n_vendas))
+    agenda, vendas = [], []
+    for i, d in enumerate(datas):
+        nome, tel = clientes[rng.choices(range(len(clientes)), cum_weights=cli_acum)[0]]
+        serv, _, lo, hi = servicos[rng.choices(range(len(servicos)), cum_weights=serv_acum)[0]]
+        prof = profs[rng.choices(range(len(profs)), cum_weights=prof_acum)[0]]
+        agenda.append((d, rng.choice(horarios), nome, tel, serv, prof))
+        if i not in faltas:
+            valor = float(rng.randrange(lo // 5, hi // 5 + 1) * 5)
+            pct = COMISSAO_EVELYN.get(serv, 0.0) if prof.lower() == "evelyn" else 0.0
+            vendas.append((d, nome, valor, serv, prof, valor * pct))
+
+    gastos = []
+    for ano in range(inicio.year, fim.year + 1):
+        for mes in range(1, 13):
+            for desc, dia, lo, hi in GASTOS_FIXOS:
+                d = date(ano, mes, dia)
+                if inicio <= d <= fim:
+                    gastos.append((d.isoformat(), desc, float(rng.randint(lo, hi))))
+    var = list(GASTOS_VARIAVEIS.items())
+    var_acum = list(accumulate(p for _, (p, _, _) in var))
+    for d in sorted(rng.choices(dias, cum_weights=dias_acum, k=n_vendas // VENDAS_POR_GASTO)):
+        desc, (_, lo, hi) = var[rng.choices(range(len(var)), cum_weights=var_acum)[0]]
+        gastos.append((d, desc, float(rng.randint(lo, hi))))
+
+    return agenda, vendas, gastos
+
+def gerar(path: str, n_vendas: int, seed: int = 42, anos: int = 3, fim: date = FIM_PADRAO):
+    # cria o banco em `path` (não pode existir) e devolve contagens e tempos
+    if os.path.exists(path):
+        raise FileExistsError(path)
+    t0 = time.perf_counter()
+    agenda, vendas, gastos = gerar_linhas(n_vendas, seed, anos, fim)
+    t_linhas = time.perf_counter() - t0
+
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = OFF")
+        migrate(conn, ate=2)
+
+        t0 = time.perf_counter()
+        with conn:
+            conn.executemany(
+                "INSERT INTO agenda (data, hora, cliente, telefone, servico, profissional) VALUES (?,?,?,?,?,?)", agenda
+            )
+            conn.executemany(
+                "INSERT INTO vendas (data, cliente, valor, servico, profissional, comissao) VALUES (?,?,?,?,?,?)", vendas
+            )
+            conn.executemany("INSERT INTO gastos (data, descricao, valor) VALUES (?,?,?)", gastos)
+        t_insercao = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        migrate(conn)
+        t_migracao = time.perf_counter() - t0
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        conn.close()
+
+    return {
+        "seed": seed,
+        "agenda": len(agenda),
+        "vendas": len(vendas),
+        "gastos": len(gastos),
+        "de": date(fim.year - anos + 1, 1, 1).isoformat(),
+        "ate": fim.isoformat(),
+        "linhas_s": round(t_linhas, 2),
+        "insercao_s": round(t_insercao, 2),
+        "migracao_s": round(t_migracao, 2),
+        "tamanho_mb": round(os.path.getsize(path) / 2**20, 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera um banco Artmax sintético e determinístico")
+    parser.add_argument("saida", help="arquivo .db a criar")
+    parser.add_argument("--vendas", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--anos", type=int, default=3)
+    parser.add_argument("--ate", type=date.fromisoformat, default=FIM_PADRAO, help="último dia dos dados")
+    args = parser.parse_args()
+    print(json.dumps(gerar(args.saida, args.vendas, args.seed, args.anos, args.ate), ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# Benchmark de inicialização do app.py
+#
+#   python benchmarks/startup.py              # relatório no terminal
+#   python benchmarks/startup.py --json saida.json
+#
+# Mede, cada item num processo Python novo (cache de import frio):
+#   1) o custo de import (-X importtime) do que o app.py carrega antes do login
+#      e dos módulos pesados que ficaram para depois (pandas, plotly, gspread);
+#   2) o tempo até a tela de login ficar pronta (streamlit.testing AppTest),
+#      conferindo que o banco ainda não foi criado nessa hora.
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(RAIZ, "app.py")
+
+# o que o app.py importa no topo do arquivo
+IMPORTS_INICIAIS = ["streamlit", "streamlit.components.v1"]
+# o que só é importado quando a tela/ação precisa
+IMPORTS_ADIADOS = ["pandas", "plotly.express", "gspread", "google.oauth2.service_account"]
+
+# =========================================================
+# -X importtime
+# =========================================================
+def importtime(modulo: str):
+    # devolve (tempo total em ms, [(ms acumulado, módulo)] dos mais caros) ou None se não estiver instalado
+    r = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        capture_output=True, text=True
+    )
+    if r.returncode != 0:
+        return None
+
+    linhas = []
+    for linha in r.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not linha.startswith("import time:") or "cumulative" in linha:
+            continue
+        _, acumulado, nome = linha[len("import time:"):].split("|")
+        linhas.append((int(acumulado) / 1000, nome.strip()))
+
+    # a última linha é o próprio módulo pedido, com o acumulado de tudo que ele puxou
+    total = linhas[-1][0] if linhas else 0.0
+    topo = sorted(linhas, reverse=True)[:10]
+    return total, topo
+
+# =========================================================
+# Tempo até a tela de login
+# =========================================================
+PRIMEIRA_TELA = """
+import json, sys, time
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=60).run()
+print(json.dumps({
+    "ms": (time.perf_counter() - t0) * 1000,
+    "login": any(w.label == "Usuário" for w in at.text_input),
+    "erros": [str(e.value) for e in at.exception],
+    "modulos": [m for m in ("pandas", "plotly", "gspread") if m in sys.modules],
+}))
+"""
+
+def primeira_tela():
+    # roda num diretório vazio: DB_PATH é relativo, então dá para ver se o banco foi aberto
+    pasta = tempfile.mkdtemp(prefix="artmax-startup-")
+    try:
+        app = shutil.copy(APP, pasta)
+        # o pacote artmax continua vindo da raiz do repositório
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [RAIZ, os.environ.get("PYTHONPATH")])))
+        r = subprocess.run(
+            [sys.executable, "-c", PRIMEIRA_TELA, app],
+            capture_output=True, text=True, cwd=pasta, env=env
+        )
+        if r.returncode != 0:
+            return {"erro": r.stderr.strip().splitlines()[-1] if r.stderr.strip() else "falhou"}
+        res = json.loads(r.stdout.strip().splitlines()[-1])
+        res["banco_criado"] = os.path.exists(os.path.join(pasta, "artmax.db"))
+        return res
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+# =========================================================
+# Relatório
+# =========================================================
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de inicialização do app.py")
+    parser.add_argument("--json", help="grava o resultado neste arquivo")
+    args = parser.parse_args()
+
+    resultado = {"python": sys.version.split()[0], "imports": {}, "primeira_tela": None}
+
+    for grupo, modulos in (("iniciais", IMPORTS_INICIAIS), ("adiados", IMPORTS_ADIADOS)):
+        print(f"== imports {grupo} ==")
+        for modulo in modulos:
+            medido = importtime(modulo)
+            if medido is None:
+                print(f"  {modulo:<32} não instalado")
+                resultado["imports"][modulo] = None
+                continue
+            total, topo = medido
+            print(f"  {modulo:<32} {total:8.1f} ms")
+            for ms, nome in topo[1:4]:
+                print(f"      {nome:<28} {ms:8.1f} ms")
+            resultado["imports"][modulo] = {"grupo": grupo, "ms": total, "mais_caros": topo}
+
+    print("== primeira tela (login) ==")
+    tela = primeira_tela()
+    resultado["primeira_tela"] = tela
+    if "erro" in tela:
+        print(f"  não foi possível rodar o app: {tela['erro']}")
+    else:
+        print(f"  {tela['ms']:.0f} ms • login na tela: {tela['login']} • banco aberto: {tela['banco_criado']}")
+        print(f"  módulos pesados já carregados: {', '.join(tela['modulos']) or 'nenhum'}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,671 @@
+# Suíte de benchmarks do Artmax (sem a tela, direto no pacote artmax)
+#
+#   python benchmarks/suite.py                                   # 10k e 100k vendas
+#   python benchmarks/suite.py --escalas 10000 100000 1000000
+#   python benchmarks/suite.py --so bi vendas --comparar benchmarks/resultados/antes.json
+#
+# Para cada escala, gera (uma vez, em benchmarks/.dados/) um banco sintético e
+# determinístico (gerar_dados.py), copia para uma pasta temporária e mede o
+# caminho de dados de cada tela: consultas do mês, filtros e busca, rótulos de
+# listas (registros x pandas), BI, gráficos, comissões, backup/snapshot, carga
+# concorrente, exclusão em lote, importação, lote do CLI e lembretes. Os
+# benchmarks que escrevem rodam depois dos de leitura.
+#
+# O resultado vai para um JSON (padrão: benchmarks/resultados/<commit>-<data>.json);
+# com --comparar, cada métrica de tempo é confrontada com a de um JSON anterior.
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import zipfile
+from datetime import date, datetime, timedelta
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gerar_dados import gerar
+from artmax.config import PROFISSIONAIS, SERVICOS
+from artmax.datas import month_range, date_iso
+from artmax.db import MIGRATIONS, abrir_banco
+from artmax.cache import ReadCache, leitor
+from artmax.clientes import filtro_busca_clientes
+from artmax.agenda import SlotIndex, HorarioOcupado, agendar
+from artmax.vendas import calc_comissao, recalcular_comissoes, registrar_venda
+from artmax.exclusoes import excluir, desfazer, purgar
+from artmax.despesas import registrar_gasto
+from artmax.relatorios import (
+    BI_AGRUPAMENTOS, bi_totais, bi_agrupado, bi_ano_a_ano, vendas_por_profissional, ultimas_vendas,
+)
+from artmax.backup import build_backup_zip, criar_snapshot
+from artmax.importacao import importar_arquivo
+from artmax.lembretes import gerar_lembretes
+from artmax.cli import executar_lote
+from artmax.unidades import UNIDADES_THREADS, Unidades, Consolidado
+from artmax.registros import REGISTROS, colunas, ler_registros
+
+DADOS = os.path.join(RAIZ, "benchmarks", ".dados")
+RESULTADOS = os.path.join(RAIZ, "benchmarks", "resultados")
+ESCALAS_PADRAO = [10_000, 100_000]
+REPETICOES = 7
+PAGINA = 50               # PAGE_SIZE do app.py
+SESSOES = 8               # carga concorrente: metade agenda, metade BI
+OPS_POR_SESSAO = 40
+LOTE_OPS = 5000
+UNIDADES_BENCH = [1, 2, 4, 8] # nº de unidades no BI consolidado
+REGISTROS_LINHAS = [1000, 5000] # tamanho das listas de rótulos (multiselects)
+PIOROU = 1.25             # --comparar: razão a partir da qual a métrica é marcada
+
+# =========================================================
+# Medição
+# =========================================================
+def _pct(ms, p):
+    ordenados = sorted(ms)
+    return ordenados[min(len(ordenados) - 1, int(round(p * (len(ordenados) - 1))))]
+
+def medir(fn, repeticoes: int = REPETICOES):
+    # p50/p95 em ms de `repeticoes` execuções (depois de uma de aquecimento)
+    fn()
+    ms = []
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        fn()
+        ms.append((time.perf_counter() - t0) * 1000)
+    return round(_pct(ms, 0.5), 3), round(_pct(ms, 0.95), 3)
+
+def uma_vez(fn):
+    t0 = time.perf_counter()
+    r = fn()
+    return r, round((time.perf_counter() - t0) * 1000, 1)
+
+def _ler_sem_cache(ctx):
+    return leitor(ctx["db"])
+
+# =========================================================
+# Leitura (telas)
+# =========================================================
+def bench_agenda(ctx):
+    db, ini, fim = ctx["db"], ctx["mes_ini"], ctx["mes_fim"]
+    mes = [date_iso(ini), date_iso(fim)]
+
+    def pagina():
+        with db.reader() as conn:
+            conn.execute(
+                "SELECT * FROM agenda WHERE data >= ? AND data < ? AND exclusao_id IS NULL "
+                "ORDER BY data DESC, hora DESC, id DESC LIMIT ?",
+                mes + [PAGINA + 1]
+            ).fetchall()
+            conn.execute("SELECT COUNT(*) FROM agenda WHERE data >= ? AND data < ? AND exclusao_id IS NULL", mes).fetchone()
+
+    with db.reader() as conn:
+        plano = [r[-1] for r in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM agenda WHERE data >= ? AND data < ? AND exclusao_id IS NULL "
+            "ORDER BY data DESC, hora DESC, id DESC",
+            mes
+        )]
+        dia = conn.execute(
+            "SELECT data FROM agenda WHERE data >= ? AND data < ? GROUP BY data ORDER BY COUNT(*) DESC LIMIT 1", mes
+        ).fetchone()[0]
+    dia = date.fromisoformat(dia)
+
+    slots = SlotIndex(db)
+    _, carregar_ms = uma_vez(lambda: [slots.conflito(p, dia, "08:00", 60) for p in PROFISSIONAIS])
+    conflito_ms, _ = medir(lambda: slots.conflito(PROFISSIONAIS[0], dia, "14:00", 60))
+    livres_ms, livres_p95 = medir(lambda: slots.proximos_livres(PROFISSIONAIS[0], 60, datetime.combine(dia, datetime.min.time())))
+
+    pag_ms, pag_p95 = medir(pagina)
+    return {
+        "mes_pagina_ms": pag_ms,
+        "mes_pagina_p95_ms": pag_p95,
+        "slots_carregar_dia_ms": carregar_ms,
+        "slots_conflito_ms": conflito_ms,
+        "slots_livres_ms": livres_ms,
+        "slots_livres_p95_ms": livres_p95,
+        "plano_mes": plano,
+    }
+
+def bench_vendas(ctx):
+    db = ctx["db"]
+    mes = [date_iso(ctx["mes_ini"]), date_iso(ctx["mes_fim"])]
+    with db.reader() as conn:
+        # cliente frequente: a busca devolve muitas linhas (pior caso da paginação)
+        nome = conn.execute("SELECT nome FROM clientes ORDER BY visitas DESC LIMIT 1").fetchone()[0]
+    primeiro, sobrenome = nome.split()[:2]
+    buscas = {
+        "prefixo": f"{primeiro} {sobrenome[:3]}",
+        "sem_acento": f"{primeiro} {sobrenome}".replace("ú", "u").replace("á", "a").replace("í", "i"),
+        "erro_digitacao": f"{primeiro} {sobrenome[:-2]}{sobrenome[-1]}{sobrenome[-2]}",
+    }
+
+    def pagina(where, params):
+        with db.reader() as conn:
+            conn.execute(
+                f"SELECT * FROM vendas WHERE {where} AND exclusao_id IS NULL ORDER BY data DESC, id DESC LIMIT ?",
+                params + [PAGINA + 1]
+            ).fetchall()
+            conn.execute(f"SELECT COUNT(*) FROM vendas WHERE {where} AND exclusao_id IS NULL", params).fetchone()
+
+    res = {}
+    res["mes_pagina_ms"], res["mes_pagina_p95_ms"] = medir(lambda: pagina("data >= ? AND data < ?", mes))
+    res["mes_filtro_prof_serv_ms"], _ = medir(lambda: pagina(
+        "data >= ? AND data < ? AND profissional = ? AND servico = ?", mes + [PROFISSIONAIS[0], SERVICOS[0]]
+    ))
+    for rotulo, texto in buscas.items():
+        def buscar(texto=texto):
+            where, params = filtro_busca_clientes(db, "vendas", texto)
+            pagina("1=1" + where, params)
+        res[f"busca_historico_{rotulo}_ms"], _ = medir(buscar)
+
+    if importlib.util.find_spec("pandas"):
+        import pandas as pd
+
+        # como era antes do FTS: todas as vendas num DataFrame + str.contains
+        def pandas_contains():
+            with db.reader() as conn:
+                df = pd.read_sql("SELECT * FROM vendas", conn)
+            df[df["cliente"].str.contains(buscas["prefixo"], case=False, na=False)]
+        res["busca_pandas_contains_ms"], _ = medir(pandas_contains, 3)
+    return res
+
+def _pico_kb(fn):
+    # pico de memória alocada (tracemalloc) durante uma execução
+    tracemalloc.start()
+    try:
+        fn()
+        return round(tracemalloc.get_traced_memory()[1] / 1024)
+    finally:
+        tracemalloc.stop()
+
+def bench_registros(ctx):
+    # N rótulos de multiselect: DataFrame + iterrows (como era), DataFrame + itertuples e
+    # registros (tuplas nomeadas) direto do cursor; tempo e pico de memória, leitura incluída
+    if not importlib.util.find_spec("pandas"):
+        return {"pulado": "pandas não instalado"}
+    import pandas as pd
+
+    db = ctx["db"]
+    res = {}
+    for tabela, modelo in REGISTROS.items():
+        campos = modelo._fields
+        for n in REGISTROS_LINHAS:
+            sql = f"SELECT {colunas(modelo)} FROM {tabela} ORDER BY id DESC LIMIT ?"
+
+            def iterrows():
+                with db.reader() as conn:
+                    df = pd.read_sql(sql, conn, params=[n])
+                return {int(r["id"]): " • ".join(str(r[c]) for c in campos) for _, r in df.iterrows()}
+
+            def itertuples():
+                with db.reader() as conn:
+                    df = pd.read_sql(sql, conn, params=[n])
+                return {int(r.id): " • ".join(str(v) for v in r) for r in df.itertuples(index=False)}
+
+            def registros():
+                with db.reader() as conn:
+                    linhas = ler_registros(conn, modelo, sql, [n])
+                return {r.id: " • ".join(str(v) for v in r) for r in linhas}
+
+            for nome, fn in (("iterrows", iterrows), ("itertuples", itertuples), ("registros", registros)):
+                res[f"{tabela}_{n}_{nome}_ms"], _ = medir(fn, 5)
+                res[f"{tabela}_{n}_{nome}_pico_kb"] = _pico_kb(fn)
+    return res
+
+def tela_bi(ler, ini, fim):
+    # o que a tela de BI consulta num rerun (sem os gráficos)
+    bi_totais(ler, ini, fim)
+    bi_totais(ler, ini.replace(year=ini.year - 1), fim.replace(year=fim.year - 1))
+    vendas_por_profissional(ler, ini, fim)
+    bi_agrupado(ler, ini, fim, "Mês")
+    bi_ano_a_ano(ler, ini, fim)
+    ultimas_vendas(ler, ini, fim)
+
+def bench_bi(ctx):
+    db = ctx["db"]
+    periodos = {
+        "mes": (ctx["mes_ini"], ctx["mes_fim"]),
+        "12_meses": (ctx["mes_fim"].replace(year=ctx["mes_fim"].year - 1), ctx["mes_fim"]),
+        "3_anos": (ctx["inicio"], ctx["mes_fim"]),
+    }
+    tela = tela_bi
+
+    res = {}
+    if not importlib.util.find_spec("pandas"):
+        return {"pulado": "pandas não instalado"}
+    sem_cache = _ler_sem_cache(ctx)
+    for nome, (ini, fim) in periodos.items():
+        res[f"tela_{nome}_ms"], res[f"tela_{nome}_p95_ms"] = medir(lambda: tela(sem_cache, ini, fim))
+        cache = ReadCache()
+        com_cache = leitor(db, cache)
+        tela(com_cache, ini, fim)
+        res[f"tela_{nome}_cache_ms"], _ = medir(lambda: tela(com_cache, ini, fim))
+    ini, fim = periodos["3_anos"]
+    for agrupamento in BI_AGRUPAMENTOS:
+        res[f"agrupado_3_anos_{agrupamento.lower()}_ms"], _ = medir(lambda: bi_agrupado(sem_cache, ini, fim, agrupamento))
+    return res
+
+def bench_graficos(ctx):
+    if not (importlib.util.find_spec("plotly") and importlib.util.find_spec("pandas")):
+        return {"pulado": "plotly/pandas não instalados"}
+    import plotly.io as pio
+    from artmax.graficos import GRAFICOS, Graficos, versao_bi
+
+    db = ctx["db"]
+    ler = leitor(db, ReadCache())
+    ini, fim = ctx["mes_fim"].replace(year=ctx["mes_fim"].year - 1), ctx["mes_fim"]
+    res = {}
+    for nome in GRAFICOS:
+        agrupamento = "Mês" if nome == "detalhe" else None
+        graficos = Graficos(["#8E2DE2", "#D4AF37"], "#FFFFFF", "rgba(255,255,255,0.055)")
+        versao = versao_bi(db)
+        fig, res[f"{nome}_montar_ms"] = uma_vez(lambda: graficos.figura(nome, ler, ini, fim, versao, agrupamento))
+        res[f"{nome}_memo_ms"], _ = medir(lambda: graficos.figura(nome, ler, ini, fim, versao_bi(db), agrupamento))
+        if fig is not None:
+            js, res[f"{nome}_json_ms"] = uma_vez(lambda: pio.to_json(fig, validate=False))
+            res[f"{nome}_json_kb"] = round(len(js) / 1024, 1)
+    return res
+
+def bench_unidades(ctx):
+    # BI consolidado de 12 meses com 1, 2, 4 e 8 unidades, em paralelo e uma depois da outra.
+    # As "unidades" são o mesmo arquivo aberto várias vezes (um Database cada): mesma carga
+    # por unidade sem copiar o banco N vezes.
+    if not importlib.util.find_spec("pandas"):
+        return {"pulado": "pandas não instalado"}
+    ini, fim = ctx["mes_fim"].replace(year=ctx["mes_fim"].year - 1), ctx["mes_fim"]
+    res = {}
+    for n in UNIDADES_BENCH:
+        caminhos = {f"unidade {i + 1}": ctx["db"].path for i in range(n)}
+        for modo, threads in (("paralelo", UNIDADES_THREADS), ("sequencial", 1)):
+            unidades = Unidades(caminhos, threads)
+            ler = Consolidado(unidades, {nome: leitor(unidades.banco(nome)) for nome in unidades.nomes})
+            res[f"{n}_unidades_{modo}_ms"], _ = medir(lambda: tela_bi(ler, ini, fim), 5)
+    return res
+
+# =========================================================
+# Escrita (rodam depois das leituras, na cópia do banco)
+# =========================================================
+def bench_comissoes(ctx):
+    db = ctx["db"]
+    res = {}
+    with db.reader() as conn:
+        n_vendas = conn.execute("SELECT COUNT(*) FROM vendas").fetchone()[0]
+
+    def recalcular():
+        with db.writer() as conn:
+            return recalcular_comissoes(conn, date.min, date.max)
+
+    _, res["recalcular_sem_mudanca_ms"] = uma_vez(recalcular)
+    with db.writer() as conn:
+        conn.execute("UPDATE comissao_regras SET pct = pct + 0.05 WHERE servico = 'Escova'")
+    res["recalcular_alteradas"], res["recalcular_regra_nova_ms"] = uma_vez(recalcular)
+    with db.writer() as conn:
+        conn.execute("UPDATE comissao_regras SET pct = pct - 0.05 WHERE servico = 'Escova'")
+    recalcular()
+
+    # o caminho antigo: uma consulta de regra + um UPDATE por venda
+    amostra = min(n_vendas, 5000)
+    with db.reader() as conn:
+        linhas = conn.execute(
+            "SELECT id, profissional, servico, valor, data FROM vendas ORDER BY id LIMIT ?", (amostra,)
+        ).fetchall()
+
+    def escalar():
+        with db.writer() as conn:
+            for vid, prof, serv, valor, d in linhas:
+                conn.execute("UPDATE vendas SET comissao = ? WHERE id = ?",
+                             (calc_comissao(conn, prof, serv, valor, date.fromisoformat(d)), vid))
+
+    _, ms = uma_vez(escalar)
+    res["escalar_por_venda_us"] = round(ms * 1000 / max(1, amostra), 2)
+    res["escalar_estimado_todas_ms"] = round(ms * n_vendas / max(1, amostra), 1)
+    res["vendas"] = n_vendas
+    return res
+
+def bench_concorrencia(ctx):
+    db = ctx["db"]
+    slots = SlotIndex(db)
+    ler = _ler_sem_cache(ctx) if importlib.util.find_spec("pandas") else None
+    tempos = {"agenda": [], "bi": []}
+    ocupados = [0]
+    lock = threading.Lock()
+    inicio = ctx["fim"] + timedelta(days=1)
+
+    def sessao(i):
+        rng = random.Random(i)
+        tipo = "agenda" if i % 2 == 0 or ler is None else "bi"
+        for _ in range(OPS_POR_SESSAO):
+            t0 = time.perf_counter()
+            if tipo == "agenda":
+                dia = inicio + timedelta(days=rng.randrange(60))
+                try:
+                    agendar(db, slots, dia, f"{rng.randrange(8, 18):02d}:{rng.choice(['00', '30'])}",
+                            f"Carga {i}", "(11) 90000-0000", rng.choice(SERVICOS[:-1]), rng.choice(PROFISSIONAIS))
+                except HorarioOcupado:
+                    with lock:
+                        ocupados[0] += 1
+            else:
+                a, m = ctx["inicio"].year + rng.randrange(3), rng.randrange(1, 13)
+                ini, fim = month_range(a, m)
+                bi_totais(ler, ini, fim)
+                vendas_por_profissional(ler, ini, fim)
+            ms = (time.perf_counter() - t0) * 1000
+            with lock:
+                tempos[tipo].append(ms)
+
+    threads = [threading.Thread(target=sessao, args=(i,)) for i in range(SESSOES)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    total = time.perf_counter() - t0
+
+    res = {"sessoes": SESSOES, "agendamentos_recusados": ocupados[0]}
+    for tipo, ms in tempos.items():
+        if ms:
+            res[f"{tipo}_p50_ms"] = round(_pct(ms, 0.5), 2)
+            res[f"{tipo}_p99_ms"] = round(_pct(ms, 0.99), 2)
+    res["ops_por_segundo"] = round(sum(len(v) for v in tempos.values()) / total)
+    return res
+
+def bench_lembretes(ctx):
+    with ctx["db"].reader() as conn:
+        dia = conn.execute("SELECT data FROM agenda GROUP BY data ORDER BY COUNT(*) DESC LIMIT 1").fetchone()[0]
+    gerados, ms = uma_vez(lambda: gerar_lembretes(ctx["db"], date.fromisoformat(dia)))
+    return {"dia_mais_cheio_gerados": gerados, "gerar_ms": ms}
+
+def bench_lote(ctx):
+    rng = random.Random(1)
+    dia0 = ctx["fim"] + timedelta(days=90)
+    linhas = []
+    for i in range(LOTE_OPS):
+        dia = (dia0 + timedelta(days=i % 200)).isoformat()
+        op = rng.random()
+        if op < 0.6:
+            linhas.append(json.dumps({"op": "venda", "data": dia, "cliente": f"Lote {i % 300}", "servico": "Escova",
+                                      "profissional": rng.choice(PROFISSIONAIS), "valor": 80}))
+        elif op < 0.9:
+            linhas.append(json.dumps({"op": "agendamento", "data": dia, "hora": f"{8 + i % 10:02d}:00",
+                                      "cliente": f"Lote {i % 300}", "telefone": "(11) 98888-0000",
+                                      "servico": "Corte", "profissional": rng.choice(PROFISSIONAIS)}))
+        else:
+            linhas.append(json.dumps({"op": "despesa", "data": dia, "descricao": "Produtos", "valor": 120}))
+    res = executar_lote(ctx["db"], linhas)
+    return {"ops": LOTE_OPS, "ok": res["ok"], "erros": res["erros"], "segundos": res["segundos"],
+            "por_segundo": res["por_segundo"]}
+
+def bench_exclusao(ctx):
+    db = ctx["db"]
+    res = {}
+    with db.reader() as conn:
+        ids_v = [r[0] for r in conn.execute("SELECT id FROM vendas WHERE id % 100 = 0 LIMIT 10000")]
+        ids_a = [r[0] for r in conn.execute("SELECT id FROM agenda WHERE id % 100 = 0 LIMIT 10000")]
+
+    # o caixa registrando vendas enquanto a exclusão roda: quanto cada venda espera
+    def checkout(tempos, parar):
+        while not parar.is_set():
+            t0 = time.perf_counter()
+            registrar_venda(db, ctx["fim"], "Carga exclusão", "", SERVICOS[0], PROFISSIONAIS[0], 80)
+            tempos.append((time.perf_counter() - t0) * 1000)
+            time.sleep(0.002)
+
+    def com_checkout(fn):
+        tempos, parar = [], threading.Event()
+        t = threading.Thread(target=checkout, args=(tempos, parar))
+        t.start()
+        time.sleep(0.01)
+        r, ms = uma_vez(fn)
+        parar.set()
+        t.join()
+        return r, ms, tempos
+
+    # uma transação só (como era) x lotes
+    r, res["vendas_uma_transacao_ms"], tempos = com_checkout(lambda: excluir(db, "vendas", ids_v, lote=len(ids_v)))
+    res["checkout_uma_transacao_max_ms"] = round(max(tempos), 2) if tempos else None
+    desfazer(db, r["exclusao_id"])
+    r, res["vendas_ms"], tempos = com_checkout(lambda: excluir(db, "vendas", ids_v))
+    res["checkout_durante_lotes_p99_ms"] = round(_pct(tempos, 0.99), 2) if tempos else None
+    res["checkout_durante_lotes_max_ms"] = round(max(tempos), 2) if tempos else None
+    _, res["desfazer_vendas_ms"] = uma_vez(lambda: desfazer(db, r["exclusao_id"]))
+
+    slots = SlotIndex(db)
+    r, res["agenda_ms"] = uma_vez(lambda: excluir(db, "agenda", ids_a, slots))
+    _, res["desfazer_agenda_ms"] = uma_vez(lambda: desfazer(db, r["exclusao_id"], slots))
+    excluir(db, "vendas", ids_v)
+    excluir(db, "agenda", ids_a, slots)
+    res["purgadas"], res["purgar_ms"] = uma_vez(lambda: purgar(db, prazo=0))
+    res["vendas_excluidas"], res["agenda_excluidos"] = len(ids_v), len(ids_a)
+    return res
+
+def bench_backup(ctx):
+    db, pasta = ctx["db"], ctx["pasta"]
+    res = {}
+    zip_path, res["zip_ms"] = uma_vez(lambda: build_backup_zip(db, os.path.join(pasta, "zip")))
+    res["zip_mb"] = round(os.path.getsize(zip_path) / 2**20, 2)
+
+    # escritas do caixa durante o snapshot: quanto tempo cada uma espera
+    def escrever(tempos, parar):
+        while not parar.is_set():
+            t0 = time.perf_counter()
+            registrar_gasto(db, ctx["fim"], "Carga snapshot", 1)
+            tempos.append((time.perf_counter() - t0) * 1000)
+            time.sleep(0.002)
+
+    antes, parar = [], threading.Event()
+    t = threading.Thread(target=escrever, args=(antes, parar))
+    t.start()
+    time.sleep(0.3)
+    parar.set()
+    t.join()
+
+    durante, parar = [], threading.Event()
+    t = threading.Thread(target=escrever, args=(durante, parar))
+    t.start()
+    snap, res["snapshot_ms"] = uma_vez(lambda: criar_snapshot(db, pasta=os.path.join(pasta, "snap")))
+    parar.set()
+    t.join()
+    res["snapshot_mb"] = round(os.path.getsize(snap) / 2**20, 1)
+    res["escrita_sem_snapshot_p99_ms"] = round(_pct(antes, 0.99), 2)
+    res["escrita_durante_snapshot_p99_ms"] = round(_pct(durante, 0.99), 2) if durante else None
+    res["escrita_durante_snapshot_max_ms"] = round(max(durante), 2) if durante else None
+    res["escritas_durante_snapshot"] = len(durante)
+    return res
+
+def bench_importacao(ctx):
+    # o vendas_backup.csv do próprio banco num banco vazio, depois de novo (tudo duplicado)
+    pasta = os.path.join(ctx["pasta"], "importacao")
+    zip_path = build_backup_zip(ctx["db"], pasta)
+    with zipfile.ZipFile(zip_path) as zf:
+        csv_path = zf.extract("vendas_backup.csv", pasta)
+    destino = abrir_banco(os.path.join(pasta, "importado.db"))
+    primeira = importar_arquivo(destino, csv_path)[0]
+    segunda = importar_arquivo(destino, csv_path)[0]
+    return {
+        "linhas": primeira["lidas"],
+        "inseridas": primeira["inseridas"],
+        "segundos": primeira["segundos"],
+        "por_segundo": primeira["por_segundo"],
+        "reimportar_duplicadas": segunda["duplicadas"],
+        "reimportar_segundos": segunda["segundos"],
+        "reimportar_por_segundo": segunda["por_segundo"],
+    }
+
+def bench_analitico(ctx):
+    # exportação colunar completa, incremental e leitura de 3 anos contra o pd.read_sql da tabela
+    if not (importlib.util.find_spec("pyarrow") and importlib.util.find_spec("pandas")):
+        return {"pulado": "pyarrow/pandas não instalados"}
+    import pandas as pd
+    from artmax.analitico import exportar_analitico, ler_analitico, clientes_do_periodo, resumo_exportacao
+
+    db, ini, fim = ctx["db"], ctx["inicio"], ctx["mes_fim"]
+    res = {}
+    for formato in ("parquet", "arrow"):
+        # arrow por último: é o formato padrão e o que as leituras abaixo usam
+        pasta = os.path.join(ctx["pasta"], f"analitico_{formato}")
+        exp = exportar_analitico(db, pasta, formato)
+        res[f"{formato}_exportar_s"] = exp["segundos"]
+        res[f"{formato}_mb"] = resumo_exportacao(pasta)["mb"]
+    _, res["sem_mudanca_ms"] = uma_vez(lambda: exportar_analitico(db, pasta))
+    registrar_gasto(db, ctx["mes_ini"], "Benchmark", 1.0)
+    exp, res["um_gasto_novo_ms"] = uma_vez(lambda: exportar_analitico(db, pasta))
+    res["um_gasto_novo_meses"] = exp["gastos"]["meses"]
+
+    colunas = ["data", "valor", "cliente_id"]
+    res["ler_3_anos_ms"], _ = medir(lambda: ler_analitico("vendas", ini, fim, colunas, pasta), 5)
+    tabela = ler_analitico("vendas", ini, fim, colunas, pasta)
+    res["ler_3_anos_linhas"] = tabela.num_rows
+    res["ler_3_anos_mb"] = round(tabela.nbytes / 2**20, 1)
+    res["clientes_do_periodo_ms"], _ = medir(lambda: clientes_do_periodo(db, ini, fim, pasta=pasta), 5)
+
+    def read_sql():
+        with db.reader() as conn:
+            return pd.read_sql("SELECT * FROM vendas WHERE data >= ? AND data < ? AND exclusao_id IS NULL", conn,
+                               params=[date_iso(ini), date_iso(fim)])
+
+    df, res["read_sql_3_anos_ms"] = uma_vez(read_sql)
+    res["read_sql_3_anos_mb"] = round(df.memory_usage(deep=True).sum() / 2**20, 1)
+    return res
+
+BENCHMARKS = {
+    "agenda": bench_agenda,
+    "vendas": bench_vendas,
+    "registros": bench_registros,
+    "bi": bench_bi,
+    "graficos": bench_graficos,
+    "unidades": bench_unidades,
+    "comissoes": bench_comissoes,
+    "concorrencia": bench_concorrencia,
+    "lembretes": bench_lembretes,
+    "lote": bench_lote,
+    "exclusao": bench_exclusao,
+    "backup": bench_backup,
+    "importacao": bench_importacao,
+    "analitico": bench_analitico,
+}
+
+# =========================================================
+# Execução
+# =========================================================
+def banco_base(n: int, seed: int):
+    # gerado uma vez por (tamanho, semente, versão do schema) e reaproveitado
+    os.makedirs(DADOS, exist_ok=True)
+    path = os.path.join(DADOS, f"artmax_{n}_s{seed}_v{len(MIGRATIONS)}.db")
+    meta_path = path + ".json"
+    if not os.path.exists(meta_path):
+        for resto in (path, path + "-wal", path + "-shm"):
+            if os.path.exists(resto):
+                os.remove(resto)
+        print(f"  gerando {n:,} vendas (seed {seed})...".replace(",", "."), flush=True)
+        meta = gerar(path, n, seed)
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+    with open(meta_path, encoding="utf-8") as f:
+        return path, json.load(f)
+
+def rodar_escala(n: int, seed: int, nomes):
+    base, meta = banco_base(n, seed)
+    pasta = tempfile.mkdtemp(prefix=f"artmax-bench-{n}-")
+    try:
+        path = shutil.copy(base, os.path.join(pasta, "artmax.db"))
+        fim = date.fromisoformat(meta["ate"])
+        mes_ini, mes_fim = month_range(fim.year, fim.month)
+        ctx = {
+            "db": abrir_banco(path),
+            "pasta": pasta,
+            "inicio": date.fromisoformat(meta["de"]),
+            "fim": fim,
+            "mes_ini": mes_ini,
+            "mes_fim": mes_fim,
+        }
+        resultado = {"dados": meta}
+        for nome in nomes:
+            print(f"  {nome}...", end=" ", flush=True)
+            t0 = time.perf_counter()
+            resultado[nome] = BENCHMARKS[nome](ctx)
+            print(f"{time.perf_counter() - t0:.1f}s", flush=True)
+        return resultado
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+def _versao():
+    try:
+        r = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=RAIZ)
+        return r.stdout.strip() or "local"
+    except OSError:
+        return "local"
+
+# =========================================================
+# Relatório e comparação
+# =========================================================
+def _e_tempo(metrica: str) -> bool:
+    return metrica.endswith(("_ms", "_us")) or metrica in ("segundos", "reimportar_segundos")
+
+def _e_vazao(metrica: str) -> bool:
+    return "por_segundo" in metrica
+
+def imprimir(resultado, anterior=None):
+    for escala, benches in resultado["escalas"].items():
+        print(f"\n== {int(escala):,} vendas ==".replace(",", "."))
+        antes = (anterior or {}).get("escalas", {}).get(escala, {})
+        for bench, metricas in benches.items():
+            if bench == "dados":
+                continue
+            for metrica, valor in metricas.items():
+                if isinstance(valor, list):
+                    continue
+                linha = f"  {bench:<13} {metrica:<36} {valor!s:>12}"
+                velho = antes.get(bench, {}).get(metrica)
+                if isinstance(valor, (int, float)) and isinstance(velho, (int, float)) and velho and valor:
+                    if _e_tempo(metrica) or _e_vazao(metrica):
+                        razao = valor / velho if _e_tempo(metrica) else velho / valor
+                        marca = "  PIOROU" if razao >= PIOROU else ("  melhorou" if razao <= 1 / PIOROU else "")
+                        linha += f"   antes {velho!s:>10} ({razao:.2f}x){marca}"
+                print(linha)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks do Artmax por escala de dados")
+    parser.add_argument("--escalas", type=int, nargs="+", default=ESCALAS_PADRAO, help="nº de vendas geradas")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--so", nargs="+", choices=list(BENCHMARKS), help="roda só estes benchmarks")
+    parser.add_argument("--json", help="arquivo de saída (padrão: benchmarks/resultados/<commit>-<data>.json)")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior")
+    args = parser.parse_args()
+
+    nomes = args.so or list(BENCHMARKS)
+    nomes = [n for n in BENCHMARKS if n in nomes]  # leituras antes das escritas
+    resultado = {
+        "versao": _versao(),
+        "quando": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "sqlite": sqlite3.sqlite_version,
+        "maquina": f"{platform.system()} {platform.machine()} ({os.cpu_count()} CPUs)",
+        "seed": args.seed,
+        "escalas": {},
+    }
+    for n in args.escalas:
+        print(f"escala {n:,}".replace(",", "."), flush=True)
+        resultado["escalas"][str(n)] = rodar_escala(n, args.seed, nomes)
+
+    anterior = None
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            anterior = json.load(f)
+    imprimir(resultado, anterior)
+
+    saida = args.json or os.path.join(RESULTADOS, f"{resultado['versao']}-{datetime.now():%Y%m%d-%H%M}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+    print(f"\nresultado: {saida}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# =========================================================
+# gspread falso, em memória (mesma superfície que artmax.sheets usa)
+# =========================================================
+class ErroAPI(Exception):
+    # como gspread.exceptions.APIError: o status HTTP vem em e.response.status_code
+    def __init__(self, status_code: int):
+        super().__init__(f"HTTP {status_code}")
+        self.response = type("Resposta", (), {"status_code": status_code})()
+
+class FakeWorksheet:
+    def __init__(self, planilha, id: int, title: str):
+        self.planilha = planilha
+        self.id = id
+        self.title = title
+        self.linhas = []
+
+    def update(self, range_name: str, values):
+        assert range_name == "A1"
+        self.linhas[:len(values)] = [list(v) for v in values]
+
+    def append_rows(self, values, value_input_option: str = "RAW"):
+        client = self.planilha.client
+        client.chamadas += 1
+        if client.ao_enviar:
+            client.ao_enviar()
+        falhas = client.falhas
+        erro = falhas.pop(0) if falhas else None
+        if erro is not None:
+            raise erro
+        self.linhas.extend(list(v) for v in values)
+
+class FakeSpreadsheet:
+    def __init__(self, client, id: str, titulo: str):
+        self.client = client
+        self.id = id
+        self.title = titulo
+        self.url = f"https://docs.google.com/spreadsheets/d/{id}"
+        self.abas = [FakeWorksheet(self, 0, "Página1")]
+
+    @property
+    def sheet1(self):
+        return self.abas[0]
+
+    def worksheet(self, title: str):
+        return next(ws for ws in self.abas if ws.title == title)
+
+    def batch_update(self, body: dict):
+        for req in body["requests"]:
+            if "addSheet" in req:
+                self.abas.append(FakeWorksheet(self, len(self.abas) + 1, req["addSheet"]["properties"]["title"]))
+            elif "deleteSheet" in req:
+                self.abas = [ws for ws in self.abas if ws.id != req["deleteSheet"]["sheetId"]]
+
+class FakeClient:
+    # falhas: resultado, em ordem, das próximas chamadas de append_rows (exceção a levantar ou None = ok)
+    # ao_enviar: chamado no início de cada append_rows (para olhar o estado do banco durante o envio)
+    def __init__(self, falhas=(), ao_enviar=None):
+        self.planilhas = {}
+        self.falhas = list(falhas)
+        self.ao_enviar = ao_enviar
+        self.chamadas = 0
+
+    def create(self, titulo: str):
+        sh = FakeSpreadsheet(self, f"planilha{len(self.planilhas) + 1}", titulo)
+        self.planilhas[sh.id] = sh
+        return sh
+
+    def open_by_key(self, key: str):
+        return self.planilhas[key]
@@ -0,0 +1,39 @@
+import random
+from datetime import date
+
+from artmax.agenda import SlotIndex, min_hora
+from artmax.db import abrir_banco
+
+DIA = date(2024, 5, 2)
+
+def _sobreposto(intervalos, ini, fim):
+    return {i for a, b, i in intervalos if a < fim and b > ini}
+
+def test_conflito_bate_com_busca_completa(tmp_path):
+    # encaixes já sobrepostos, incluídos um a um: max_fim atualizado no lugar tem que valer
+    # o mesmo que montar o dia de novo
+    slots = SlotIndex(abrir_banco(str(tmp_path / "artmax.db")))
+    slots.conflito("Evelyn", DIA, "08:00", 30)  # carrega o dia (vazio) no índice
+    rnd = random.Random(42)
+    intervalos = []
+    for agenda_id in range(1, 200):
+        ini, duracao = rnd.randrange(480, 1140, 5), rnd.choice([15, 30, 60, 120, 180])
+        slots.adicionar("Evelyn", DIA, min_hora(ini), duracao, agenda_id)
+        intervalos.append((ini, ini + duracao, agenda_id))
+
+        assert slots._dias[("Evelyn", DIA.isoformat())] == SlotIndex._montar(sorted(intervalos))
+        for _ in range(5):
+            q, d = rnd.randrange(420, 1200, 5), rnd.choice([15, 45, 90])
+            achado = slots.conflito("Evelyn", DIA, min_hora(q), d)
+            esperado = _sobreposto(intervalos, q, q + d)
+            assert (achado is None) == (not esperado)
+            assert achado is None or achado in esperado
+
+def test_dias_limitados(tmp_path):
+    slots = SlotIndex(abrir_banco(str(tmp_path / "artmax.db")), max_dias=3)
+    for dia in range(1, 6):
+        slots.conflito("Evelyn", date(2024, 5, dia), "08:00", 30)
+    slots.conflito("Evelyn", date(2024, 5, 3), "08:00", 30)  # o mais usado fica
+    slots.conflito("Evelyn", date(2024, 5, 6), "08:00", 30)
+
+    assert list(slots._dias) == [("Evelyn", "2024-05-05"), ("Evelyn", "2024-05-03"), ("Evelyn", "2024-05-06")]
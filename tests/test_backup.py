@@ -0,0 +1,55 @@
+import csv
+import io
+import os
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from artmax.db import abrir_banco
+from artmax.backup import build_backup_zip, criar_snapshot, restaurar_snapshot
+from artmax.despesas import registrar_gasto
+
+def _gastos(path):
+    with zipfile.ZipFile(path) as zf:
+        texto = zf.read("gastos_backup.csv").decode("utf-8-sig")
+    return [r["descricao"] for r in csv.DictReader(io.StringIO(texto))]
+
+def test_zip_nao_reaproveitado_depois_de_restaurar(tmp_path):
+    db = abrir_banco(str(tmp_path / "artmax.db"))
+    pasta_zip, pasta_snap = str(tmp_path / "backups"), str(tmp_path / "snapshots")
+
+    snap = criar_snapshot(db, pasta=pasta_snap)
+    registrar_gasto(db, date(2024, 5, 2), "Aluguel", 1000)
+    assert _gastos(build_backup_zip(db, pasta_zip)) == ["Aluguel"]
+
+    # volta para o banco vazio e grava outra despesa: versao_dados repete a tag do ZIP anterior
+    restaurar_snapshot(db, snap, pasta_snap, pasta_zip)
+    registrar_gasto(db, date(2024, 5, 3), "Produtos", 200)
+    assert _gastos(build_backup_zip(db, pasta_zip)) == ["Produtos"]
+
+def test_geracoes_simultaneas(tmp_path):
+    db = abrir_banco(str(tmp_path / "artmax.db"))
+    pasta = str(tmp_path / "backups")
+    for i in range(50):
+        registrar_gasto(db, date(2024, 5, 2), f"Gasto {i}", 10)
+
+    with ThreadPoolExecutor(4) as pool:
+        paths = list(pool.map(lambda _: build_backup_zip(db, pasta), range(8)))
+    assert len(set(paths)) == 1
+    assert len(_gastos(paths[0])) == 50
+    assert os.listdir(pasta) == [os.path.basename(paths[0])]  # sem .tmp sobrando
+
+def test_limpeza_poupa_zip_recente_de_outra_sessao(tmp_path):
+    db = abrir_banco(str(tmp_path / "artmax.db"))
+    pasta = str(tmp_path / "backups")
+    registrar_gasto(db, date(2024, 5, 2), "Aluguel", 1000)
+    antigo = build_backup_zip(db, pasta)
+    os.utime(antigo, (time.time() - 60,) * 2)
+    registrar_gasto(db, date(2024, 5, 3), "Produtos", 200)
+    entregue = build_backup_zip(db, pasta)  # outra sessão acabou de entregar este
+
+    registrar_gasto(db, date(2024, 5, 4), "Luz", 150)
+    atual = build_backup_zip(db, pasta)
+    assert not os.path.exists(antigo)
+    assert os.path.exists(entregue) and os.path.exists(atual)
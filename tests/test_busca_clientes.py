@@ -0,0 +1,41 @@
+from datetime import date
+
+import pytest
+
+from artmax.db import abrir_banco
+from artmax.clientes import filtro_busca_clientes
+from artmax.vendas import registrar_venda
+from artmax.exclusoes import excluir, desfazer
+
+@pytest.fixture
+def db(tmp_path):
+    return abrir_banco(str(tmp_path / "artmax.db"))
+
+def _vendas(db, texto):
+    where, params = filtro_busca_clientes(db, "vendas", texto)
+    with db.reader() as conn:
+        return [r[0] for r in conn.execute(f"SELECT id FROM vendas WHERE 1=1{where} ORDER BY id", params)]
+
+def test_vendas_por_telefone(db):
+    venda_id, _ = registrar_venda(db, date(2024, 5, 2), "Maria Souza", "(11) 98888-7777", "Escova", "Evelyn", 80)
+    registrar_venda(db, date(2024, 5, 2), "Ana Lima", "(11) 91234-5678", "Corte", "Evelyn", 50)
+
+    assert _vendas(db, "98888") == [venda_id]
+    assert _vendas(db, "(11) 98888-7777") == [venda_id]
+    assert _vendas(db, "88887777") == [venda_id]  # sem DDD
+    assert _vendas(db, "Maria") == [venda_id]
+
+def test_vendas_telefone_completado_depois(db):
+    # venda sem telefone; o cadastro ganha o telefone numa venda seguinte
+    primeira, _ = registrar_venda(db, date(2024, 5, 2), "Maria Souza", "", "Escova", "Evelyn", 80)
+    segunda, _ = registrar_venda(db, date(2024, 5, 9), "Maria Souza", "(11) 98888-7777", "Escova", "Evelyn", 80)
+
+    assert _vendas(db, "98888") == [primeira, segunda]
+
+def test_vendas_telefone_exclusao_e_desfazer(db):
+    venda_id, _ = registrar_venda(db, date(2024, 5, 2), "Maria Souza", "(11) 98888-7777", "Escova", "Evelyn", 80)
+
+    res = excluir(db, "vendas", [venda_id])
+    assert _vendas(db, "98888") == []
+    desfazer(db, res["exclusao_id"])
+    assert _vendas(db, "98888") == [venda_id]
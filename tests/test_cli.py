@@ -0,0 +1,44 @@
+import json
+import os
+from datetime import date
+
+import pytest
+
+from artmax import cli
+from artmax.db import abrir_banco
+from artmax.despesas import registrar_gasto
+
+@pytest.fixture
+def unidades(tmp_path, monkeypatch):
+    # pastas relativas (backups/, analitico/) como no app: a partir do diretório atual
+    monkeypatch.chdir(tmp_path)
+    caminhos = {"Centro": str(tmp_path / "centro.db"), "Vila Nova": str(tmp_path / "vila.db")}
+    monkeypatch.setattr(cli, "UNIDADES", caminhos)
+    for nome, path in caminhos.items():
+        registrar_gasto(abrir_banco(path), date(2024, 5, 2), f"Aluguel {nome}", 1000)
+    return caminhos
+
+def _rodar(capsys, *argv):
+    assert cli.main(list(argv)) == 0
+    return json.loads(capsys.readouterr().out.splitlines()[-1])
+
+def test_backup_e_snapshot_na_pasta_da_unidade(unidades, capsys):
+    centro = _rodar(capsys, "--unidade", "Centro", "backup")["zip"]
+    vila = _rodar(capsys, "--unidade", "Vila Nova", "backup")["zip"]
+    # o ZIP de uma unidade não apaga o da outra
+    assert os.path.dirname(centro) == os.path.join("backups", "centro")
+    assert os.path.dirname(vila) == os.path.join("backups", "vila_nova")
+    assert os.path.exists(centro) and os.path.exists(vila)
+
+    snap = _rodar(capsys, "--unidade", "Vila Nova", "snapshot")["snapshot"]
+    assert os.path.dirname(snap) == os.path.join("backups", "snapshots", "vila_nova")
+
+def test_exportar_analitico_na_pasta_da_unidade(unidades, capsys):
+    pytest.importorskip("pyarrow")
+    _rodar(capsys, "--unidade", "Centro", "exportar-analitico")
+    assert os.listdir(os.path.join("analitico", "centro"))
+    assert not os.path.exists(os.path.join("analitico", "manifesto.json"))
+
+    # --pasta explícito continua valendo
+    _rodar(capsys, "--unidade", "Centro", "exportar-analitico", "--pasta", "outra")
+    assert os.listdir("outra")
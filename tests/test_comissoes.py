@@ -0,0 +1,15 @@
+from datetime import date
+
+from artmax.db import abrir_banco
+from artmax.vendas import recalcular_comissoes, registrar_venda
+
+def test_recalculo_ignora_espacos_no_profissional(tmp_path):
+    # o checkout grava o nome como veio; a comissão dele (calc_comissao) e a do recálculo em lote têm que bater
+    db = abrir_banco(str(tmp_path / "artmax.db"))
+    venda_id, comissao = registrar_venda(db, date(2024, 5, 2), "Maria Souza", "", "Escova", " evelyn ", 100)
+    assert comissao == 50.0
+
+    with db.writer() as conn:
+        assert recalcular_comissoes(conn, date(2024, 5, 1), date(2024, 6, 1)) == 0
+    with db.reader() as conn:
+        assert conn.execute("SELECT comissao FROM vendas WHERE id = ?", (venda_id,)).fetchone()[0] == 50.0
@@ -0,0 +1,103 @@
+from datetime import date
+
+import pytest
+
+from artmax import sheets
+from artmax.db import DB_READERS, abrir_banco
+from artmax.despesas import registrar_gasto
+from artmax.sheets import SheetsExportJob
+from fake_gspread import ErroAPI, FakeClient
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    # lotes pequenos para exercitar várias idas; sem as esperas do retry
+    monkeypatch.setattr(sheets, "SHEETS_LOTE", 2)
+    esperas = []
+    monkeypatch.setattr(sheets.time, "sleep", esperas.append)
+    database = abrir_banco(str(tmp_path / "artmax.db"))
+    database.esperas = esperas
+    return database
+
+def _gastos(db, n, inicio=0):
+    return [registrar_gasto(db, date(2024, 5, 1 + i), f"Gasto {i}", 10 + i) for i in range(inicio, inicio + n)]
+
+def _exportar(db, gc, incremental=False):
+    job = SheetsExportJob(2024, 5, "Maio/2024", incremental)
+    job.executar(db, gc)
+    return job
+
+def _ids(gc, aba):
+    ws = next(iter(gc.planilhas.values())).worksheet(aba)
+    assert ws.linhas[0][0] == "id"
+    return [linha[0] for linha in ws.linhas[1:]]
+
+def test_retry_em_erro_temporario(db):
+    ids = _gastos(db, 5)
+    gc = FakeClient(falhas=[ErroAPI(429), ErroAPI(503)])
+
+    job = _exportar(db, gc)
+    assert job.status == "concluído", job.erro
+    assert _ids(gc, "Gastos") == ids
+    assert db.esperas == [1, 2]
+
+def test_erro_permanente_nao_repete(db):
+    _gastos(db, 3)
+    gc = FakeClient(falhas=[ErroAPI(403)])
+
+    job = _exportar(db, gc)
+    assert job.status == "falhou"
+    assert gc.chamadas == 1
+    assert db.esperas == []
+
+def test_incremental_so_envia_os_novos(db):
+    ids = _gastos(db, 3)
+    gc = FakeClient()
+    _exportar(db, gc)
+
+    ids += _gastos(db, 2, inicio=3)
+    job = _exportar(db, gc, incremental=True)
+    assert job.status == "concluído", job.erro
+    assert job.enviadas == 2
+    assert len(gc.planilhas) == 1
+    assert _ids(gc, "Gastos") == ids
+
+def test_retomada_depois_de_falha_nao_duplica(db):
+    ids = _gastos(db, 5)
+    # o 1º lote passa; o 2º esgota as tentativas e o job para
+    gc = FakeClient(falhas=[None] + [ErroAPI(503)] * sheets.SHEETS_TENTATIVAS)
+
+    job = _exportar(db, gc)
+    assert job.status == "falhou"
+    assert _ids(gc, "Gastos") == ids[:2]
+
+    # retomada: parte do último id enviado, sem reenviar o 1º lote
+    job = _exportar(db, gc, incremental=True)
+    assert job.status == "concluído", job.erro
+    assert job.enviadas == 3
+    assert _ids(gc, "Gastos") == ids
+
+def test_envio_sem_conexao_de_leitura_presa(db):
+    _gastos(db, 5)
+    # durante cada append_rows todas as conexões de leitura estão de volta no pool
+    livres = []
+    gc = FakeClient(falhas=[ErroAPI(429)], ao_enviar=lambda: livres.append(db._readers.qsize()))
+
+    job = _exportar(db, gc)
+    assert job.status == "concluído", job.erro
+    assert livres == [DB_READERS] * 4
+
+def test_reexportar_completo_e_depois_incremental(db):
+    # agenda e vendas vazias: sem lote enviado, o estado delas também tem que ir para a planilha nova
+    ids = _gastos(db, 3)
+    gc = FakeClient()
+    _exportar(db, gc)
+    _exportar(db, gc, incremental=False)
+    ids += _gastos(db, 1, inicio=3)
+
+    job = _exportar(db, gc, incremental=True)
+    assert job.status == "concluído", job.erro
+    assert job.url == gc.planilhas["planilha2"].url
+    assert [linha[0] for linha in gc.planilhas["planilha2"].worksheet("Gastos").linhas[1:]] == ids
+    assert len(gc.planilhas["planilha1"].worksheet("Gastos").linhas) == 4
+    with db.reader() as conn:
+        assert conn.execute("SELECT DISTINCT planilha_id FROM sheets_sync").fetchall() == [("planilha2",)]
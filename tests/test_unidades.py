@@ -0,0 +1,15 @@
+from datetime import date
+
+from artmax.cache import leitor
+from artmax.despesas import registrar_gasto
+from artmax.relatorios import primeiro_ano_com_dados
+from artmax.unidades import Consolidado, Unidades
+
+def test_primeiro_ano_consolidado_e_o_mais_antigo(tmp_path):
+    unidades = Unidades({"Centro": str(tmp_path / "centro.db"), "Vila Nova": str(tmp_path / "vila.db")})
+    registrar_gasto(unidades.banco("Centro"), date(2024, 3, 1), "Aluguel", 1000)
+    registrar_gasto(unidades.banco("Vila Nova"), date(2019, 8, 1), "Aluguel", 800)
+    ler = {u: leitor(unidades.banco(u)) for u in unidades.nomes}
+
+    assert primeiro_ano_com_dados(ler["Centro"], 2023) == 2023
+    assert primeiro_ano_com_dados(Consolidado(unidades, ler), 2023) == 2019